@@ -9,7 +9,7 @@ class CategoryAdmin(DeleteWithImageMixin, admin.ModelAdmin):
     list_filter = ('view_count',)
     search_fields = ('name', 'meta_title')
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ('view_count', 'featured_image_preview')
+    readonly_fields = ('view_count', 'featured_image_preview', 'image_status')
     save_on_top = True
     
     fieldsets = (
@@ -17,7 +17,7 @@ class CategoryAdmin(DeleteWithImageMixin, admin.ModelAdmin):
             'fields': ('name', 'slug', 'description')
         }),
         (_('Featured Image'), {
-            'fields': ('featured_image', 'featured_image_preview'),
+            'fields': ('featured_image', 'featured_image_preview', 'image_status'),
         }),
         (_('SEO'), {
             'fields': ('meta_title', 'meta_description'),
@@ -30,8 +30,9 @@ class CategoryAdmin(DeleteWithImageMixin, admin.ModelAdmin):
     )     
     
     def post_count(self, obj):
-        return obj.posts.count()
-    post_count.short_description = _('Posts')
+        return obj.published_post_count
+    post_count.short_description = _('Published Posts')
+    post_count.admin_order_field = 'published_post_count'
     
     def display_featured_image(self, obj):
         if obj.featured_image:
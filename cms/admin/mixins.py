@@ -1,33 +1,23 @@
-import os
-
 class DeleteWithImageMixin:
     """
     Admin mixin to handle deletion of models with associated images.
     """
     def delete_queryset(self, request, queryset):
         """
-        Deletes all associated image variants for models before removing them from the database.
+        Releases the images of the deleted objects, removing files no other object shares.
         """
-        for obj in queryset:
+        objs = list(queryset)
+
+        # Call the parent method to delete the objects
+        super().delete_queryset(request, queryset)
+
+        for obj in objs:
             # Check if the model instance has a featured_image field
             if hasattr(obj, 'featured_image') and obj.featured_image:
-                # Delete all image variants
-                if hasattr(obj, 'get_image_variants'):
-                    for variant in obj.get_image_variants().values():
-                        try:
-                            if os.path.exists(variant['path']):
-                                os.remove(variant['path'])
-                                self.message_user(request, f"Deleted image variant: {variant['path']}")
-                        except Exception as e:
-                            self.message_user(request, f"Error deleting image variant for {obj}: {e}", level="error")
-
-                # Delete the original image
+                # Files are listed in the image manifest and may be shared
+                # with other objects, they go with the last reference
                 try:
-                    if os.path.exists(obj.featured_image.path):
-                        os.remove(obj.featured_image.path)
-                        self.message_user(request, f"Deleted original image for: {obj}")
+                    obj.release_image_files()
+                    self.message_user(request, f"Released images for: {obj}")
                 except Exception as e:
-                    self.message_user(request, f"Error deleting original image for {obj}: {e}", level="error")
-
-        # Call the parent method to delete the objects
-        super().delete_queryset(request, queryset)
\ No newline at end of file
+                    self.message_user(request, f"Error deleting images for {obj}: {e}", level="error")
@@ -1,9 +1,21 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from django.utils.safestring import mark_safe
 from .mixins import DeleteWithImageMixin
 from .forms import PostForm
+from ..models import Post
+from ..signals import posts_bulk_updated
+
+def bulk_update_posts(queryset, **values):
+    """Updates posts in one query and notifies receivers that rely on post_save."""
+    post_ids = list(queryset.values_list('pk', flat=True))
+    published_ids = []
+    if values.get('status') == 'published':
+        published_ids = list(queryset.exclude(status='published').values_list('pk', flat=True))
+    queryset.update(updated_at=timezone.now(), **values)
+    posts_bulk_updated.send(sender=Post, post_ids=post_ids, published_ids=published_ids)
 
 class PostAdmin(DeleteWithImageMixin, admin.ModelAdmin):
     form = PostForm
@@ -15,7 +27,7 @@ class PostAdmin(DeleteWithImageMixin, admin.ModelAdmin):
     list_filter = ('status', 'is_featured', 'category', 'author', 'created_at')
     search_fields = ('title', 'content', 'meta_title')
     prepopulated_fields = {'slug': ('title',)}
-    readonly_fields = ('view_count', 'created_at', 'updated_at', 'featured_image_preview')
+    readonly_fields = ('view_count', 'created_at', 'updated_at', 'featured_image_preview', 'image_status')
     filter_horizontal = ('tags',)
     date_hierarchy = 'created_at'
     actions = ('make_draft', 'make_review', 'make_published', 'make_featured', 'make_not_featured')
@@ -26,7 +38,7 @@ class PostAdmin(DeleteWithImageMixin, admin.ModelAdmin):
             'fields': ('title', 'slug', 'author', 'content', 'excerpt', 'summary')
         }),
         (_('Featured Image'), {
-            'fields': ('featured_image', 'featured_image_preview'),
+            'fields': ('featured_image', 'featured_image_preview', 'image_status'),
         }),
         (_('Categories and Tags'), {
             'fields': ('category', 'tags')
@@ -44,24 +56,24 @@ class PostAdmin(DeleteWithImageMixin, admin.ModelAdmin):
     # Custom actions for status
     @admin.action(description=_("Mark selected posts as Draft"))
     def make_draft(modeladmin, request, queryset):
-        queryset.update(status='draft')
+        bulk_update_posts(queryset, status='draft')
 
     @admin.action(description=_("Mark selected posts as Under Review"))
     def make_review(modeladmin, request, queryset):
-        queryset.update(status='review')
+        bulk_update_posts(queryset, status='review')
 
     @admin.action(description=_("Mark selected posts as Published"))
     def make_published(modeladmin, request, queryset):
-        queryset.update(status='published')
+        bulk_update_posts(queryset, status='published')
 
     # Custom actions for is_featured
     @admin.action(description=_("Mark selected posts as Featured"))
     def make_featured(modeladmin, request, queryset):
-        queryset.update(is_featured=True)
+        bulk_update_posts(queryset, is_featured=True)
 
     @admin.action(description=_("Mark selected posts as Not Featured"))
     def make_not_featured(modeladmin, request, queryset):
-        queryset.update(is_featured=False)
+        bulk_update_posts(queryset, is_featured=False)
 
     
     def display_featured_image(self, obj):
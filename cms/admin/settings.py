@@ -15,7 +15,8 @@ class SiteSettingsAdmin(admin.ModelAdmin):
         (_('Image Settings'), {
             'fields': (
                 'image_sizes',
-                'image_webp_quality',
+                'image_formats',
+                ('image_avif_quality', 'image_webp_quality', 'image_jpeg_quality'),
                 ('image_aspect_ratio_width', 'image_aspect_ratio_height'),
                 'image_upload_path_format'
             ),
@@ -24,5 +24,6 @@ class TagAdmin(admin.ModelAdmin):
     )      
     
     def post_count(self, obj):
-        return obj.posts.count()
-    post_count.short_description = _('Posts')
\ No newline at end of file
+        return obj.published_post_count
+    post_count.short_description = _('Published Posts')
+    post_count.admin_order_field = 'published_post_count'
\ No newline at end of file
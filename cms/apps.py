@@ -5,3 +5,6 @@ class CmsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cms'
     verbose_name = 'Cms'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Page cache versions and the settings stamp must be seen by every worker."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Warning(
+            f"The default cache ({backend}) is not shared between processes.",
+            hint="Edits only invalidate cached pages in the worker that saved them. "
+                 "Use a file, database, Redis or Memcached cache (see CACHES in config/settings.py).",
+            id='cms.W001',
+        )]
+    return []
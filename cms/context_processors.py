@@ -2,7 +2,7 @@ from .models import SiteSettings
 
 def site_settings(request):
     """Adds site settings as individual context variables"""
-    settings = SiteSettings.get_instance()
+    settings = SiteSettings.for_request(request)
     return {
         "site_name": settings.site_name,
         "site_description": settings.site_description,
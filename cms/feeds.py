@@ -1,21 +1,93 @@
 from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
-from django.utils.feedgenerator import Atom1Feed
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
 from .models.settings import SiteSettings
 from .models.post import Post
-from .models.category import Category  
+from .models.category import Category
+from .models.tag import Tag
 from django.contrib.sites.shortcuts import get_current_site
-from bs4 import BeautifulSoup
-import os
+from . import page_cache, websub
+
+class HubRssFeed(Rss201rev2Feed):
+    """RSS advertising its WebSub hub next to the self link"""
+    def add_root_elements(self, handler):
+        super().add_root_elements(handler)
+        if self.feed.get('hub_url'):
+            handler.addQuickElement('atom:link', None, {'rel': 'hub', 'href': self.feed['hub_url']})
+
+class HubAtomFeed(Atom1Feed):
+    """Atom advertising its WebSub hub"""
+    def add_root_elements(self, handler):
+        super().add_root_elements(handler)
+        if self.feed.get('hub_url'):
+            handler.addQuickElement('link', '', {'rel': 'hub', 'href': self.feed['hub_url']})
 
 class ExtendedRSSFeed(Feed):
-    def __init__(self):
-        super().__init__()
+    feed_type = HubRssFeed
+    # Set to post ids to render only those posts, for WebSub pushes
+    delta_ids = None
+
+    @property
+    def site_settings(self):
+        """Settings of the request being served, see SiteSettingsMiddleware"""
         try:
-            self.site_settings = SiteSettings.get_settings()
+            return SiteSettings.for_request(getattr(self, 'request', None))
         except:
-            self.site_settings = None
+            return None
+
+    def get_cache_scopes(self, **kwargs):
+        return [page_cache.GLOBAL]
+
+    def compute_last_modified(self, **kwargs):
+        return page_cache.latest_update(Post.objects.all())
+
+    def __call__(self, request, *args, **kwargs):
+        """Answers conditional GETs from feed readers with 304 before building the feed"""
+        url = request.build_absolute_uri()
+        scopes = self.get_cache_scopes(**kwargs)
+        return page_cache.conditional_response(
+            request,
+            etag=page_cache.get_etag(url, scopes),
+            last_modified=page_cache.get_last_modified(url, scopes, lambda: self.compute_last_modified(**kwargs)),
+            get_response=lambda: self.get_cached_response(request, url, scopes, *args, **kwargs),
+        )
+
+    def get_cached_response(self, request, url, scopes, *args, **kwargs):
+        """
+        Serves the rendered feed document from the cache. It is built once
+        per feed URL and content version, so the next request after a post
+        is published, edited or removed renders it again.
+        """
+        key = f"feed:{page_cache.versioned_key(url, scopes)}"
+        document = cache.get(key)
+        if document is None:
+            response = super().__call__(request, *args, **kwargs)
+            document = (response.headers['Content-Type'], response.content)
+            cache.set(key, document, page_cache.get_page_cache_timeout())
+        content_type, content = document
+        return HttpResponse(content, content_type=content_type)
+
+    def get_items_queryset(self):
+        """Published posts with what the item methods read, newest first"""
+        queryset = (
+            Post.objects.active()
+            .select_related('author', 'category')
+            .prefetch_related('tags')
+            .order_by('-created_at')
+        )
+        if self.delta_ids is not None:
+            queryset = queryset.filter(pk__in=self.delta_ids)
+        return queryset
+
+    def feed_url(self):
+        # The WebSub topic, subscribers match pushes against it
+        return self.request.path
+
+    def feed_extra_kwargs(self, obj):
+        return {'hub_url': websub.get_hub_url(self.request)}
 
     def item_pubdate(self, item):
         return item.created_at
@@ -31,40 +103,26 @@ class ExtendedRSSFeed(Feed):
         tags = [tag.name for tag in item.tags.all()]
         return categories + tags
 
-    def get_image_url(self, image_field):
-        if not image_field or not hasattr(image_field, 'url') or not self.site_settings:
+    def get_image_variant(self, item):
+        """Largest variant of the post image, or of its category image"""
+        owner = item if item.featured_image else item.category
+        if not owner.featured_image:
             return None
-        base_url, ext = str(image_field.url).rsplit('.', 1)
-        largest_size = max(self.site_settings.image_sizes)
-        return f"{base_url}-{largest_size}w.webp"
+        return owner.get_largest_image_variant()
 
     def item_enclosure_url(self, item):
-        if not self.site_settings:
+        variant = self.get_image_variant(item)
+        if not variant:
             return None
-        featured_image_url = item.get_featured_image_url()
-        if featured_image_url:
-            base_url, ext = str(featured_image_url).rsplit('.', 1)
-            largest_size = max(self.site_settings.image_sizes)
-            webp_url = f"{base_url}-{largest_size}w.webp"
-            return self.request.build_absolute_uri(webp_url) if hasattr(self, 'request') else webp_url
-        return None
+        return self.request.build_absolute_uri(variant['url']) if hasattr(self, 'request') else variant['url']
 
     def item_enclosure_length(self, item):
-        if not item.featured_image or not self.site_settings:
-            return 0
-        try:
-            featured_image_url = item.get_featured_image_url()
-            if featured_image_url:
-                base_url, ext = str(featured_image_url).rsplit('.', 1)
-                largest_size = max(self.site_settings.image_sizes)
-                webp_path = f"{base_url}-{largest_size}w.webp"
-                return os.path.getsize(webp_path) if os.path.exists(webp_path) else 0
-        except:
-            return 0
-        return 0
+        variant = self.get_image_variant(item)
+        return variant.get('bytes', 0) if variant else 0
 
     def item_enclosure_mime_type(self, item):
-        return 'image/webp' if item.featured_image else None
+        variant = self.get_image_variant(item)
+        return f"image/{variant.get('format', 'webp')}" if variant else None
 
     def get_feed(self, obj, request):
         self.request = request
@@ -81,18 +139,13 @@ class BlogFeed(ExtendedRSSFeed):
         return reverse('post_list')
     
     def items(self):
-        return Post.objects.active().order_by('-created_at')[:20]
+        return self.get_items_queryset()[:20]
     
     def item_title(self, item):
         return item.meta_title or item.title
     
     def item_description(self, item):
-        if item.excerpt:
-            return item.excerpt
-        soup = BeautifulSoup(item.content, 'html.parser')
-        for img in soup.find_all('img'):
-            img.replace_with(f"[Image: {img['alt']}]" if img.get('alt') else '')
-        return soup.get_text()[:200]
+        return item.excerpt or item.text_excerpt
     
     def item_link(self, item):
         return item.get_absolute_url()
@@ -101,6 +154,15 @@ class BlogFeed(ExtendedRSSFeed):
         return item.author.get_full_name() or item.author.username
 
 class CategoryFeed(ExtendedRSSFeed):
+    def get_cache_scopes(self, slug):
+        # Items list their tag names, which bump the global version
+        return [('category', slug), page_cache.GLOBAL]
+
+    def compute_last_modified(self, slug):
+        return page_cache.latest_update(
+            Category.objects.filter(slug=slug), Post.objects.filter(category__slug=slug), Tag.objects.all()
+        )
+
     def get_object(self, request, slug):
         self.request = request
         return Category.objects.get(slug=slug)
@@ -118,18 +180,13 @@ class CategoryFeed(ExtendedRSSFeed):
         return reverse('category_posts', args=[obj.slug])
     
     def items(self, obj):
-        return Post.objects.active().filter(category=obj).order_by('-created_at')[:20]
+        return self.get_items_queryset().filter(category=obj)[:20]
     
     def item_title(self, item):
         return item.meta_title or item.title
     
     def item_description(self, item):
-        if item.excerpt:
-            return item.excerpt
-        soup = BeautifulSoup(item.content, 'html.parser')
-        for img in soup.find_all('img'):
-            img.replace_with(f"[Image: {img['alt']}]" if img.get('alt') else '')
-        return soup.get_text()[:200]
+        return item.excerpt or item.text_excerpt
     
     def item_link(self, item):
         return item.get_absolute_url()
@@ -138,11 +195,11 @@ class CategoryFeed(ExtendedRSSFeed):
         return item.author.get_full_name() or item.author.username
 
 class BlogAtomFeed(BlogFeed):
-    feed_type = Atom1Feed
+    feed_type = HubAtomFeed
     def subtitle(self):
         return self.description()
 
 class CategoryAtomFeed(CategoryFeed):
-    feed_type = Atom1Feed
+    feed_type = HubAtomFeed
     def subtitle(self, obj):
         return self.description(obj)
\ No newline at end of file
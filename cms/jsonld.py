@@ -0,0 +1,87 @@
+"""
+Schema.org JSON-LD assembled from cached fragments.
+
+The JSON-LD of each object (a post, a page, a post card in a listing) is
+serialized once per object version and cached as a string. Documents are
+assembled by concatenating those strings into the page-level JSON, so a
+listing page costs one cache round trip for its items and no re-encoding.
+
+A fragment's version is the ``updated_at`` of the object and of the related
+objects it shows (e.g. the category name on a post), plus the site settings
+version. Image processing and author edits leave ``updated_at`` alone, so the
+image state and author name are part of it too. Fragments hold absolute URLs,
+so they are also keyed by origin.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from .models import SiteSettings
+from . import page_cache
+
+KEY_PREFIX = 'jsonld'
+
+
+def item_version(item):
+    parts = [item._meta.label, item.pk, item.updated_at.timestamp()]
+    if hasattr(item, 'image_manifest'):
+        # Image jobs save with update_fields, updated_at stays the same
+        parts += [item.featured_image.name, item.image_status, item.image_manifest.get('settings')]
+    author = getattr(item, 'author', None)
+    if author is not None:
+        parts.append(author.get_full_name() or author.username)
+    return '.'.join(map(str, parts))
+
+
+def fragment_key(request, name, obj, related=()):
+    versions = [item_version(item) for item in (obj, *related)]
+    parts = [request.build_absolute_uri('/'), name, SiteSettings.get_version(), *versions]
+    return f"{KEY_PREFIX}:{hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()}"
+
+
+def get_fragments(request, name, objects, build, related=lambda obj: ()):
+    """
+    Serialized ``build(obj)`` for each of `objects`, in order, from one cache
+    lookup. `related(obj)` lists other objects whose changes the fragment shows.
+    """
+    keys = [fragment_key(request, name, obj, related(obj)) for obj in objects]
+    cached = cache.get_many(keys)
+    missing = {}
+    for key, obj in zip(keys, objects):
+        if key not in cached:
+            cached[key] = missing[key] = json.dumps(build(obj))
+    if missing:
+        cache.set_many(missing, page_cache.get_page_cache_timeout())
+    return [cached[key] for key in keys]
+
+
+def get_fragment(request, name, obj, build, related=()):
+    return get_fragments(request, name, [obj], build, lambda obj: related)[0]
+
+
+def dumps(data, **fragments):
+    """``json.dumps(data)`` with already serialized `fragments` added as keys."""
+    members = [json.dumps(data)[1:-1]] if data else []
+    members += [f'{json.dumps(key)}: {value}' for key, value in fragments.items()]
+    return '{' + ', '.join(members) + '}'
+
+
+def merge(data, fragment):
+    """Add the members of `data` to the serialized object `fragment`."""
+    if not data:
+        return fragment
+    if fragment == '{}':
+        return json.dumps(data)
+    return json.dumps(data)[:-1] + ', ' + fragment[1:]
+
+
+def item_list(fragments, start=1, total=None):
+    """An ItemList of the serialized `fragments`, numbered from `start`."""
+    items = ', '.join(
+        f'{{"@type": "ListItem", "position": {position}, "item": {fragment}}}'
+        for position, fragment in enumerate(fragments, start=start)
+    )
+    data = {"@type": "ItemList"}
+    if total is not None:
+        data["numberOfItems"] = total
+    return dumps(data, itemListElement=f'[{items}]')
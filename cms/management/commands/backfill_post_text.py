@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from cms import page_cache
+from cms.models import Post, SiteSettings
+from cms.models.post import DERIVED_TEXT_FIELDS
+
+class Command(BaseCommand):
+    help = (
+        'Derives the plain text, word count and text excerpt of every post from its content again, '
+        'e.g. after the text extraction changed. Migration 0024 fills them on upgrade.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Posts updated per query')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch = []
+        count = 0
+        # bulk_update leaves updated_at and the save signals alone, cached
+        # pages and JSON-LD fragments are invalidated below
+        for post in Post.objects.only('pk', 'content').iterator(chunk_size=batch_size):
+            post.update_derived_text()
+            batch.append(post)
+            if len(batch) >= batch_size:
+                count += Post.objects.bulk_update(batch, DERIVED_TEXT_FIELDS)
+                batch = []
+        if batch:
+            count += Post.objects.bulk_update(batch, DERIVED_TEXT_FIELDS)
+
+        # Cards show reading times, feeds excerpts and JSON-LD the article
+        # body. JSON-LD fragments are keyed on the settings version.
+        page_cache.bump_version(page_cache.GLOBAL)
+        SiteSettings.bump_version()
+        self.stdout.write(self.style.SUCCESS(f'Derived text for {count} posts.'))
@@ -0,0 +1,67 @@
+import os
+import resource
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw
+from cms.models.featured_image import resize_and_compress_images
+from cms.models.settings import default_image_sizes
+
+def make_source(path, width, height):
+    """A synthetic JPEG with gradients and shapes, so it compresses like a photo."""
+    img = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for i in range(0, width, max(1, width // 40)):
+        draw.ellipse((i, i % height, i + width // 10, i % height + height // 10), fill=(i % 255, 90, 160))
+    img.save(path, format='JPEG', quality=92)
+
+def run_mode(source, output, sizes, cascade, runs):
+    """Runs in a fresh process so its peak RSS is not shared with the other mode."""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        results = resize_and_compress_images(
+            source, output, 'benchmark', sizes=sizes, formats={'webp': 85}, aspect_ratio=(16, 9), cascade=cascade
+        )
+        timings.append(time.perf_counter() - start)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return timings, baseline, peak, results
+
+class Command(BaseCommand):
+    help = 'Compares wall time and peak memory of the full-size and cascade image resize paths.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=6000, help='Width of the synthetic source image')
+        parser.add_argument('--height', type=int, default=4000, help='Height of the synthetic source image')
+        parser.add_argument('--runs', type=int, default=3, help='Runs per mode')
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=default_image_sizes(), help='Variant widths (16:9, WebP quality 85)'
+        )
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp()
+        try:
+            source = os.path.join(workdir, 'source.jpg')
+            make_source(source, options['width'], options['height'])
+            self.stdout.write(f"Source: {options['width']}x{options['height']} JPEG, {os.path.getsize(source)} bytes")
+
+            for label, cascade in (('full-size', False), ('cascade', True)):
+                output = os.path.join(workdir, label)
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    timings, baseline, peak, results = pool.submit(
+                        run_mode, source, output, options['sizes'], cascade, options['runs']
+                    ).result()
+
+                # ru_maxrss is in kilobytes on Linux
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label}'))
+                self.stdout.write(f'  wall time: best {min(timings):.3f}s, mean {sum(timings) / len(timings):.3f}s')
+                self.stdout.write(f'  peak RSS: {peak / 1024:.0f} MB ({(peak - baseline) / 1024:.0f} MB above baseline)')
+                self.stdout.write('  variants: ' + ', '.join(
+                    f"{variant['width']}x{variant['height']} {variant['bytes'] // 1024} KB" for variant in results
+                ))
+        finally:
+            shutil.rmtree(workdir)
@@ -0,0 +1,154 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.utils import timezone
+from cms.models import Category, Post, Tag
+
+# Mirrors migration 0015, which adds it to the auto-created through table
+TAG_POST_INDEX = models.Index(fields=['tag', 'post'], name='post_tags_tag_post_idx')
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = (
+        'Seeds posts and reports query plans and timings of the listing queries '
+        'without and with the post indexes. Changes are rolled back unless --keep is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000, help='Number of posts to seed')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded posts')
+
+    def handle(self, *args, **options):
+        if not connection.features.can_rollback_ddl and not options['keep']:
+            # Dropping and creating indexes commits implicitly (MySQL, Oracle)
+            raise CommandError(
+                f'{connection.display_name} cannot roll back index changes, so the seeded posts would be kept. '
+                'Run with --keep against a disposable database.'
+            )
+        self.repeat = options['repeat']
+        try:
+            with transaction.atomic():
+                self.seed(options['posts'])
+                indexes = [(Post, index) for index in Post._meta.indexes]
+                indexes.append((Post.tags.through, TAG_POST_INDEX))
+
+                self.set_indexes(indexes, create=False)
+                before = self.run_queries('Without indexes')
+                self.set_indexes(indexes, create=True)
+                after = self.run_queries('With indexes')
+
+                self.stdout.write(self.style.MIGRATE_HEADING('\nSummary (median ms)'))
+                for name in before:
+                    self.stdout.write(f'{name:<24} {before[name]:>9.2f} {after[name]:>9.2f}')
+
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS('Rolled back seeded posts.'))
+
+    def seed(self, count):
+        author = User.objects.first() or User.objects.create_user(username='benchmark')
+        categories = [Category.objects.create(name=f'Benchmark {uuid.uuid4().hex[:8]}') for _ in range(10)]
+        tags = [Tag.objects.create(name=f'Benchmark {uuid.uuid4().hex[:8]}') for _ in range(30)]
+
+        now = timezone.now()
+        batch = uuid.uuid4().hex[:8]
+        posts = Post.objects.bulk_create(
+            [
+                Post(
+                    title=f'Benchmark post {batch} {i}',
+                    slug=f'benchmark-{batch}-{i}',
+                    content='<p>Benchmark</p>',
+                    author=author,
+                    category=random.choice(categories),
+                    status='published' if random.random() < 0.8 else 'draft',
+                    is_featured=random.random() < 0.1,
+                    view_count=random.randint(0, 100000),
+                )
+                for i in range(count)
+            ],
+            batch_size=1000,
+        )
+        # created_at is auto_now_add, spread it over five years afterwards
+        for post in posts:
+            post.created_at = now - timedelta(minutes=random.randint(0, 5 * 365 * 24 * 60))
+        Post.objects.bulk_update(posts, ['created_at'], batch_size=1000)
+
+        Post.tags.through.objects.bulk_create(
+            [
+                Post.tags.through(post=post, tag=tag)
+                for post in posts
+                for tag in random.sample(tags, random.randint(1, 4))
+            ],
+            batch_size=1000,
+        )
+        self.category, self.tag = categories[0], tags[0]
+        self.stdout.write(self.style.SUCCESS(f'Seeded {count} posts.'))
+
+    def set_indexes(self, indexes, create):
+        # Index SQL is run directly, the SQLite schema editor refuses to
+        # open inside a transaction
+        schema_editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model, index in indexes:
+                if create:
+                    sql = str(index.create_sql(model, schema_editor))
+                else:
+                    sql = schema_editor.sql_delete_index % {
+                        'table': schema_editor.quote_name(model._meta.db_table),
+                        'name': schema_editor.quote_name(index.name),
+                    }
+                cursor.execute(sql)
+            if connection.vendor in ('postgresql', 'sqlite'):
+                cursor.execute('ANALYZE')
+
+    def get_queries(self):
+        """Listing queries as ``{name: (queryset, run)}``, `run` evaluates the queryset."""
+        active = Post.objects.active()
+        newest = ('-created_at', '-id')
+        total = active.count()
+        queries = {
+            'post_list': active.order_by(*newest)[:6],
+            'post_list_offset_deep': active.order_by(*newest)[total // 2:total // 2 + 6],
+        }
+        # Keyset pages start after a row, there is none without published posts
+        if total:
+            middle = active.order_by(*newest).values_list('created_at', 'id')[total // 2]
+            queries['post_list_keyset_deep'] = active.filter(
+                models.Q(created_at__lt=middle[0]) | models.Q(created_at=middle[0], id__lt=middle[1])
+            ).order_by(*newest)[:6]
+        queries |= {
+            'category_posts': active.filter(category=self.category).order_by(*newest)[:6],
+            'tag_posts': active.filter(tags=self.tag).order_by(*newest)[:6],
+            'popular_posts': active.order_by('-view_count')[:6],
+            'featured_posts': active.filter(is_featured=True).order_by('-created_at')[:5],
+            'last_modified': Post.objects.order_by('-updated_at').values('updated_at')[:1],
+        }
+        queries = {name: (queryset, lambda queryset=queryset: list(queryset.all())) for name, queryset in queries.items()}
+        queries['post_count'] = (active, active.count)
+        return queries
+
+    def run_queries(self, heading):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{heading}'))
+        timings = {}
+        for name, (queryset, run) in self.get_queries().items():
+            samples = []
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                run()
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[name] = statistics.median(samples)
+
+            self.stdout.write(f'{name}: {timings[name]:.2f} ms')
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f'    {line}')
+        return timings
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from cms.view_counts import get_view_counter, request_flush
+
+class Command(BaseCommand):
+    help = 'Writes buffered view counts to the database.'
+
+    def handle(self, *args, **kwargs):
+        # Workers using the in-memory backend flush on their next hit
+        request_flush()
+
+        counts = get_view_counter().flush()
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Flushed {total} views for {len(counts)} objects; flush requested from all workers.'
+        ))
@@ -0,0 +1,39 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+from cms.models import ImageJob
+from cms.models.image_job import run_image_job
+
+def init_worker():
+    # Spawned workers start without Django set up
+    if not apps.ready:
+        django.setup()
+
+class Command(BaseCommand):
+    help = 'Runs queued image jobs, generating image variants on a pool of worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Number of worker processes')
+        parser.add_argument('--interval', type=float, default=2, help='Seconds between polls for new jobs')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            while True:
+                job_ids = ImageJob.objects.claim(workers)
+                if not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+
+                # Forked workers must not inherit an open database connection
+                connections.close_all()
+                for job_id, status in zip(job_ids, pool.map(run_image_job, job_ids)):
+                    style = self.style.SUCCESS if status == ImageJob.DONE else self.style.WARNING
+                    self.stdout.write(style(f'Image job {job_id}: {status}'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from cms import static_indexes
+
+class Command(BaseCommand):
+    help = 'Writes the sitemaps and feeds, with .gz and .br siblings, into a web root for nginx to serve.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', default=static_indexes.get_root(), help='Directory to write into (STATIC_INDEX_ROOT)')
+        parser.add_argument('--base-url', default=static_indexes.get_base_url(),
+                            help='Scheme and host of the site, e.g. https://example.com (STATIC_INDEX_BASE_URL)')
+
+    def handle(self, *args, **options):
+        if not options['root'] or not options['base_url']:
+            raise CommandError('Set STATIC_INDEX_ROOT and STATIC_INDEX_BASE_URL, or pass --root and --base-url.')
+        written, unchanged, removed = static_indexes.publish(options['root'], options['base_url'])
+        for name in written:
+            self.stdout.write(f'Wrote {name}')
+        for name in removed:
+            self.stdout.write(f'Removed {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Published {len(written)} documents ({len(unchanged)} unchanged, {len(removed)} removed).'
+        ))
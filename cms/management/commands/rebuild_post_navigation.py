@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from cms.models import Post, PostNavigation
+
+class Command(BaseCommand):
+    help = 'Precomputes related posts and previous/next links for every published post.'
+
+    def handle(self, *args, **kwargs):
+        posts = Post.objects.active().only('pk', 'category_id', 'created_at')
+        PostNavigation.objects.exclude(post__in=posts).delete()
+
+        count = 0
+        for post in posts.iterator():
+            PostNavigation.objects.build(post)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt navigation for {count} posts.'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from cms.models import Category, Tag
+
+class Command(BaseCommand):
+    help = 'Recounts the published posts of categories and tags, repairing drifted counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the drifted counts')
+
+    def handle(self, *args, **options):
+        for model in (Category, Tag):
+            drifted = model.objects.drifted()
+            if drifted and not options['dry_run']:
+                model.objects.recount(drifted)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: {len(drifted)} drifted counts'
+                f'{"" if options["dry_run"] else " repaired"}.'
+            ))
@@ -0,0 +1,115 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from cms.models import Category, Post, SiteSettings
+from cms.models.featured_image import image_settings_hash
+from .process_image_jobs import init_worker
+
+logger = logging.getLogger(__name__)
+
+def regenerate_image(label, pk):
+    """Rebuilds the variants of one object. Returns whether its manifest is now current."""
+    obj = apps.get_model(label)._base_manager.get(pk=pk)
+    if obj.image_up_to_date:
+        # Shares its image with an object regenerated before
+        return True
+    try:
+        obj.process_featured_image()
+    except Exception as e:
+        logger.error(f"Error regenerating image of {label} {pk}: {e}")
+        return False
+    if not obj.image_up_to_date:
+        return False
+    obj.image_status = obj.IMAGE_READY
+    obj.save(update_fields=['featured_image', 'image_manifest', 'image_status'])
+    obj.share_image()
+    return True
+
+class Command(BaseCommand):
+    help = 'Regenerates image variants of posts and categories made with outdated image settings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                            help='Worker processes, 0 to regenerate in this process')
+        parser.add_argument('--only-missing', action='store_true', help='Only images without a manifest')
+        parser.add_argument('--dry-run', action='store_true', help='List the images without regenerating them')
+
+    def get_candidates(self, only_missing):
+        """
+        Yields `(model label, pk, image name)` of the images to regenerate,
+        streaming the rows. Objects sharing an image asset are yielded once.
+        """
+        current = image_settings_hash(SiteSettings.get_settings())
+        seen = set()
+        for model in (Post, Category):
+            rows = (
+                model._base_manager.exclude(featured_image='').exclude(featured_image__isnull=True)
+                .values_list('pk', 'featured_image', 'image_manifest', 'image_hash')
+                .iterator(chunk_size=500)
+            )
+            for pk, name, manifest, content_hash in rows:
+                if only_missing and manifest.get('variants'):
+                    continue
+                if manifest.get('settings') == current or content_hash in seen:
+                    continue
+                if content_hash:
+                    seen.add(content_hash)
+                yield model._meta.label, pk, name
+
+    def handle(self, *args, **options):
+        candidates = self.get_candidates(options['only_missing'])
+        if options['dry_run']:
+            count = 0
+            for label, pk, name in candidates:
+                self.stdout.write(f'{label} {pk}: {name}')
+                count += 1
+            self.stdout.write(self.style.SUCCESS(f'{count} images would be regenerated.'))
+            return
+
+        start = time.perf_counter()
+        self.done = self.failed = 0
+        if options['workers'] == 0:
+            for label, pk, name in candidates:
+                self.tally(label, pk, regenerate_image(label, pk))
+        else:
+            self.run_pool(candidates, options['workers'])
+
+        elapsed = time.perf_counter() - start
+        rate = self.done / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Regenerated {self.done} images ({self.failed} failed) in {elapsed:.1f}s, {rate:.2f} images/sec.'
+        ))
+
+    def run_pool(self, candidates, workers):
+        # Spawned workers open their own database connections, the parent
+        # keeps streaming rows on its own
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker) as pool:
+            pending = {}
+            for label, pk, name in candidates:
+                pending[pool.submit(regenerate_image, label, pk)] = (label, pk)
+                # Keep a bounded number of rows in flight
+                if len(pending) >= workers * 2:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        self.tally(*pending.pop(future), self.get_result(future))
+            for future in list(pending):
+                self.tally(*pending.pop(future), self.get_result(future))
+
+    def get_result(self, future):
+        try:
+            return future.result()
+        except Exception as e:
+            self.stderr.write(str(e))
+            return False
+
+    def tally(self, label, pk, ok):
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+            self.stdout.write(self.style.WARNING(f'Failed to regenerate {label} {pk}'))
@@ -0,0 +1,16 @@
+from django.utils.functional import SimpleLazyObject
+from .models import SiteSettings
+
+class SiteSettingsMiddleware:
+    """
+    Attaches the site settings to the request as `request.site_settings`.
+
+    The settings are loaded lazily, at most once per request, and shared by
+    views, mixins, feeds, template tags and context processors.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.site_settings = SimpleLazyObject(SiteSettings.get_settings)
+        return self.get_response(request)
@@ -16,7 +16,7 @@ class Migration(migrations.Migration):
                 ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
                 ('site_name', models.CharField(default='My Website', max_length=100, verbose_name='Site Name')),
                 ('site_description', models.TextField(verbose_name='Site Description')),
-                ('site_tagline', models.CharField(verbose_name='Site Tagline')),
+                ('site_tagline', models.CharField(max_length=255, verbose_name='Site Tagline')),
                 ('blog_title', models.CharField(default='My Blog', max_length=100, verbose_name='Blog Title')),
                 ('blog_description', models.TextField(verbose_name='Blog Description')),
                 ('blog_tagline', models.CharField(max_length=200, verbose_name='Blog Tagline')),
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0013_category_updated_at_page_updated_at_tag_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostNavigation',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='navigation', serialize=False, to='cms.post', verbose_name='Post')),
+                ('related_ids', models.JSONField(default=list, verbose_name='Related Posts')),
+                ('previous_id', models.BigIntegerField(blank=True, null=True, verbose_name='Previous Post')),
+                ('next_id', models.BigIntegerField(blank=True, null=True, verbose_name='Next Post')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'Post Navigation',
+                'verbose_name_plural': 'Post Navigation',
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+TAG_POST_INDEX = 'post_tags_tag_post_idx'
+
+
+def create_tag_post_index(apps, schema_editor):
+    through = apps.get_model('cms', 'Post').tags.through
+    index = models.Index(fields=['tag', 'post'], name=TAG_POST_INDEX)
+    schema_editor.add_index(through, index)
+
+
+def drop_tag_post_index(apps, schema_editor):
+    through = apps.get_model('cms', 'Post').tags.through
+    index = models.Index(fields=['tag', 'post'], name=TAG_POST_INDEX)
+    schema_editor.remove_index(through, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0014_postnavigation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-created_at', '-id'], name='post_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['category', '-created_at', '-id'], name='post_published_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-view_count'], name='post_published_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['is_featured', '-created_at'], name='post_published_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['updated_at'], name='post_updated_idx'),
+        ),
+        # Tag listings walk the auto-created through table from the tag side
+        migrations.RunPython(create_tag_post_index, drop_tag_post_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0016_category_image_status_post_image_status_imagejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='image_manifest',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Image Manifest'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_manifest',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Image Manifest'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:22
+
+import cms.models.settings
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0017_image_manifest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sitesettings',
+            name='image_avif_quality',
+            field=models.IntegerField(default=60, help_text='AVIF compression quality (1-100)', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(100)], verbose_name='AVIF Quality'),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='image_formats',
+            field=models.JSONField(default=cms.models.settings.default_image_formats, help_text='Output formats in order of preference (avif, webp, jpeg). The last one is the fallback for browsers and feeds; formats this server cannot encode are skipped.', validators=[cms.models.settings.validate_image_formats], verbose_name='Image Formats'),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='image_jpeg_quality',
+            field=models.IntegerField(default=82, help_text='JPEG compression quality (1-100)', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(100)], verbose_name='JPEG Quality'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0018_image_formats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True, verbose_name='Content Hash')),
+                ('name', models.CharField(blank=True, max_length=255, verbose_name='Name')),
+                ('manifest', models.JSONField(blank=True, default=dict, verbose_name='Manifest')),
+                ('references', models.PositiveIntegerField(default=1, verbose_name='References')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Image Asset',
+                'verbose_name_plural': 'Image Assets',
+            },
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='image_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, verbose_name='Image Hash'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, verbose_name='Image Hash'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0019_image_assets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='plain_text',
+            field=models.TextField(blank=True, editable=False, verbose_name='Plain Text'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=200, verbose_name='Text Excerpt'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Word Count'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0020_post_derived_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebSubSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.URLField(max_length=500, verbose_name='Topic')),
+                ('callback', models.URLField(max_length=500, verbose_name='Callback')),
+                ('secret', models.CharField(blank=True, max_length=200, verbose_name='Secret')),
+                ('lease_expires_at', models.DateTimeField(verbose_name='Lease Expires At')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'WebSub Subscription',
+                'verbose_name_plural': 'WebSub Subscriptions',
+                'constraints': [models.UniqueConstraint(fields=('topic', 'callback'), name='unique_websub_subscription')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:41
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_published_posts(apps, schema_editor):
+    Post = apps.get_model('cms', 'Post')
+    for model_name, lookup in (('Category', 'category'), ('Tag', 'tags')):
+        counts = (
+            Post.objects.filter(status='published', **{lookup: OuterRef('pk')})
+            .order_by().values(lookup).annotate(count=Count('pk')).values('count')
+        )
+        apps.get_model('cms', model_name).objects.update(published_post_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0021_websub_subscription'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='published_post_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Published Posts'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='published_post_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Published Posts'),
+        ),
+        migrations.RunPython(count_published_posts, migrations.RunPython.noop),
+    ]
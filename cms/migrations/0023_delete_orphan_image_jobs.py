@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def delete_orphan_image_jobs(apps, schema_editor):
+    ImageJob = apps.get_model('cms', 'ImageJob')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    for model_name in ('post', 'category'):
+        content_type = ContentType.objects.filter(app_label='cms', model=model_name).first()
+        if content_type is None:
+            continue
+        model = apps.get_model('cms', model_name)
+        ImageJob.objects.filter(content_type=content_type).exclude(
+            object_id__in=model.objects.values('pk')
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0022_published_post_count'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_orphan_image_jobs, migrations.RunPython.noop),
+    ]
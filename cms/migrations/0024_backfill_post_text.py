@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from cms.text import derive_text
+
+
+def backfill_post_text(apps, schema_editor):
+    # Runs before the deploy clears the cache, so no page is cached with empty text
+    Post = apps.get_model('cms', 'Post')
+    batch = []
+    for post in Post.objects.only('pk', 'content').iterator(chunk_size=500):
+        for field, value in derive_text(post.content).items():
+            setattr(post, field, value)
+        batch.append(post)
+        if len(batch) >= 500:
+            Post.objects.bulk_update(batch, ['plain_text', 'word_count', 'text_excerpt'])
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ['plain_text', 'word_count', 'text_excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0023_delete_orphan_image_jobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_post_text, migrations.RunPython.noop),
+    ]
@@ -5,5 +5,9 @@ from .category import Category
 from .page import Page
 from .settings import SiteSettings
 from .featured_image import FeaturedImageModel
+from .navigation import PostNavigation
+from .image_job import ImageJob
+from .image_asset import ImageAsset
+from .websub import WebSubSubscription
 
-__all__ = ['Tag', 'Post', 'ContactMessage', 'Category', 'Page', 'SiteSettings', 'FeaturedImageModel']
\ No newline at end of file
+__all__ = ['Tag', 'Post', 'ContactMessage', 'Category', 'Page', 'SiteSettings', 'FeaturedImageModel', 'PostNavigation', 'ImageJob', 'ImageAsset', 'WebSubSubscription']
\ No newline at end of file
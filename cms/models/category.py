@@ -3,6 +3,7 @@ from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 from .featured_image import FeaturedImageModel
+from .post_count import PublishedPostCountManager
 
 class Category(FeaturedImageModel, models.Model):
     name = models.CharField(max_length=100, verbose_name=_('Category Name'))
@@ -11,6 +12,10 @@ class Category(FeaturedImageModel, models.Model):
     meta_title = models.CharField(max_length=200, blank=True, verbose_name=_('Meta Title'))
     meta_description = models.TextField(max_length=160, blank=True, verbose_name=_('Meta Description'))
     view_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('View Count'))
+    published_post_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('Published Posts'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated At'))
+
+    objects = PublishedPostCountManager()
     
     class Meta:
         verbose_name = _('Category')
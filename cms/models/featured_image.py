@@ -1,52 +1,300 @@
+import base64
+import hashlib
+import json
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.apps import apps
+from django.contrib.contenttypes.fields import GenericRelation
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 import logging
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
 from datetime import datetime
 from .settings import SiteSettings
+from .image_asset import ImageAsset
+from .image_job import ImageJob
 
 logger = logging.getLogger(__name__)
 
+try:
+    # Registers AVIF with Pillow builds that lack native support
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+# Output formats by extension: (Pillow format, MIME type)
+IMAGE_FORMATS = {
+    'avif': ('AVIF', 'image/avif'),
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+
+def format_available(extension):
+    """Whether this Pillow build can encode the output format `extension`."""
+    if extension not in IMAGE_FORMATS:
+        return False
+    Image.init()
+    return IMAGE_FORMATS[extension][0] in Image.SAVE
+
+def image_output_formats(site_settings):
+    """
+    The configured output formats this Pillow build can encode, as
+    `{extension: quality}` in order of preference. The last is the fallback.
+    """
+    formats = {
+        extension: site_settings.get_image_quality(extension)
+        for extension in site_settings.image_formats if format_available(extension)
+    }
+    return formats or {'jpeg': site_settings.image_jpeg_quality}
+
+def encoder_options(extension, quality):
+    """Pillow save() options for an output format."""
+    if extension == 'jpeg':
+        return {'quality': quality, 'optimize': True, 'progressive': True}
+    return {'quality': quality}
+
 def calculate_height(width, aspect_ratio=None):
     """Calculate height based on width and aspect ratio."""
-    site_settings = SiteSettings.get_settings()
     if aspect_ratio is None:
+        site_settings = SiteSettings.get_settings()
         aspect_ratio = (site_settings.image_aspect_ratio_width, site_settings.image_aspect_ratio_height)
     return int(width * (aspect_ratio[1] / aspect_ratio[0]))
 
-def resize_and_compress_images(image_path, base_path, base_filename, sizes=None, quality=None, aspect_ratio=None):
-    """Resize and compress an image into multiple sizes."""
-    site_settings = SiteSettings.get_settings()
-    sizes = sizes or site_settings.image_sizes
-    quality = quality or site_settings.image_webp_quality
-    aspect_ratio = aspect_ratio or (site_settings.image_aspect_ratio_width, site_settings.image_aspect_ratio_height)
+def save_variant(img, path, format, **options):
+    """
+    Encode `img` to `path` and return its manifest entry. The path is made
+    relative to MEDIA_ROOT by the caller.
+    """
+    buffer = BytesIO()
+    img.save(buffer, format=format, **options)
+    data = buffer.getvalue()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return {
+        'path': path,
+        'width': img.width,
+        'height': img.height,
+        'bytes': len(data),
+        'format': format.lower(),
+        'hash': hashlib.sha256(data).hexdigest(),
+    }
+
+def fit_size(size, box):
+    """`size` scaled down to fit within `box`, keeping the aspect ratio (like Image.thumbnail)."""
+    width, height = size
+    scale = min(box[0] / width, box[1] / height, 1)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+class ImageTooLarge(ValueError):
+    """The image exceeds IMAGE_MAX_PIXELS or would not decode within IMAGE_MEMORY_BUDGET."""
+
+# Failures no retry can fix: the source is too large or not an image
+UNPROCESSABLE_IMAGE_ERRORS = (ImageTooLarge, UnidentifiedImageError, Image.DecompressionBombError)
+
+def decode_reduced(img, box):
+    """
+    Decodes `img` as RGB no larger than needed to cover `box`, within the
+    memory budget. JPEGs are decoded at a reduced DCT scale (draft), other
+    formats are reduce()d by an integer factor right after decoding. The
+    full-size bitmap is released as soon as a smaller one replaces it.
+    """
+    max_pixels = getattr(settings, 'IMAGE_MAX_PIXELS', 80_000_000)
+    if img.width * img.height > max_pixels:
+        raise ImageTooLarge(f"{img.width}x{img.height} exceeds {max_pixels} pixels")
+
+    img.draft('RGB', fit_size(img.size, box))
+    # Pillow keeps RGB and most other modes at 4 bytes per pixel
+    budget = getattr(settings, 'IMAGE_MEMORY_BUDGET', 256) * 1024 * 1024
+    if img.width * img.height * 4 > budget:
+        raise ImageTooLarge(f"Decoding {img.width}x{img.height} exceeds the {budget // (1024 * 1024)} MB memory budget")
+
+    target = fit_size(img.size, box)
+    # Keep twice the target size for the final LANCZOS pass
+    factor = int(min(img.width / target[0], img.height / target[1]) // 2)
+    current = img.reduce(factor) if factor > 1 else img
+    if current.mode != 'RGB':
+        converted = current.convert('RGB')
+        if current is not img:
+            current.close()
+        current = converted
+    current.load()
+    if current is not img:
+        img.close()
+    return current
+
+def resize_each(img, boxes):
+    """Yields `(box, image)` with every variant resized from the full-size original."""
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    for box in boxes:
+        resized_img = img.copy()
+        resized_img.thumbnail(box, Image.LANCZOS)
+        yield box, resized_img
+
+def resize_cascade(img, boxes):
+    """
+    Yields `(box, image)` for each box, largest first. The source is decoded
+    once, reduced to what the largest box needs (see decode_reduced), and
+    each variant is downsampled from the next larger one. Only the current
+    variant is kept, earlier ones are released once their encodes finish.
+
+    Every box gets its own image, also when a source smaller than several
+    boxes is not resized: their encodes run concurrently and Image.save()
+    keeps encoder state on the image.
+    """
+    current = decode_reduced(img, max(boxes))
+    yielded = False
+    for box in sorted(boxes, reverse=True):
+        size = fit_size(current.size, box)
+        if size != current.size:
+            # reducing_gap lets Pillow reduce() by an integer factor before LANCZOS
+            current = current.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        elif yielded:
+            current = current.copy()
+        yielded = True
+        yield box, current
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 of the file at `path`, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def upload_hash(upload, chunk_size=1024 * 1024):
+    """SHA-256 of an uploaded file, streamed in chunks without reading it into memory."""
+    digest = hashlib.sha256()
+    for chunk in upload.chunks(chunk_size):
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+def image_models():
+    """Concrete models with a featured image, they may share image assets."""
+    return [model for model in apps.get_models() if issubclass(model, FeaturedImageModel)]
+
+def render_resized(source_path, target_path, width, extension, quality):
+    """
+    Write `source_path` scaled down to `width` (never up) as `extension` to
+    `target_path`. The file is renamed into place, so concurrent renders of
+    the same variant never serve a partial file.
+    """
+    with Image.open(source_path) as img:
+        box = (width, img.height)
+        resized_img = decode_reduced(img, box)
+        size = fit_size(resized_img.size, box)
+        if size != resized_img.size:
+            resized_img = resized_img.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        temp_path = f"{target_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            resized_img.save(temp_path, format=IMAGE_FORMATS[extension][0], quality=quality)
+            os.replace(temp_path, target_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+def resize_and_compress_images(image_path, base_path, base_filename, sizes=None, formats=None, aspect_ratio=None, cascade=None):
+    """
+    Resize and compress an image into multiple sizes, each encoded in every
+    format of `formats` (`{extension: quality}`). Returns the manifest entry
+    of each variant written, see save_variant(), grouped by format.
+
+    In cascade mode (IMAGE_RESIZE_CASCADE, the default) the source is decoded
+    once and variants are encoded in parallel on a thread pool, Pillow
+    releases the GIL while encoding.
+    """
+    if not (sizes and formats and aspect_ratio):
+        site_settings = SiteSettings.get_settings()
+        sizes = sizes or site_settings.image_sizes
+        formats = formats or image_output_formats(site_settings)
+        aspect_ratio = aspect_ratio or (site_settings.image_aspect_ratio_width, site_settings.image_aspect_ratio_height)
+    if cascade is None:
+        cascade = getattr(settings, 'IMAGE_RESIZE_CASCADE', True)
+
+    boxes = {(width, calculate_height(width, aspect_ratio)): width for width in sizes}
+
+    def variant_path(box, extension):
+        return os.path.join(base_path, f"{base_filename}-{box[0]}x{box[1]}.{extension}")
+
+    def encode(resized_img, box, extension):
+        return save_variant(
+            resized_img, variant_path(box, extension), IMAGE_FORMATS[extension][0],
+            **encoder_options(extension, formats[extension])
+        )
+
+    def encode_formats(resized_img, box):
+        # One image is never encoded concurrently, Image.save() keeps
+        # encoder state on it
+        return {extension: encode(resized_img, box, extension) for extension in formats}
 
     try:
         logger.info(f"Processing image: {image_path}")
 
         with Image.open(image_path) as img:
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-
-            results = []
-            for width in sizes:
-                height = calculate_height(width, aspect_ratio)
-                resized_img = img.copy()
-                resized_img.thumbnail((width, height), Image.LANCZOS)
-                new_filename = f"{base_filename}-{width}x{height}.webp"
-                new_path = os.path.join(base_path, new_filename)
-                os.makedirs(os.path.dirname(new_path), exist_ok=True)
-                resized_img.save(new_path, format='WEBP', quality=quality)
-                logger.info(f"Saved resized image: {new_path}")
-                results.append(new_path)
+            if cascade:
+                with ThreadPoolExecutor(max_workers=len(boxes)) as pool:
+                    futures = {
+                        box: pool.submit(encode_formats, resized_img, box)
+                        for box, resized_img in resize_cascade(img, list(boxes))
+                    }
+                    saved = {
+                        (box, extension): variant
+                        for box, future in futures.items()
+                        for extension, variant in future.result().items()
+                    }
+            else:
+                saved = {
+                    (box, extension): encode(resized_img, box, extension)
+                    for box, resized_img in resize_each(img, list(boxes))
+                    for extension in formats
+                }
+
+        results = [saved[box, extension] for extension in formats for box in boxes]
+        for variant in results:
+            logger.info(f"Saved resized image: {variant['path']}")
         return results
+    except UNPROCESSABLE_IMAGE_ERRORS:
+        raise
     except Exception as e:
         logger.error(f"Error processing image {image_path}: {e}")
         return []
 
+# Bumped when processing adds to the manifest, so regenerate_images picks up older images
+MANIFEST_VERSION = 2
+
+def make_placeholder(image_path, width=20):
+    """
+    A tiny inline preview of the image, `{'data': data URI, 'color': '#rrggbb'}`.
+    Renders while the real image loads, without another request.
+    """
+    with Image.open(image_path) as img:
+        img = decode_reduced(img, (width, width))
+        img.thumbnail((width, width), Image.LANCZOS)
+        # The average colour is the one pixel left after a box resize
+        color = '#{:02x}{:02x}{:02x}'.format(*img.resize((1, 1), Image.BOX).getpixel((0, 0)))
+        extension = 'webp' if format_available('webp') else 'jpeg'
+        buffer = BytesIO()
+        img.save(buffer, format=IMAGE_FORMATS[extension][0], quality=30)
+    data = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return {'data': f"data:{IMAGE_FORMATS[extension][1]};base64,{data}", 'color': color}
+
+def image_settings_hash(site_settings):
+    """Fingerprint of the settings variants are generated with, stored in the manifest."""
+    values = {
+        'version': MANIFEST_VERSION,
+        'sizes': sorted(site_settings.image_sizes),
+        'formats': list(image_output_formats(site_settings).items()),
+        'aspect_ratio': [site_settings.image_aspect_ratio_width, site_settings.image_aspect_ratio_height],
+    }
+    return hashlib.md5(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
 def image_upload_path(instance, filename):
     """Generate dynamic upload path for images."""
     site_settings = SiteSettings.get_settings()
@@ -62,12 +310,49 @@ def image_upload_path(instance, filename):
     )
     
 class FeaturedImageModel(models.Model):
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = [
+        (IMAGE_PENDING, _('Processing')),
+        (IMAGE_READY, _('Ready')),
+        (IMAGE_FAILED, _('Failed')),
+    ]
+
     featured_image = models.ImageField(
         upload_to=image_upload_path,  
         blank=True,
         null=True,
         verbose_name=_("Featured Image")
     )
+    # Variants are generated by image workers (see cms.models.image_job),
+    # templates show a placeholder until they are ready
+    image_status = models.CharField(
+        max_length=10,
+        choices=IMAGE_STATUS_CHOICES,
+        default=IMAGE_READY,
+        editable=False,
+        verbose_name=_("Image Status")
+    )
+    # Every generated file with its dimensions, size, format and hash, so
+    # templates, feeds and cleanup never guess filenames or stat the disk
+    image_manifest = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name=_("Image Manifest")
+    )
+    # Identical uploads share one ImageAsset, its files are deleted with
+    # the last reference (see release_image_files)
+    image_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name=_("Image Hash")
+    )
+    # Deletes the job with the object, a generic foreign key does not cascade
+    image_jobs = GenericRelation(ImageJob)
 
     class Meta:
         abstract = True
@@ -78,11 +363,47 @@ class FeaturedImageModel(models.Model):
         site_settings = SiteSettings.get_settings()
         return site_settings.image_sizes
 
-    def get_image_variants(self):
-        """Get all image variants paths"""
-        if not self.featured_image:
+    def get_image_formats(self):
+        """Formats in the manifest in order of preference, the last one is the fallback"""
+        variants = self.image_manifest.get('variants') or []
+        return list(dict.fromkeys(variant.get('format', 'webp') for variant in variants)) or ['webp']
+
+    def get_image_variants(self, format=None):
+        """
+        Generated variants of `format` (default: the fallback format) by
+        width, from the manifest. Each holds the manifest entry ('path'
+        relative to MEDIA_ROOT) and its 'url'. Empty until the image is
+        processed.
+        """
+        if not self.featured_image or not self.image_ready:
             return {}
-        
+        if not self.image_manifest.get('variants'):
+            # Ready without a manifest: processed before manifests existed
+            return self.get_legacy_image_variants()
+
+        format = format or self.get_image_formats()[-1]
+        storage = self.featured_image.storage
+        return {
+            variant['width']: {**variant, 'url': storage.url(variant['path'])}
+            for variant in sorted(self.image_manifest['variants'], key=lambda variant: variant['width'])
+            if variant.get('format', 'webp') == format
+        }
+
+    def get_image_sources(self):
+        """`{'format', 'type', 'variants'}` per format, for <source> elements"""
+        if not self.featured_image or not self.image_ready:
+            return []
+        return [
+            {'format': format, 'type': IMAGE_FORMATS[format][1], 'variants': self.get_image_variants(format)}
+            for format in self.get_image_formats()
+        ]
+
+    def get_largest_image_variant(self):
+        variants = self.get_image_variants()
+        return variants[max(variants)] if variants else None
+
+    def get_legacy_image_variants(self):
+        """Variant paths guessed from the filename, for images processed before manifests"""
         variants = {}
         original_name = os.path.basename(self.featured_image.name)
         # Keep the full filename except dimensions and extension
@@ -97,35 +418,63 @@ class FeaturedImageModel(models.Model):
             relative_path = os.path.join(os.path.dirname(self.featured_image.name), filename)
             variants[width] = {
                 'url': f"{settings.MEDIA_URL}{relative_path}",
-                #'path': os.path.join(base_path, filename),
-                'path': os.path.join(settings.MEDIA_ROOT, relative_path)
-
+                'path': relative_path,
+                'width': width,
+                'format': 'webp',
             }
         return variants
 
+    def get_image_files(self):
+        """Storage names of the original and every variant of the featured image"""
+        if not self.featured_image:
+            return set()
+        variants = self.image_manifest.get('variants') or self.get_legacy_image_variants().values()
+        return {self.featured_image.name, *(variant['path'] for variant in variants)}
+
+    def delete_image_files(self, names=None):
+        """Remove the featured image and its variants, or only `names`, from storage"""
+        storage = self.featured_image.storage
+        for name in self.get_image_files() if names is None else names:
+            try:
+                storage.delete(name)
+            except Exception as e:
+                logger.error(f"Error removing image file {name}: {e}")
+
+    def release_image_files(self):
+        """Drop the reference to the featured image, deleting its files with the last one"""
+        if not self.image_hash or ImageAsset.objects.release(self.image_hash):
+            self.delete_image_files()
+
     def handle_old_featured_image(self):
         """Handle deletion of old featured image and its variants"""
         if self.pk:
             try:
                 old_instance = type(self).objects.get(pk=self.pk)
                 if old_instance.featured_image and old_instance.featured_image != self.featured_image:
-                    # Remove main image
-                    try:
-                        if os.path.exists(old_instance.featured_image.path):
-                            os.remove(old_instance.featured_image.path)
-                    except Exception as e:
-                        logger.error(f"Error removing original image: {e}")
-
-                    # Remove all variants
-                    for variant in old_instance.get_image_variants().values():
-                        try:
-                            if os.path.exists(variant['path']):
-                                os.remove(variant['path'])
-                        except Exception as e:
-                            logger.error(f"Error removing variant: {e}")
+                    old_instance.release_image_files()
             except type(self).DoesNotExist:
                 pass
 
+    def share_image(self):
+        """
+        Copy the processed image to the asset and to every other object
+        sharing it, after the variants were generated.
+        """
+        if not self.image_hash:
+            return
+        ImageAsset.objects.filter(content_hash=self.image_hash).update(
+            name=self.featured_image.name, manifest=self.image_manifest
+        )
+        for model in image_models():
+            others = model._base_manager.filter(image_hash=self.image_hash)
+            if isinstance(self, model):
+                others = others.exclude(pk=self.pk)
+            for other in others:
+                other.featured_image.name = self.featured_image.name
+                other.image_manifest = self.image_manifest
+                other.image_status = self.image_status
+                other.save(update_fields=['featured_image', 'image_manifest', 'image_status'])
+
     def process_featured_image(self):
         """Process the featured image and create all required sizes"""
         if not self.featured_image:
@@ -142,67 +491,135 @@ class FeaturedImageModel(models.Model):
         
         original_path = self.featured_image.path
         base_path = os.path.dirname(original_path)
+        previous_files = self.get_image_files()
         
         site_settings = SiteSettings.get_settings()
         aspect_ratio = (site_settings.image_aspect_ratio_width, site_settings.image_aspect_ratio_height)
         
+        formats = image_output_formats(site_settings)
+        
         results = resize_and_compress_images(
             image_path=original_path,
             base_path=base_path,
             base_filename=base_filename,
             sizes=self.image_sizes,
-            quality=site_settings.image_webp_quality,
+            formats=formats,
             aspect_ratio=aspect_ratio
         )
         
-        if results:
-            largest_size = max(self.image_sizes)
-            largest_height = calculate_height(largest_size, aspect_ratio)
-            main_filename = f"{base_filename}-{largest_size}x{largest_height}.webp"
-            new_main_path = os.path.join(base_path, main_filename)
-            
-            if original_path != new_main_path and os.path.exists(original_path):
-                os.remove(original_path)
-            
-            # Update the field with relative path
-            relative_path = os.path.relpath(new_main_path, settings.MEDIA_ROOT)
-            self.featured_image.name = relative_path
+        if not results:
+            raise ValueError(f"No image variants generated for {self.featured_image.name}")
+        for variant in results:
+            variant['path'] = os.path.relpath(variant['path'], settings.MEDIA_ROOT)
+        smallest = min(results, key=lambda variant: variant['width'])
+        self.image_manifest = {
+            'settings': image_settings_hash(site_settings),
+            'variants': results,
+            'placeholder': make_placeholder(os.path.join(settings.MEDIA_ROOT, smallest['path'])),
+        }
 
-    def save(self, *args, **kwargs):
-        """Save the model and process images"""
-        is_new_instance = self.pk is None
+        # The largest variant in the fallback format replaces the uploaded original
+        fallback = [variant for variant in results if variant['format'] == list(formats)[-1]]
+        new_main_path = os.path.join(settings.MEDIA_ROOT, max(fallback, key=lambda variant: variant['width'])['path'])
+        # A regenerated main image may be one of the variants just written
+        written = {os.path.join(settings.MEDIA_ROOT, variant['path']) for variant in results}
+        if original_path not in written and os.path.exists(original_path):
+            os.remove(original_path)
         
-        # Handle old image replacement
-        if not is_new_instance:
-            self.handle_old_featured_image()
+        # Update the field with relative path
+        relative_path = os.path.relpath(new_main_path, settings.MEDIA_ROOT)
+        self.featured_image.name = relative_path
 
-        # Save instance first to apply upload_to logic
-        super().save(*args, **kwargs)
+        # Variants of sizes no longer configured
+        self.delete_image_files(previous_files - self.get_image_files())
 
-        # Process the featured image after initial save
-        if self.featured_image:
-            self.process_featured_image()
-            super().save(update_fields=['featured_image'])
+    @property
+    def image_up_to_date(self):
+        """Whether the variants were generated with the current image settings"""
+        return self.image_manifest.get('settings') == image_settings_hash(SiteSettings.get_settings())
+
+    @property
+    def image_ready(self):
+        return self.image_status == self.IMAGE_READY
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The stored image, released when the field is cleared
+        instance._loaded_image = dict(zip(field_names, values)).get('featured_image')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save the model and queue processing of a newly uploaded image"""
+        # Uploaded files are committed to storage by the save below
+        is_new_upload = bool(self.featured_image) and not self.featured_image._committed
+        is_cleared = (
+            not self.featured_image and self.pk is not None
+            and bool(self.image_hash or getattr(self, '_loaded_image', None))
+        )
+        if is_cleared:
+            self.save_cleared_image(*args, **kwargs)
+            return
+        if not is_new_upload:
+            super().save(*args, **kwargs)
+            self._loaded_image = self.featured_image.name
+            return
+
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'featured_image', 'image_status', 'image_manifest', 'image_hash'}
+
+        with transaction.atomic():
+            content_hash = upload_hash(self.featured_image)
+            asset, created = ImageAsset.objects.acquire(content_hash)
+
+            # Handle old image replacement, after the new reference is taken
+            # so re-uploading the same image keeps its files
+            if self.pk is not None:
+                self.handle_old_featured_image()
+
+            self.image_hash = content_hash
+            if created:
+                self.image_status = self.IMAGE_PENDING
+                self.image_manifest = {}
+                # Save instance first to apply upload_to logic
+                super().save(*args, **kwargs)
+                asset.name = self.featured_image.name
+                asset.save(update_fields=['name'])
+                ImageJob.objects.enqueue(self)
+            else:
+                # Known image: point at the stored files instead of storing a copy
+                self.featured_image = asset.name
+                self.image_manifest = asset.manifest
+                self.image_status = self.IMAGE_READY if asset.manifest else self.IMAGE_PENDING
+                super().save(*args, **kwargs)
+                if not asset.manifest and not ImageJob.objects.queued_for_image(content_hash):
+                    # Its job failed, or was superseded by another upload of
+                    # the object that queued it: process it for this one
+                    ImageJob.objects.enqueue(self)
+        self._loaded_image = self.featured_image.name
+
+    def save_cleared_image(self, *args, **kwargs):
+        """Save without an image (the admin "clear" checkbox), releasing the stored one"""
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'featured_image', 'image_status', 'image_manifest', 'image_hash'}
+        with transaction.atomic():
+            stored = type(self)._base_manager.filter(pk=self.pk).first()
+            self.image_hash = ''
+            self.image_manifest = {}
+            self.image_status = self.IMAGE_READY
+            super().save(*args, **kwargs)
+            if stored is not None and stored.featured_image:
+                stored.release_image_files()
+        self._loaded_image = None
 
     def delete(self, *args, **kwargs):
         """Delete all image variants when the model instance is deleted"""
-        if self.featured_image:
-            # Delete all image variants
-            for variant in self.get_image_variants().values():
-                try:
-                    if os.path.exists(variant['path']):
-                        os.remove(variant['path'])
-                except Exception as e:
-                    logger.error(f"Error deleting variant: {e}")
-
-            # Delete original image
-            try:
-                if os.path.exists(self.featured_image.path):
-                    os.remove(self.featured_image.path)
-            except Exception as e:
-                logger.error(f"Error deleting original image: {e}")
+        result = super().delete(*args, **kwargs)
 
-        super().delete(*args, **kwargs)
+        # Only once the row is gone, a protected delete keeps its reference
+        if self.featured_image:
+            self.release_image_files()
+        return result
 
     def calculate_height(self, width, aspect_ratio=None):
         """Calculate height based on width and aspect ratio."""
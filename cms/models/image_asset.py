@@ -0,0 +1,50 @@
+from django.db import models, transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+
+class ImageAssetManager(models.Manager):
+    def acquire(self, content_hash):
+        """
+        Adds a reference to the image with `content_hash`. Returns the asset
+        and whether it is new, in which case the caller stores the upload.
+        """
+        with transaction.atomic():
+            asset, created = self.select_for_update().get_or_create(content_hash=content_hash)
+            if not created:
+                self.filter(pk=asset.pk).update(references=F('references') + 1)
+        return asset, created
+
+    def release(self, content_hash):
+        """
+        Drops a reference to the image with `content_hash`. Returns whether
+        it was the last one, so the caller may delete the files.
+        """
+        with transaction.atomic():
+            asset = self.select_for_update().filter(content_hash=content_hash).first()
+            if asset is None:
+                return True
+            if asset.references > 1:
+                self.filter(pk=asset.pk).update(references=F('references') - 1)
+                return False
+            asset.delete()
+            return True
+
+class ImageAsset(models.Model):
+    """
+    An uploaded image stored once per content hash. Posts and categories
+    with the same upload share its original and variants.
+    """
+    content_hash = models.CharField(max_length=64, unique=True, verbose_name=_('Content Hash'))
+    name = models.CharField(max_length=255, blank=True, verbose_name=_('Name'))
+    manifest = models.JSONField(default=dict, blank=True, verbose_name=_('Manifest'))
+    references = models.PositiveIntegerField(default=1, verbose_name=_('References'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created At'))
+
+    objects = ImageAssetManager()
+
+    class Meta:
+        verbose_name = _('Image Asset')
+        verbose_name_plural = _('Image Assets')
+
+    def __str__(self):
+        return f'{self.name or self.content_hash} ({self.references})'
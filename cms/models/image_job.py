@@ -0,0 +1,139 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+logger = logging.getLogger(__name__)
+
+class ImageJobManager(models.Manager):
+    def enqueue(self, obj):
+        """
+        Queues processing of the featured image of `obj`. An object has a
+        single job row, so a new upload resets the job of the previous one.
+        """
+        job, _ = self.update_or_create(
+            content_type=ContentType.objects.get_for_model(obj),
+            object_id=obj.pk,
+            defaults={
+                'status': ImageJob.PENDING, 'attempts': 0, 'error': '',
+                'started_at': None, 'finished_at': None,
+            },
+        )
+        if not getattr(settings, 'IMAGE_JOBS_ASYNC', True):
+            transaction.on_commit(lambda: self.claim_job(job.pk) and run_image_job(job.pk))
+        return job
+
+    def queued_for_image(self, content_hash):
+        """Whether an object with the image `content_hash` has a pending or running job."""
+        from .featured_image import image_models
+
+        return any(
+            self.filter(
+                content_type=ContentType.objects.get_for_model(model),
+                object_id__in=model._base_manager.filter(image_hash=content_hash).values('pk'),
+                status__in=[ImageJob.PENDING, ImageJob.PROCESSING],
+            ).exists()
+            for model in image_models()
+        )
+
+    def claimable(self):
+        """Pending jobs, and jobs whose worker stopped responding."""
+        stale = timezone.now() - timedelta(seconds=getattr(settings, 'IMAGE_JOB_TIMEOUT', 600))
+        return self.filter(Q(status=ImageJob.PENDING) | Q(status=ImageJob.PROCESSING, started_at__lt=stale))
+
+    def claim_job(self, pk):
+        """
+        Marks a job as processing. The conditional UPDATE makes sure
+        concurrent workers never claim the same job.
+        """
+        return bool(self.claimable().filter(pk=pk).update(
+            status=ImageJob.PROCESSING, started_at=timezone.now(), attempts=F('attempts') + 1
+        ))
+
+    def claim(self, limit):
+        """Claims up to `limit` jobs, oldest first, and returns their ids."""
+        candidates = self.claimable().order_by('created_at').values_list('pk', flat=True)[:limit]
+        return [pk for pk in candidates if self.claim_job(pk)]
+
+class ImageJob(models.Model):
+    """Queued generation of the image variants of a FeaturedImageModel"""
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, _('Pending')),
+        (PROCESSING, _('Processing')),
+        (DONE, _('Done')),
+        (FAILED, _('Failed')),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name=_('Status'))
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_('Attempts'))
+    error = models.TextField(blank=True, verbose_name=_('Error'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created At'))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Started At'))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Finished At'))
+
+    objects = ImageJobManager()
+
+    class Meta:
+        verbose_name = _('Image Job')
+        verbose_name_plural = _('Image Jobs')
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_image_job_per_object'),
+        ]
+        indexes = [models.Index(fields=['status', 'created_at'], name='image_job_status_idx')]
+
+    def __str__(self):
+        return f'{self.content_type.model} {self.object_id}: {self.status}'
+
+def run_image_job(job_id):
+    """
+    Generates the variants for one claimed job. Runs in image worker
+    processes (see the `process_image_jobs` command). Returns the job status.
+    """
+    from .featured_image import UNPROCESSABLE_IMAGE_ERRORS, FeaturedImageModel
+
+    try:
+        job = ImageJob.objects.select_related('content_type').get(pk=job_id)
+    except ImageJob.DoesNotExist:
+        return None
+    if job.status != ImageJob.PROCESSING:
+        # Reset by a newer upload after it was claimed
+        return None
+    # Only finish the job if no new upload reset it in the meantime
+    current = ImageJob.objects.filter(pk=job.pk, started_at=job.started_at)
+    obj = job.content_object
+    if obj is None or not obj.featured_image or (obj.image_ready and obj.image_up_to_date):
+        # Gone, or already shared by the job of an identical upload
+        current.update(status=ImageJob.DONE, finished_at=timezone.now())
+        return ImageJob.DONE
+
+    try:
+        obj.process_featured_image()
+    except Exception as e:
+        logger.error(f"Error processing image job {job.pk}: {e}")
+        max_attempts = getattr(settings, 'IMAGE_JOB_MAX_ATTEMPTS', 3)
+        permanent = isinstance(e, UNPROCESSABLE_IMAGE_ERRORS)
+        status = ImageJob.FAILED if permanent or job.attempts >= max_attempts else ImageJob.PENDING
+        current.update(status=status, error=str(e), finished_at=timezone.now())
+        if status == ImageJob.FAILED:
+            obj.image_status = FeaturedImageModel.IMAGE_FAILED
+            obj.save(update_fields=['image_status'])
+            obj.share_image()
+        return status
+
+    if current.update(status=ImageJob.DONE, error='', finished_at=timezone.now()):
+        obj.image_status = FeaturedImageModel.IMAGE_READY
+        obj.save(update_fields=['featured_image', 'image_status', 'image_manifest'])
+        obj.share_image()
+    return ImageJob.DONE
@@ -0,0 +1,158 @@
+from collections import defaultdict
+from django.db import models
+from django.db.models import Case, Count, F, Q, Value, When
+from django.utils.translation import gettext_lazy as _
+from .post import Post
+
+RELATED_POSTS_LIMIT = 3
+# A shared category counts as much as this many shared tags
+RELATED_CATEGORY_WEIGHT = 2
+
+class PostNavigationManager(models.Manager):
+    def compute(self, post):
+        """The navigation fields of a published post."""
+        active = Post.objects.active()
+        tag_ids = list(post.tags.values_list('pk', flat=True))
+
+        related_ids = list(
+            active.exclude(pk=post.pk)
+            .filter(Q(category_id=post.category_id) | Q(tags__in=tag_ids))
+            .annotate(
+                shared_tags=Count('tags', filter=Q(tags__in=tag_ids), distinct=True),
+                score=F('shared_tags') + Case(
+                    When(category_id=post.category_id, then=Value(RELATED_CATEGORY_WEIGHT)),
+                    default=Value(0),
+                ),
+            )
+            .order_by('-score', '-created_at')
+            .values_list('pk', flat=True)[:RELATED_POSTS_LIMIT]
+        )
+        previous_id = (
+            active.filter(created_at__lt=post.created_at)
+            .order_by('-created_at')
+            .values_list('pk', flat=True)
+            .first()
+        )
+        next_id = (
+            active.filter(created_at__gt=post.created_at)
+            .order_by('created_at')
+            .values_list('pk', flat=True)
+            .first()
+        )
+        return {'related_ids': related_ids, 'previous_id': previous_id, 'next_id': next_id}
+
+    def build(self, post):
+        """Computes and stores the navigation of a published post."""
+        navigation, _ = self.update_or_create(post=post, defaults=self.compute(post))
+        return navigation
+
+    def for_post(self, post):
+        """
+        Returns the stored navigation of `post`. Signals keep it current; a
+        post without one (before rebuild_post_navigation ran) gets an unsaved
+        navigation, so requests never write.
+        """
+        try:
+            return post.navigation
+        except self.model.DoesNotExist:
+            return self.model(post=post, **self.compute(post))
+
+    def refresh(self, post_ids, category_ids=(), tag_ids=()):
+        """
+        Rebuilds in place the navigation of the given posts, of their
+        previous/next neighbours before and after the change, and of the
+        posts whose related posts the change can alter, see
+        related_changes(). Pass the categories and tags the posts had before
+        the change, or had before they were deleted.
+        """
+        post_ids = set(post_ids)
+        stale = self.filter(Q(previous_id__in=post_ids) | Q(next_id__in=post_ids))
+        rebuild_ids = post_ids | set(stale.values_list('post_id', flat=True))
+        rebuild_ids |= self.related_changes(post_ids, category_ids, tag_ids)
+
+        active = Post.objects.active()
+        # Drafts and deleted posts have no navigation
+        self.filter(post_id__in=rebuild_ids).exclude(post__in=active).delete()
+        for post in active.filter(pk__in=rebuild_ids):
+            navigation = self.build(post)
+            # New neighbours now point to a different previous/next post
+            for neighbour_id in (navigation.previous_id, navigation.next_id):
+                if neighbour_id and neighbour_id not in rebuild_ids:
+                    rebuild_ids.add(neighbour_id)
+                    self.build(Post.objects.get(pk=neighbour_id))
+
+    def related_changes(self, post_ids, category_ids=(), tag_ids=()):
+        """
+        Ids of the other posts whose related posts change with `post_ids`:
+        those listing one of them, and those one of them now ranks into
+        (scores at least the lowest of a full list). Only posts sharing a
+        category or tag, before or after the change, can be either.
+        """
+        categories = {*category_ids, *Post.objects.filter(pk__in=post_ids).values_list('category_id', flat=True)}
+        tags = {*tag_ids, *Post.tags.through.objects.filter(post_id__in=post_ids).values_list('tag_id', flat=True)}
+        candidates = dict(
+            self.filter(Q(post__category__in=categories - {None}) | Q(post__tags__in=tags))
+            .exclude(post_id__in=post_ids)
+            .values_list('post_id', 'related_ids')
+        )
+        if not candidates:
+            return set()
+
+        published_ids = set(Post.objects.active().filter(pk__in=post_ids).values_list('pk', flat=True))
+        involved = {*candidates, *published_ids, *(pk for ids in candidates.values() for pk in ids)}
+        category_of = dict(Post.objects.filter(pk__in=involved).values_list('pk', 'category_id'))
+        tags_of = defaultdict(set)
+        for post_id, tag_id in Post.tags.through.objects.filter(post_id__in=involved).values_list('post_id', 'tag_id'):
+            tags_of[post_id].add(tag_id)
+
+        def score(a, b):
+            same_category = category_of.get(a) is not None and category_of.get(a) == category_of.get(b)
+            return len(tags_of[a] & tags_of[b]) + (RELATED_CATEGORY_WEIGHT if same_category else 0)
+
+        changed = set()
+        for post_id, related_ids in candidates.items():
+            if post_ids.intersection(related_ids):
+                changed.add(post_id)
+                continue
+            # Any shared category or tag ranks into a list that is not full
+            lowest = 1
+            if len(related_ids) >= RELATED_POSTS_LIMIT:
+                lowest = max(min(score(post_id, pk) for pk in related_ids), 1)
+            if any(score(post_id, pk) >= lowest for pk in published_ids):
+                changed.add(post_id)
+        return changed
+
+class PostNavigation(models.Model):
+    """Precomputed related posts and previous/next neighbours of a published post"""
+    post = models.OneToOneField(
+        Post, on_delete=models.CASCADE, primary_key=True, related_name='navigation', verbose_name=_('Post')
+    )
+    # Plain ids rather than foreign keys so deleting a neighbour does not cascade
+    related_ids = models.JSONField(default=list, verbose_name=_('Related Posts'))
+    previous_id = models.BigIntegerField(null=True, blank=True, verbose_name=_('Previous Post'))
+    next_id = models.BigIntegerField(null=True, blank=True, verbose_name=_('Next Post'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated At'))
+
+    objects = PostNavigationManager()
+
+    class Meta:
+        verbose_name = _('Post Navigation')
+        verbose_name_plural = _('Post Navigation')
+
+    def __str__(self):
+        return str(self.post_id)
+
+    @property
+    def post_ids(self):
+        return [*self.related_ids, self.previous_id, self.next_id]
+
+    def resolve(self):
+        """Fetches the related and neighbouring posts, with the tags their cards list."""
+        posts = Post.objects.active().select_related('author', 'category').prefetch_related('tags').in_bulk(
+            [pk for pk in self.post_ids if pk]
+        )
+        return {
+            'related_posts': [posts[pk] for pk in self.related_ids if pk in posts],
+            'previous_post': posts.get(self.previous_id),
+            'next_post': posts.get(self.next_id),
+        }
@@ -11,6 +11,7 @@ class Page(models.Model):
     meta_description = models.TextField(max_length=160, blank=True, verbose_name=_('Meta Description'))
     view_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('View Count'))
     status = models.IntegerField(choices=[(0, "Draft"), (1, "Published")], default=0, verbose_name=_('Status'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated At'))
 
     class Meta:
         verbose_name = _('Page')
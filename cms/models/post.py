@@ -7,6 +7,9 @@ from .category import Category
 from .tag import Tag
 from .featured_image import FeaturedImageModel
 from bs4 import BeautifulSoup
+from ..text import EXCERPT_LENGTH, derive_text
+
+DERIVED_TEXT_FIELDS = ('plain_text', 'word_count', 'text_excerpt')
 
 class PostManager(models.Manager):
     def active(self):
@@ -37,11 +40,38 @@ class Post(FeaturedImageModel, models.Model):
     is_featured = models.BooleanField(default=False, verbose_name=_('Is Featured'))
     view_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('View Count'))
 
+    # Derived from content on save (see update_derived_text), so nothing parses HTML while serving
+    plain_text = models.TextField(blank=True, editable=False, verbose_name=_('Plain Text'))
+    word_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('Word Count'))
+    text_excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False, verbose_name=_('Text Excerpt'))
+
     objects = PostManager()
 
     class Meta:
         verbose_name = _('Post')
         verbose_name_plural = _('Posts')
+        # Public queries only read published posts. Backends without partial
+        # indexes (MySQL) build them over all rows instead.
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(status='published'),
+                name='post_published_idx',
+            ),
+            models.Index(
+                fields=['category', '-created_at', '-id'], condition=models.Q(status='published'),
+                name='post_published_category_idx',
+            ),
+            models.Index(
+                fields=['-view_count'], condition=models.Q(status='published'),
+                name='post_published_popular_idx',
+            ),
+            models.Index(
+                fields=['is_featured', '-created_at'], condition=models.Q(status='published'),
+                name='post_published_featured_idx',
+            ),
+            # Last-Modified lookups (see cms.page_cache.latest_update)
+            models.Index(fields=['updated_at'], name='post_updated_idx'),
+        ]
         
     def __str__(self):
         return self.title
@@ -52,10 +82,20 @@ class Post(FeaturedImageModel, models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
-        soup = BeautifulSoup(self.content, 'html.parser')
-        self.content = soup.prettify()  # Prettify the HTML            
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            soup = BeautifulSoup(self.content, 'html.parser')
+            self.content = soup.prettify()  # Prettify the HTML
+            self.update_derived_text()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *DERIVED_TEXT_FIELDS}
         super(Post, self).save(*args, **kwargs)
 
+    def update_derived_text(self):
+        """Sets plain_text, word_count and text_excerpt from the content."""
+        for field, value in derive_text(self.content).items():
+            setattr(self, field, value)
+
     # Important to implement
     def get_featured_image_url(self):
         """Returns the post's featured image, or the category's image if unavailable."""
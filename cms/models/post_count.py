@@ -0,0 +1,44 @@
+from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+class PublishedPostCountManager(models.Manager):
+    """
+    Maintains `published_post_count` of the objects posts are filed under
+    (categories and tags). cms.signals adjusts it as posts are published,
+    unpublished, moved, retagged and deleted; `recount` repairs drift.
+    """
+
+    def adjust(self, pks, delta):
+        """Adds `delta` to the counts of `pks` in one UPDATE, never going below zero."""
+        pks = [pk for pk in pks if pk is not None]
+        if not pks or not delta:
+            return
+        self.filter(pk__in=pks).update(
+            published_post_count=Greatest(F('published_post_count') + delta, Value(0))
+        )
+
+    def actual_counts(self):
+        """Subquery counting the published posts of the outer row."""
+        relation = self.model._meta.get_field('posts')
+        lookup = relation.field.name
+        counts = (
+            relation.related_model.objects.active()
+            .filter(**{lookup: OuterRef('pk')})
+            .order_by().values(lookup)
+            .annotate(count=Count('pk')).values('count')
+        )
+        return Coalesce(Subquery(counts), Value(0))
+
+    def recount(self, pks=None):
+        """Stores the counted published posts of `pks` (all objects if None)."""
+        queryset = self.all() if pks is None else self.filter(pk__in=pks)
+        return queryset.update(published_post_count=self.actual_counts())
+
+    def drifted(self):
+        """Pks of the objects whose stored count is wrong."""
+        return list(
+            self.annotate(actual=self.actual_counts())
+            .exclude(published_post_count=F('actual'))
+            .values_list('pk', flat=True)
+        )
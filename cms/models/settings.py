@@ -1,13 +1,34 @@
-from django.db import models
+import time
+import uuid
+from django.conf import settings as django_settings
+from django.db import models, transaction
 from django.core.cache import cache
 from django.utils.translation import gettext_lazy as _
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+SETTINGS_VERSION_KEY = 'site_settings_version'
+
 def default_image_sizes():
     return [576, 768, 992, 1200]
 
+def default_image_formats():
+    return ['avif', 'webp', 'jpeg']
+
+def validate_image_formats(value):
+    from .featured_image import IMAGE_FORMATS
+
+    if not isinstance(value, list) or not value:
+        raise ValidationError(_("Enter a list of image formats."))
+    unknown = [name for name in value if name not in IMAGE_FORMATS]
+    if unknown:
+        raise ValidationError(
+            _("Unknown image formats: %(formats)s. Choose from %(choices)s."),
+            params={'formats': ', '.join(map(str, unknown)), 'choices': ', '.join(IMAGE_FORMATS)},
+        )
+
 class SiteSettings(models.Model):
     site_name = models.CharField(
         max_length=100,
@@ -60,12 +81,31 @@ class SiteSettings(models.Model):
         help_text=_("List of image sizes for responsive images (in pixels)")
     )
 
+    image_formats = models.JSONField(
+        default=default_image_formats,
+        validators=[validate_image_formats],
+        verbose_name=_("Image Formats"),
+        help_text=_("Output formats in order of preference (avif, webp, jpeg). The last one is the fallback "
+                    "for browsers and feeds; formats this server cannot encode are skipped.")
+    )
+    image_avif_quality = models.IntegerField(
+        default=60,
+        validators=[MinValueValidator(1), MaxValueValidator(100)],
+        verbose_name=_("AVIF Quality"),
+        help_text=_("AVIF compression quality (1-100)")
+    )
     image_webp_quality = models.IntegerField(
         default=85,
         validators=[MinValueValidator(1), MaxValueValidator(100)],
         verbose_name=_("WebP Quality"),
         help_text=_("WebP compression quality (1-100)")
     )
+    image_jpeg_quality = models.IntegerField(
+        default=82,
+        validators=[MinValueValidator(1), MaxValueValidator(100)],
+        verbose_name=_("JPEG Quality"),
+        help_text=_("JPEG compression quality (1-100)")
+    )
     image_aspect_ratio_width = models.IntegerField(
         default=16,
         validators=[MinValueValidator(1)],
@@ -94,6 +134,9 @@ class SiteSettings(models.Model):
         verbose_name = _('Settings')
         verbose_name_plural = _('Settings')
 
+    # Process-local (version, instance, loaded at) triple, see get_settings()
+    _memo = (None, None, 0)
+
     def __str__(self):
         return self.site_name  
             
@@ -110,40 +153,73 @@ class SiteSettings(models.Model):
     @classmethod
     def get_instance(cls):
         """
-        Gets the SiteSettings instance, ensuring it exists.
+        Gets the SiteSettings instance, creating it if it does not exist yet.
         """
-        instance = cls.load()
-        instance.save()  # Create or save the instance
+        instance, _ = cls.objects.get_or_create(pk=1)
         return instance
 
     @classmethod
-    def get_settings(cls):
+    def get_version(cls):
         """
-        Gets the SiteSettings instance from the cache.
+        Gets the settings version stamp from the shared cache.
         """
-        cache_key = 'site_settings'
-        settings = cache.get(cache_key)
+        version = cache.get(SETTINGS_VERSION_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(SETTINGS_VERSION_KEY, version, None):
+                version = cache.get(SETTINGS_VERSION_KEY, version)
+        return version
 
-        if not settings:
-            settings = cls.get_instance()
-            cache.set(cache_key, settings, 3600)  # Cache for 1 hour
+    @classmethod
+    def bump_version(cls):
+        """
+        Marks every process-local copy of the settings as stale.
+        """
+        cache.set(SETTINGS_VERSION_KEY, uuid.uuid4().hex, None)
+
+    @classmethod
+    def for_request(cls, request):
+        """
+        Gets the settings attached to the request by SiteSettingsMiddleware.
+        """
+        settings = getattr(request, 'site_settings', None)
+        return settings if settings is not None else cls.get_settings()
+
+    @classmethod
+    def get_settings(cls):
+        """
+        Gets the SiteSettings instance without writing to the database.
 
+        A process-local copy is reused for as long as the version stamp in the
+        shared cache is unchanged, so steady-state lookups run no queries.
+        It is reloaded after SITE_SETTINGS_MEMO_TIMEOUT seconds regardless,
+        in case the stamp was bumped in a cache this process does not see.
+        The returned instance is shared and must be treated as read-only.
+        """
+        version = cls.get_version()
+        memo_version, settings, loaded_at = cls._memo
+        timeout = getattr(django_settings, 'SITE_SETTINGS_MEMO_TIMEOUT', 300)
+        if memo_version != version or time.monotonic() - loaded_at >= timeout:
+            settings = cls.load()
+            cls._memo = (version, settings, time.monotonic())
         return settings
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Invalidate cache on save
-        cache.delete('site_settings')
+    def get_image_quality(self, extension):
+        """
+        Gets the encoder quality configured for an output format.
+        """
+        return getattr(self, f'image_{extension}_quality')
 
     def delete(self, *args, **kwargs):
         raise ValueError("Deletion of the SiteSettings instance is not allowed.")
 
 @receiver(post_save, sender=SiteSettings)
-def invalidate_cache_on_save(sender, instance, **kwargs):
+def bump_version_on_save(sender, instance, **kwargs):
     """
-    Invalidates the cache on SiteSettings save.
+    Invalidates the cached settings in every process on SiteSettings save,
+    once committed so no process memoizes the old row under the new stamp.
     """
-    cache.delete('site_settings')  
+    transaction.on_commit(SiteSettings.bump_version)
         
       
 #singleton pattern to ensure there's only one SiteSettings instance
\ No newline at end of file
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
+from .post_count import PublishedPostCountManager
 
 class Tag(models.Model):
     name = models.CharField(max_length=100, verbose_name=_('Tag Name'))
@@ -10,6 +11,10 @@ class Tag(models.Model):
     meta_title = models.CharField(max_length=200, blank=True, verbose_name=_('Meta Title'))
     meta_description = models.TextField(max_length=160, blank=True, verbose_name=_('Meta Description'))
     view_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('View Count'))
+    published_post_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('Published Posts'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated At'))
+
+    objects = PublishedPostCountManager()
     
     def __str__(self):
         return self.name
@@ -0,0 +1,27 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+class WebSubSubscriptionManager(models.Manager):
+    def active(self):
+        return self.filter(lease_expires_at__gt=timezone.now())
+
+class WebSubSubscription(models.Model):
+    """A verified subscriber of a feed, see cms.websub"""
+    topic = models.URLField(max_length=500, verbose_name=_('Topic'))
+    callback = models.URLField(max_length=500, verbose_name=_('Callback'))
+    secret = models.CharField(max_length=200, blank=True, verbose_name=_('Secret'))
+    lease_expires_at = models.DateTimeField(verbose_name=_('Lease Expires At'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created At'))
+
+    objects = WebSubSubscriptionManager()
+
+    class Meta:
+        verbose_name = _('WebSub Subscription')
+        verbose_name_plural = _('WebSub Subscriptions')
+        constraints = [
+            models.UniqueConstraint(fields=['topic', 'callback'], name='unique_websub_subscription'),
+        ]
+
+    def __str__(self):
+        return f'{self.callback} -> {self.topic}'
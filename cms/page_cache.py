@@ -0,0 +1,133 @@
+"""
+Versioned page cache.
+
+Cached pages are keyed by the request URL and by content version counters.
+Saving or deleting content bumps the counters it affects (see cms.signals),
+which moves every page depending on them to a new key, so pages can be
+cached for a long time and still be fresh right after an edit. Bumps wait
+for the transaction to commit, otherwise another worker could render the
+old rows and cache them under the new version.
+
+Version scopes are tuples such as ``('global',)``, ``('post', slug)``,
+``('category', slug)``, ``('tag', slug)`` and ``('page', slug)``. The same
+versions provide ETags for conditional GET, next to a Last-Modified taken
+from the ``updated_at`` maxima of the content shown.
+"""
+import hashlib
+import random
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from django.utils.translation import get_language
+from .models import SiteSettings
+
+VERSION_KEY_PREFIX = 'content_version'
+PAGE_KEY_PREFIX = 'page_cache'
+
+GLOBAL = ('global',)
+
+
+def version_key(scope):
+    return ':'.join((VERSION_KEY_PREFIX, *map(str, scope)))
+
+
+def _new_version():
+    # Start from a random value so that an evicted counter never comes back
+    # with a value that an older cached page was stored under
+    return random.randint(1, 2 ** 48)
+
+
+def get_versions(scopes):
+    """Return the current version of each scope, initialising missing ones."""
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(*scopes):
+    """Invalidate every cached page that depends on any of the given scopes."""
+    for scope in scopes:
+        key = version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+
+
+def bump_version_on_commit(*scopes):
+    """bump_version() once the current transaction commits, right away outside one."""
+    transaction.on_commit(lambda: bump_version(*scopes))
+
+
+def versioned_key(name, scopes):
+    """Build a cache key for ``name`` that changes whenever a scope is bumped."""
+    versions = get_versions(scopes)
+    parts = [name, SiteSettings.get_version(), *map(str, versions)]
+    return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def get_page_cache_key(request, scopes):
+    url = f"{request.build_absolute_uri()}:{get_language()}"
+    return f"{PAGE_KEY_PREFIX}:{versioned_key(url, scopes)}"
+
+
+def get_page_cache_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def latest_update(*querysets):
+    """Newest ``updated_at`` across the given querysets as a timestamp, in one query."""
+    epoch = Value(datetime(1970, 1, 1, tzinfo=timezone.utc))
+    first, *others = querysets
+    newest = [Coalesce(Max('updated_at'), epoch)]
+    newest += [
+        Coalesce(Subquery(qs.order_by('-updated_at').values('updated_at')[:1]), epoch)
+        for qs in others
+    ]
+    latest = first.aggregate(latest=Greatest(*newest) if others else newest[0])['latest']
+    return int(latest.timestamp())
+
+
+def get_last_modified(name, scopes, compute):
+    """
+    Return the Last-Modified timestamp for ``name``.
+
+    ``compute`` runs the ``updated_at`` aggregates and is only called once per
+    content version, so steady-state requests cost no queries.
+    """
+    key = f"last_modified:{versioned_key(name, scopes)}"
+    last_modified = cache.get(key)
+    if last_modified is None:
+        last_modified = compute()
+        cache.set(key, last_modified, get_page_cache_timeout())
+    return last_modified
+
+
+def get_etag(name, scopes, *extra):
+    return quote_etag(versioned_key(name, scopes) + ''.join(f'-{value}' for value in extra))
+
+
+def conditional_response(request, etag, last_modified, get_response):
+    """
+    Answer with 304 Not Modified when the client copy is current, otherwise
+    build the response with ``get_response()``. Validators are added either way.
+    """
+    last_modified = last_modified or None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = get_response()
+    if response.status_code in (200, 304):
+        response.headers['ETag'] = etag
+        if last_modified:
+            response.headers['Last-Modified'] = http_date(last_modified)
+    return response
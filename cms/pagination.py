@@ -0,0 +1,97 @@
+"""
+Keyset pagination for post listings.
+
+Pages are fetched with ``WHERE (created_at, id) < anchor ORDER BY created_at
+DESC, id DESC LIMIT n`` instead of ``OFFSET``, so a deep page costs the same
+as the first one. The ``page-<n>`` URLs keep working: the anchor (the key of
+the last row of the previous page) of every page seen is cached, and a page
+without a known anchor is located once with a narrow scan from the nearest
+known one. The total count is cached too. Both live under the listing's
+content versions (see cms.page_cache), so any edit to the listing resets them.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from . import page_cache
+
+KEY_FIELDS = ('created_at', 'id')
+
+
+class KeysetPaginator(Paginator):
+    """
+    Drop-in replacement for Paginator over a queryset of posts, newest first.
+
+    ``cache_scopes`` are the page cache scopes whose versions invalidate the
+    cached count and anchors.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, cache_scopes=None):
+        object_list = object_list.order_by(*(f'-{field}' for field in KEY_FIELDS))
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.cache_scopes = cache_scopes or [page_cache.GLOBAL]
+
+    @cached_property
+    def cache_key(self):
+        query = hashlib.md5(str(self.object_list.query).encode()).hexdigest()
+        return f"keyset:{page_cache.versioned_key(query, self.cache_scopes)}"
+
+    @cached_property
+    def count(self):
+        key = f"{self.cache_key}:count"
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, page_cache.get_page_cache_timeout())
+        return count
+
+    def get_anchors(self):
+        """Cached ``{page number: key of the last row on the previous page}``."""
+        return cache.get(f"{self.cache_key}:anchors") or {}
+
+    def set_anchors(self, anchors):
+        cache.set(f"{self.cache_key}:anchors", anchors, page_cache.get_page_cache_timeout())
+
+    def after(self, anchor):
+        """Rows that come after `anchor` in listing order."""
+        if anchor is None:
+            return self.object_list
+        created_at, pk = anchor
+        return self.object_list.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    def find_anchor(self, number, anchors):
+        known = max((page for page in anchors if page < number), default=1)
+        skip = (number - known) * self.per_page
+        rows = self.after(anchors.get(known)).values_list(*KEY_FIELDS)[skip - 1:skip]
+        return next(iter(rows), None)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        anchors = self.get_anchors()
+        changed = False
+
+        if number == 1:
+            anchor = None
+        elif number in anchors:
+            anchor = anchors[number]
+        else:
+            anchor = anchors[number] = self.find_anchor(number, anchors)
+            changed = True
+
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        object_list = list(self.after(anchor)[:top - bottom])
+
+        # The last row here is where the next page starts, so paging forward
+        # never has to look for an anchor
+        if number < self.num_pages and object_list and number + 1 not in anchors:
+            last = object_list[-1]
+            anchors[number + 1] = (last.created_at, last.pk)
+            changed = True
+        if changed:
+            self.set_anchors(anchors)
+        return Page(object_list, number, self)
@@ -1,7 +1,14 @@
-from django.db.models.signals import pre_save, post_save
-from django.dispatch import receiver
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver, Signal
 from django.utils.text import Truncator
-from .models import Post
+from .models import Post, PostNavigation, Category, Tag, Page
+from django.db import transaction
+from . import page_cache, sitemaps, static_indexes, websub
+
+# Sent after posts were changed with QuerySet.update() (e.g. bulk admin
+# actions), which does not fire post_save. Provides `post_ids`, and
+# `published_ids` for the posts it published.
+posts_bulk_updated = Signal()
 
 # @receiver(pre_save, sender=Article)
 # def set_excerpt(sender, instance, **kwargs):
@@ -12,3 +19,235 @@ from .models import Post
 # def update_search_index(sender, instance, **kwargs):
 #     # Automatically update search index when an article is saved
 #     instance.update_search_index()
+
+def get_previous_state(instance, *fields):
+    """Returns the stored values of `fields` before the pending save."""
+    if instance.pk is None:
+        return {}
+    return type(instance)._base_manager.filter(pk=instance.pk).values(*fields).first() or {}
+
+def post_cache_scopes(post, previous=None):
+    """Page cache scopes that show `post`, before and after a change."""
+    previous = previous or {}
+    scopes = {page_cache.GLOBAL, ('post', post.slug), ('category', post.category.slug)}
+    if previous.get('slug'):
+        scopes.add(('post', previous['slug']))
+    if previous.get('category__slug'):
+        scopes.add(('category', previous['category__slug']))
+    if post.pk:
+        scopes.update(('tag', slug) for slug in post.tags.values_list('slug', flat=True))
+    return scopes
+
+# Page cache invalidation
+
+@receiver(pre_save, sender=Post)
+def remember_previous_post(sender, instance, **kwargs):
+    instance._previous_state = get_previous_state(
+        instance, 'slug', 'category__slug', 'category_id', 'status', 'created_at'
+    )
+
+@receiver(post_save, sender=Post)
+def bump_versions_on_post_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    page_cache.bump_version_on_commit(*post_cache_scopes(instance, previous))
+
+@receiver(pre_delete, sender=Post)
+def bump_versions_on_post_delete(sender, instance, **kwargs):
+    # Tags are detached before post_delete, so collect the scopes now
+    page_cache.bump_version_on_commit(*post_cache_scopes(instance))
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def bump_versions_on_retag(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        posts = Post.objects.filter(pk__in=pk_set) if pk_set else instance.posts.all()
+        scopes = {('tag', instance.slug)}
+        scopes.update(('post', slug) for slug in posts.values_list('slug', flat=True))
+    else:
+        tags = Tag.objects.filter(pk__in=pk_set) if pk_set else instance.tags.all()
+        scopes = {('post', instance.slug)}
+        scopes.update(('tag', slug) for slug in tags.values_list('slug', flat=True))
+    page_cache.bump_version_on_commit(page_cache.GLOBAL, *scopes)
+
+@receiver(posts_bulk_updated)
+def bump_versions_on_bulk_update(sender, post_ids, **kwargs):
+    scopes = {page_cache.GLOBAL}
+    posts = Post.objects.filter(pk__in=post_ids).select_related('category').prefetch_related('tags')
+    for post in posts:
+        scopes.update(('post', post.slug), ('category', post.category.slug))
+        scopes.update(('tag', tag.slug) for tag in post.tags.all())
+    page_cache.bump_version_on_commit(*scopes)
+
+# Related posts and previous/next navigation
+
+NAVIGATION_FIELDS = ('category_id', 'status', 'created_at')
+
+@receiver(post_save, sender=Post)
+def refresh_navigation_on_post_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_state', None) or {}
+    if created or any(previous.get(field) != getattr(instance, field) for field in NAVIGATION_FIELDS):
+        PostNavigation.objects.refresh([instance.pk], category_ids=[previous.get('category_id')])
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post_relations(sender, instance, **kwargs):
+    instance._deleted_relations = {
+        'category_ids': [instance.category_id],
+        'tag_ids': list(instance.tags.values_list('pk', flat=True)),
+    }
+
+@receiver(post_delete, sender=Post)
+def refresh_navigation_on_post_delete(sender, instance, **kwargs):
+    PostNavigation.objects.refresh([instance.pk], **getattr(instance, '_deleted_relations', {}))
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def refresh_navigation_on_retag(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # The cleared side is gone by post_clear, remember it now
+        related = instance.posts if reverse else instance.tags
+        instance._cleared_ids = set(related.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_ids', set())
+    elif action not in ('post_add', 'post_remove'):
+        return
+    if reverse:
+        PostNavigation.objects.refresh(pk_set, tag_ids=[instance.pk])
+    else:
+        PostNavigation.objects.refresh([instance.pk], tag_ids=pk_set)
+
+@receiver(posts_bulk_updated)
+def refresh_navigation_on_bulk_update(sender, post_ids, **kwargs):
+    PostNavigation.objects.refresh(post_ids)
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Tag)
+@receiver(pre_save, sender=Page)
+def remember_previous_slug(sender, instance, **kwargs):
+    instance._previous_state = get_previous_state(instance, 'slug')
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Page)
+def bump_versions_on_content_change(sender, instance, **kwargs):
+    scope = sender._meta.model_name
+    scopes = {(scope, instance.slug)}
+    previous_slug = getattr(instance, '_previous_state', {}).get('slug')
+    if previous_slug:
+        scopes.add((scope, previous_slug))
+    if sender is not Page:
+        # Category and tag names appear on post cards across the site
+        scopes.add(page_cache.GLOBAL)
+    page_cache.bump_version_on_commit(*scopes)
+
+# WebSub pushes
+
+@receiver(post_save, sender=Post)
+def push_feeds_on_publish(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None) or {}
+    if instance.status == 'published' and previous.get('status') != 'published':
+        transaction.on_commit(lambda: websub.publish([instance.pk]))
+
+@receiver(posts_bulk_updated)
+def push_feeds_on_bulk_publish(sender, post_ids, published_ids=(), **kwargs):
+    if published_ids:
+        transaction.on_commit(lambda: websub.publish(list(published_ids)))
+
+# Sitemap partitions
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Page)
+def bump_sitemap_partition(sender, instance, **kwargs):
+    sitemaps.bump_partitions(sender, [instance.pk])
+
+@receiver(posts_bulk_updated)
+def bump_sitemap_partitions_on_bulk_update(sender, post_ids, **kwargs):
+    sitemaps.bump_partitions(Post, post_ids)
+
+# Sitemap and feed files served by the web server
+
+@receiver(post_save, sender=Post)
+def publish_static_indexes_on_post_save(sender, instance, **kwargs):
+    # Drafts are in neither the sitemap nor the feeds
+    previous = getattr(instance, '_previous_state', None) or {}
+    if 'published' in (instance.status, previous.get('status')):
+        static_indexes.schedule_on_commit()
+
+@receiver(post_delete, sender=Post)
+def publish_static_indexes_on_post_delete(sender, instance, **kwargs):
+    if instance.status == 'published':
+        static_indexes.schedule_on_commit()
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def publish_static_indexes_on_retag(sender, instance, action, reverse, **kwargs):
+    # Feed items list their tags
+    if action in ('post_add', 'post_remove', 'post_clear') and (reverse or instance.status == 'published'):
+        static_indexes.schedule_on_commit()
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Page)
+@receiver(posts_bulk_updated)
+def publish_static_indexes(sender, **kwargs):
+    static_indexes.schedule_on_commit()
+
+# Published post counts of categories and tags
+
+@receiver(post_save, sender=Post)
+def count_posts_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_state', None) or {}
+    was_published = previous.get('status') == 'published'
+    is_published = instance.status == 'published'
+    moved = previous.get('category_id') != instance.category_id
+    if was_published and (moved or not is_published):
+        Category.objects.adjust([previous.get('category_id')], -1)
+    if is_published and (moved or not was_published):
+        Category.objects.adjust([instance.category_id], 1)
+    # A new post has no tags yet, they are counted as they are added
+    if was_published != is_published and not created:
+        Tag.objects.adjust(instance.tags.values_list('pk', flat=True), 1 if is_published else -1)
+
+@receiver(pre_delete, sender=Post)
+def count_posts_on_delete(sender, instance, **kwargs):
+    # Tags are detached before post_delete, and the counts are updated in
+    # the deleting transaction
+    if instance.status == 'published':
+        Category.objects.adjust([instance.category_id], -1)
+        Tag.objects.adjust(instance.tags.values_list('pk', flat=True), -1)
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def count_posts_on_retag(sender, instance, action, reverse, pk_set, **kwargs):
+    # post_add only gets the new rows, but remove() passes every pk it was
+    # given, so removals are counted before they happen, over the attached
+    # rows. Both run in the transaction of the change.
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+    delta = 1 if action == 'post_add' else -1
+    if reverse:
+        posts = instance.posts.active()
+        if action != 'pre_clear':
+            posts = posts.filter(pk__in=pk_set)
+        Tag.objects.adjust([instance.pk], delta * posts.count())
+    elif instance.status == 'published':
+        tags = instance.tags.all()
+        if action != 'pre_clear':
+            tags = tags.filter(pk__in=pk_set)
+        Tag.objects.adjust(tags.values_list('pk', flat=True), delta)
+
+@receiver(posts_bulk_updated)
+def recount_posts_on_bulk_update(sender, post_ids, **kwargs):
+    # The previous statuses are gone, count the affected rows again
+    Category.objects.recount(Post.objects.filter(pk__in=post_ids).values('category_id'))
+    Tag.objects.recount(Post.tags.through.objects.filter(post_id__in=post_ids).values('tag_id'))
@@ -1,66 +1,172 @@
-from django.contrib.sitemaps import Sitemap
+"""
+Partitioned sitemaps.
+
+Each section is split into fixed-size partitions by primary key range
+(SITEMAP_PARTITION_SIZE rows of id space each), listed by the sitemap
+index with the newest ``updated_at`` of each partition as ``lastmod``.
+Partitions read ``(slug, updated_at)`` rows through an iterator and are
+streamed to the client.
+
+A partition only depends on the rows in its range, so it has its own
+version scope, ``('sitemap', section, number)``, bumped by cms.signals
+when one of its rows is saved or deleted. The index depends on
+``('sitemap', section)``, bumped alongside. Both are bumped after the
+change commits.
+"""
+from django.conf import settings
+from django.db.models import F, IntegerField, Max
+from django.db.models.functions import Cast
 from django.urls import reverse
+from . import page_cache
 from .models import Page, Post, Category, Tag
 
-class StaticSitemap(Sitemap):
+SLUG_PLACEHOLDER = 'sitemap-slug'
+
+
+def get_partition_size():
+    return getattr(settings, 'SITEMAP_PARTITION_SIZE', 5000)
+
+
+def partition_of(pk):
+    """Number of the partition holding the row with primary key `pk`, from 1."""
+    return (pk - 1) // get_partition_size() + 1
+
+
+class ModelSitemap:
+    """A sitemap section of model rows, addressed by their slug."""
+    name = None
+    model = None
+    url_name = None
+    changefreq = None
+    priority = None
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+    def get_location_parts(self):
+        """The path of an item split around its slug, so rows need no reverse()."""
+        path = reverse(self.url_name, args=[SLUG_PLACEHOLDER])
+        prefix, suffix = path.split(SLUG_PLACEHOLDER)
+        return prefix, suffix
+
+    def get_partitions(self):
+        """`{number: lastmod}` of the non-empty partitions, in one query."""
+        number = Cast((F('pk') - 1) / get_partition_size(), IntegerField()) + 1
+        rows = (
+            self.get_queryset().order_by()
+            .annotate(partition=number).values('partition')
+            .annotate(lastmod=Max('updated_at'))
+        )
+        return {row['partition']: row['lastmod'] for row in rows}
+
+    def has_partition(self, number):
+        """Whether partition `number` has rows, without grouping the whole table."""
+        return self.get_partition_queryset(number).exists()
+
+    def get_partition_queryset(self, number, queryset=None):
+        size = get_partition_size()
+        queryset = self.get_queryset() if queryset is None else queryset
+        return queryset.filter(pk__gt=(number - 1) * size, pk__lte=number * size)
+
+    def get_items(self, number):
+        """Yields `(path, lastmod)` of the items in partition `number`."""
+        prefix, suffix = self.get_location_parts()
+        rows = (
+            self.get_partition_queryset(number).order_by('pk')
+            .values_list('slug', 'updated_at').iterator(chunk_size=2000)
+        )
+        for slug, updated_at in rows:
+            yield f'{prefix}{slug}{suffix}', updated_at
+
+    def get_last_modified(self, number):
+        # Over all rows of the range: unpublishing the newest row changes the
+        # partition too, and must not move Last-Modified backwards
+        return page_cache.latest_update(self.get_partition_queryset(number, self.model.objects.all()))
+
+
+class StaticSitemap:
+    name = 'static'
     priority = 0.5
     changefreq = 'weekly'
+    url_names = ['home', 'contact', 'post_list', 'category_list']
+
+    def get_partitions(self):
+        return {1: None}
 
-    def items(self):
-        return [
-            'home',
-            'contact',
-            'post_list',
-            'category_list',
-        ]
+    def has_partition(self, number):
+        return number == 1
 
-    def location(self, item):
-        return reverse(item)
+    def get_items(self, number):
+        for url_name in self.url_names:
+            yield reverse(url_name), None
 
-class PostSitemap(Sitemap):
+    def get_last_modified(self, number):
+        return None
+
+
+class PostSitemap(ModelSitemap):
     """Sitemap for blog posts"""
+    name = 'posts'
+    model = Post
+    url_name = 'post_detail'
     changefreq = "monthly"
     priority = 0.8
 
-    def items(self):
+    def get_queryset(self):
         return Post.objects.active()
 
-    def lastmod(self, obj):
-        return obj.updated_at
 
-class CategorySitemap(Sitemap):
+class CategorySitemap(ModelSitemap):
     """Sitemap for blog categories"""
+    name = 'categories'
+    model = Category
+    url_name = 'category_posts'
     changefreq = "weekly"
     priority = 0.7
 
-    def items(self):
-        return Category.objects.all()
 
-class TagSitemap(Sitemap):
+class TagSitemap(ModelSitemap):
+    name = 'tags'
+    model = Tag
+    url_name = 'tagged'
     changefreq = "weekly"
     priority = 0.6
 
-    def items(self):
-        return Tag.objects.all()
-
-    def location(self, obj):
-        return reverse('tagged', kwargs={'slug': obj.slug})
 
-class PageSitemap(Sitemap):
+class PageSitemap(ModelSitemap):
+    name = 'pages'
+    model = Page
+    url_name = 'page'
     changefreq = "weekly"
     priority = 0.9
 
-    def items(self):
+    def get_queryset(self):
         return Page.objects.filter(status=1)  # Only published pages
 
-    def location(self, obj):
-        return reverse('page', kwargs={'slug': obj.slug})
 
 # Combine sitemaps
 sitemaps = {
-    'static': StaticSitemap,
-    'posts': PostSitemap,
-    'categories': CategorySitemap,
-    'tags': TagSitemap,
-    'pages': PageSitemap,
-}
\ No newline at end of file
+    sitemap.name: sitemap
+    for sitemap in (StaticSitemap(), PostSitemap(), CategorySitemap(), TagSitemap(), PageSitemap())
+}
+
+
+def section_scope(name):
+    return ('sitemap', name)
+
+
+def partition_scope(name, number):
+    return ('sitemap', name, number)
+
+
+def bump_partitions(model, pks):
+    """
+    Invalidates the partitions holding rows `pks` of `model`, and the index,
+    once the transaction commits.
+    """
+    for sitemap in sitemaps.values():
+        if getattr(sitemap, 'model', None) is model:
+            numbers = {partition_of(pk) for pk in pks}
+            page_cache.bump_version_on_commit(
+                section_scope(sitemap.name), *(partition_scope(sitemap.name, number) for number in numbers)
+            )
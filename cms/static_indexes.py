@@ -0,0 +1,226 @@
+"""
+Sitemaps and feeds published as files for the web server.
+
+The sitemap index and its partitions, the RSS and Atom feeds and the
+per-category feeds are rendered through their views and written below
+STATIC_INDEX_ROOT at their URL path (``/feed/`` becomes
+``feed/index.xml``), each with ``.gz`` and ``.br`` siblings. nginx serves
+them without reaching Django, feeds being directory URLs::
+
+    location ~ ^/sitemap[^/]*\\.xml$ {
+        root /var/www/project/indexes;
+        gzip_static on;
+        brotli_static on;
+        try_files $uri @django;
+    }
+    location ~ ^/(category/[^/]+/)?feed/(atom/)?$ {
+        root /var/www/project/indexes;
+        gzip_static on;
+        brotli_static on;
+        try_files ${uri}index.xml @django;
+    }
+
+Files are replaced atomically and only when their content changed, so
+nginx never serves a partial document and ETags stay stable. Documents
+are published by the ``publish_static_indexes`` command (run on deploy)
+and after committed changes to published content (see cms.signals). Those
+publishes run on a background thread, STATIC_INDEX_DELAY seconds after the
+first change, so a burst of saves (a bulk action, image jobs sharing an
+image) is published once.
+"""
+import gzip
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.urls import resolve, reverse
+from .models import Category
+from .sitemaps import sitemaps
+from .websub import TopicRequest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+FEED_URL_NAMES = ['rss_feed', 'atom_feed']
+CATEGORY_FEED_URL_NAMES = ['category_rss_feed', 'category_atom_feed']
+
+
+def get_root():
+    return getattr(settings, 'STATIC_INDEX_ROOT', '')
+
+
+def get_base_url():
+    return getattr(settings, 'STATIC_INDEX_BASE_URL', '').rstrip('/')
+
+
+def is_enabled():
+    return bool(get_root() and get_base_url())
+
+
+def document_paths():
+    """URL paths of every published document."""
+    paths = [reverse('django.contrib.sitemaps.views.sitemap')]
+    for name, sitemap in sitemaps.items():
+        paths += [reverse('sitemap_section', args=[name, number]) for number in sorted(sitemap.get_partitions())]
+    paths += [reverse(url_name) for url_name in FEED_URL_NAMES]
+    for slug in Category.objects.values_list('slug', flat=True).iterator():
+        paths += [reverse(url_name, args=[slug]) for url_name in CATEGORY_FEED_URL_NAMES]
+    return paths
+
+
+def file_name(path):
+    """Path of the file serving URL `path`, relative to the root."""
+    path = path.lstrip('/')
+    return f'{path}index.xml' if not path or path.endswith('/') else path
+
+
+def render(base_url, path):
+    """The body of the document at `path`, through its view."""
+    match = resolve(path)
+    response = match.func(TopicRequest(base_url + path), *match.args, **match.kwargs)
+    if response.status_code != 200:
+        return None
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def compressed(content):
+    """`{suffix: bytes}` of the precompressed siblings of a document."""
+    siblings = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        siblings['.br'] = brotli.compress(content)
+    return siblings
+
+
+def write_atomic(target, content):
+    """Replaces `target` in one rename, readable by the web server."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(temp, 0o644)
+        os.replace(temp, target)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+def publish(root=None, base_url=None):
+    """
+    Writes every document below `root` and removes the ones no longer
+    published. Returns `(written, unchanged, removed)` file name lists.
+    """
+    root = Path(root or get_root())
+    base_url = (base_url or get_base_url()).rstrip('/')
+    written, unchanged, published = [], [], set()
+    for path in document_paths():
+        content = render(base_url, path)
+        if content is None:
+            continue
+        name = file_name(path)
+        published.add(name)
+        target = root / name
+        if target.exists() and target.read_bytes() == content:
+            unchanged.append(name)
+            continue
+        # Siblings first, the plain file marks the document as replaced
+        for suffix, data in compressed(content).items():
+            write_atomic(target.with_name(target.name + suffix), data)
+        write_atomic(target, content)
+        written.append(name)
+    return written, unchanged, remove_stale(root, published)
+
+
+def remove_stale(root, published):
+    """Deletes sitemap partitions and category feeds that are no longer published."""
+    removed = []
+    candidates = [*root.glob('sitemap*.xml'), *root.glob('category/*/feed/**/index.xml')]
+    for target in candidates:
+        name = target.relative_to(root).as_posix()
+        if name in published:
+            continue
+        for suffix in ('', '.gz', '.br'):
+            target.with_name(target.name + suffix).unlink(missing_ok=True)
+        removed.append(name)
+    return removed
+
+
+_pool = None
+_lock = threading.Lock()
+# A publish is queued and has not started yet
+_scheduled = False
+# Per thread: a change was committed, or is waiting for its transaction
+_pending = threading.local()
+
+
+def get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            # One thread, publishes never write the same files concurrently
+            _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='static-indexes')
+    return _pool
+
+
+def schedule():
+    """
+    Queues a publish. Changes arriving before it starts share it, later ones
+    queue the next. With STATIC_INDEX_ASYNC=False it runs right away.
+    """
+    global _scheduled
+    if not getattr(settings, 'STATIC_INDEX_ASYNC', True):
+        run_publish()
+        return
+    with _lock:
+        if _scheduled:
+            return
+        _scheduled = True
+    get_pool().submit(run_scheduled)
+
+
+def run_scheduled():
+    global _scheduled
+    time.sleep(getattr(settings, 'STATIC_INDEX_DELAY', 2))
+    with _lock:
+        _scheduled = False
+    try:
+        run_publish()
+    finally:
+        connection.close()
+
+
+def run_publish():
+    """Publishes after content changes; failures are logged, never raised to the saving code."""
+    try:
+        publish()
+    except Exception:
+        logger.exception("Publishing static indexes failed")
+
+
+def schedule_on_commit():
+    """Queues one publish after the current transaction commits, however many changes it makes."""
+    if not is_enabled():
+        return
+    _pending.changed = True
+    transaction.on_commit(schedule_pending)
+
+
+def schedule_pending():
+    # The first callback of a commit schedules, the others find nothing
+    # pending. A rolled back transaction leaves the flag set, which only
+    # lets the next commit publish.
+    if getattr(_pending, 'changed', False):
+        _pending.changed = False
+        schedule()
@@ -7,13 +7,13 @@ from datetime import timedelta
 register = template.Library()
 
 @register.filter
-def reading_time(content):
+def reading_time(value):
     """
-    Returns the estimated reading time for the given content.
+    Returns the estimated reading time for a word count, or for the given content.
     
-       Usage: {{ post.content|reading_time }}
+       Usage: {{ post.word_count|reading_time }}
     """
-    word_count = len(content.split())
+    word_count = value if isinstance(value, int) else len(str(value).split())
     minutes = math.ceil(word_count / 200)  # Average reading speed
     return f"{minutes} {_('min read')}"
 
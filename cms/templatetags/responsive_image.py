@@ -1,23 +1,74 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
 from django import template
+from django.conf import settings
+from django.core.cache import cache
 from django.utils.safestring import mark_safe
-from django.utils.html import escape
+from django.utils.html import escape, format_html
 from ..models import SiteSettings
 
-register = template.Library()
+logger = logging.getLogger(__name__)
 
 register = template.Library()
 
+# Process-local LRU of rendered markup, backed by the shared cache
+_markup_cache = OrderedDict()
+_markup_lock = threading.Lock()
+
+def get_markup_key(image_field, instance, alt_text, css_class, sizes, loading):
+    """
+    Cache key of the rendered markup. The image name changes with every
+    upload, the manifest settings hash with every regeneration, and the
+    settings version with every SiteSettings save.
+    """
+    manifest = getattr(instance, 'image_manifest', None) or {}
+    parts = (
+        image_field.name, manifest.get('settings'), SiteSettings.get_version(),
+        css_class, loading, alt_text, tuple(sizes or ()),
+    )
+    return 'responsive_image:' + hashlib.md5(repr(parts).encode()).hexdigest()
+
+def get_cached_markup(key):
+    with _markup_lock:
+        markup = _markup_cache.get(key)
+        if markup is not None:
+            _markup_cache.move_to_end(key)
+            return markup
+    markup = cache.get(key)
+    if markup is not None:
+        set_cached_markup(key, markup, shared=False)
+    return markup
+
+def set_cached_markup(key, markup, shared=True):
+    with _markup_lock:
+        _markup_cache[key] = markup
+        _markup_cache.move_to_end(key)
+        while len(_markup_cache) > getattr(settings, 'RESPONSIVE_IMAGE_CACHE_SIZE', 512):
+            _markup_cache.popitem(last=False)
+    if shared:
+        cache.set(key, markup)
+
 @register.simple_tag
 def responsive_image(image_field, alt_text="", css_class="", sizes=None, loading="lazy"):
     """
     Generates a responsive <img> tag with srcset for the given ImageField.
-    Supports both WebP and original format fallback.
+    Emits one <source> per format recorded in the image manifest, in order
+    of preference; the <img> falls back to the largest variant of the last
+    and carries its width and height, so the browser reserves the space.
+    The blurred placeholder and dominant colour from the manifest are its
+    inline background until the image loads.
+
+    The markup is memoized per image, manifest, settings version and
+    arguments in a process-local LRU (RESPONSIVE_IMAGE_CACHE_SIZE entries),
+    falling back to the shared cache.
 
     Args:
         image_field: The ImageField instance (e.g., `post.featured_image`)
         alt_text: Alt text for the image (default: empty string)
         css_class: CSS class for the <img> tag (default: empty string)
-        sizes: Optional list of sizes for the srcset. If None, uses site settings.
+        sizes: Optional list of widths to limit the srcset to. If None, uses every variant.
         loading: Image loading strategy ("lazy", "eager", or "auto")
 
     Returns:
@@ -34,46 +85,78 @@ def responsive_image(image_field, alt_text="", css_class="", sizes=None, loading
     if not hasattr(image_field, 'url'):
         raise ValueError("The provided image_field does not have a valid URL.")
 
+    # Variants are still being generated by the image workers
+    instance = getattr(image_field, 'instance', None)
+    if instance is not None and not getattr(instance, 'image_ready', True):
+        return format_html(
+            '<span class="{} block bg-gray-200 animate-pulse" role="img" aria-label="{}"></span>',
+            css_class, alt_text
+        )
+
     try:
-        # Get site settings for image sizes
-        site_settings = SiteSettings.get_settings()
-        sizes = sizes or site_settings.image_sizes
-
-        # Clean and escape input
-        alt_text = escape(alt_text)
-        css_class = escape(css_class)
-        base_url, ext = str(image_field.url).rsplit('.', 1)
-
-        # Generate srcset for WebP
-        webp_srcset = [
-            f"{base_url}.{ext} {size}w" for size in sizes
-        ]
-        webp_srcset_str = ", ".join(webp_srcset)
-
-        # Determine sizes attribute
-        sizes_attr = "100vw"  # Can be customized based on your needs
-
-        # Create picture element with source and img
-        picture_tag = f"""
-            <picture>
-                <source
-                    type="image/webp"
-                    srcset="{webp_srcset_str}"
-                    sizes="{sizes_attr}">
-                <img
-                    src="{base_url}-{max(sizes)}w.{ext}"
-                    alt="{alt_text}"
-                    class="{css_class}"
-                    loading="{loading}"
-                    decoding="async">
-            </picture>
-        """.strip()
-
-        return mark_safe(picture_tag)
+        key = get_markup_key(image_field, instance, alt_text, css_class, sizes, loading)
+        markup = get_cached_markup(key)
+        if markup is None:
+            markup = render_picture(image_field, instance, alt_text, css_class, sizes, loading)
+            set_cached_markup(key, markup)
+        return mark_safe(markup)
 
     except Exception as e:
         # Log the error and return empty string or fallback image
-        import logging
-        logger = logging.getLogger(__name__)
         logger.error(f"Error generating responsive image: {str(e)}")
-        return ""
\ No newline at end of file
+        return ""
+
+def render_picture(image_field, instance, alt_text, css_class, sizes, loading):
+    """The <picture> markup for responsive_image()."""
+    # Variants per format as recorded in the image manifest, optionally limited to `sizes`
+    get_sources = getattr(instance, 'get_image_sources', None)
+    sources = get_sources() if get_sources else []
+    for source in sources:
+        source['variants'] = [
+            variant for variant in source['variants'].values() if not sizes or variant['width'] in sizes
+        ]
+    sources = [source for source in sources if source['variants']]
+    variants = sources[-1]['variants'] if sources else []
+
+    # Clean and escape input
+    alt_text = escape(alt_text)
+    css_class = escape(css_class)
+    src = escape(variants[-1]['url'] if variants else image_field.url)
+
+    # Dimensions from the manifest, legacy variants have none
+    dimensions = ""
+    if variants and variants[-1].get('height'):
+        dimensions = f"""
+                width="{variants[-1]['width']}"
+                height="{variants[-1]['height']}\""""
+
+    # Inline placeholder painted until the image loads
+    style = ""
+    placeholder = (getattr(instance, 'image_manifest', None) or {}).get('placeholder')
+    if placeholder:
+        style = f"""
+                style="background-color: {escape(placeholder['color'])}; background-image: url({escape(placeholder['data'])}); background-size: cover\""""
+
+    # Determine sizes attribute
+    sizes_attr = "100vw"  # Can be customized based on your needs
+
+    source_tag = ""
+    for source in sources:
+        srcset_str = ", ".join(f"{escape(variant['url'])} {variant['width']}w" for variant in source['variants'])
+        source_tag += f"""
+            <source
+                type="{source['type']}"
+                srcset="{srcset_str}"
+                sizes="{sizes_attr}">"""
+
+    # Create picture element with source and img
+    return f"""
+        <picture>{source_tag}
+            <img
+                src="{src}"
+                alt="{alt_text}"
+                class="{css_class}"{dimensions}{style}
+                loading="{loading}"
+                decoding="async">
+        </picture>
+    """.strip()
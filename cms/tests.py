@@ -1,3 +1,1167 @@
-from django.test import TestCase
+import base64
+import gzip
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from urllib.parse import parse_qsl, urlsplit
+from PIL import Image
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.paginator import Paginator
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from django.core.management import call_command
+from .admin.post import bulk_update_posts
+from .models import Category, ImageAsset, ImageJob, Page, Post, PostNavigation, SiteSettings, Tag, WebSubSubscription
+from .management.commands.benchmark_images import make_source, run_mode
+from .models.featured_image import ImageTooLarge, format_available, resize_and_compress_images, resize_cascade
+from .models.image_job import run_image_job
+from .models.settings import SETTINGS_VERSION_KEY
+from .pagination import KeysetPaginator
+from .templatetags.responsive_image import responsive_image
+from .text import html_to_text
+from . import static_indexes, websub
+from .view_counts import CacheViewCountBackend, MemoryViewCountBackend, get_view_counter
 
-# Create your tests here.
+class ContentTestCase(TestCase):
+    """Published posts in one category and tag, plus a page."""
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSettings.get_instance()
+        author = User.objects.create_user(username='author', password='password123')
+        cls.category = Category.objects.create(name='Django')
+        cls.tag = Tag.objects.create(name='Performance')
+        cls.posts = []
+        for i in range(8):
+            post = Post.objects.create(
+                title=f'Post {i}',
+                content=f'<p>Content of post {i}</p>',
+                excerpt=f'Excerpt {i}',
+                author=author,
+                category=cls.category,
+                status='published',
+                is_featured=i % 2 == 0,
+            )
+            post.tags.add(cls.tag)
+            cls.posts.append(post)
+        cls.page = Page.objects.create(title='About', content='<p>About us</p>', status=1)
+        call_command('rebuild_post_navigation', stdout=StringIO())
+
+    def setUp(self):
+        cache.clear()
+        # Warm the process-local settings so the budget reflects steady state
+        SiteSettings.get_settings()
+
+    def tearDown(self):
+        # Drop buffered hits, the test database is gone by the time they would flush
+        get_view_counter().drain()
+
+    def assertQueryBudget(self, url, budget):
+        with self.assertNumQueries(budget):
+            response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+
+class SiteSettingsTests(TestCase):
+    """SiteSettings are memoized per process until their version stamp changes."""
+
+    def setUp(self):
+        cache.clear()
+        SiteSettings.get_instance()
+
+    def test_memoized(self):
+        settings_obj = SiteSettings.get_settings()
+        with self.assertNumQueries(0):
+            self.assertIs(SiteSettings.get_settings(), settings_obj)
+
+    def test_save_invalidates(self):
+        SiteSettings.get_settings()
+        instance = SiteSettings.get_instance()
+        with self.captureOnCommitCallbacks() as callbacks:
+            instance.site_name = 'Renamed site'
+            instance.save()
+        self.assertNotEqual(SiteSettings.get_settings().site_name, 'Renamed site')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(SiteSettings.get_settings().site_name, 'Renamed site')
+
+    def test_bump_from_other_process(self):
+        settings_obj = SiteSettings.get_settings()
+        # Another worker saved the settings, only the shared stamp changed
+        cache.set(SETTINGS_VERSION_KEY, 'other', None)
+        self.assertIsNot(SiteSettings.get_settings(), settings_obj)
+
+    @override_settings(SITE_SETTINGS_MEMO_TIMEOUT=0)
+    def test_memo_expires(self):
+        SiteSettings.get_settings()
+        with self.assertNumQueries(1):
+            SiteSettings.get_settings()
+
+class SyncFlushMixin:
+    """Flushes in the calling thread, which sees the test transaction."""
+
+    def flush_async(self):
+        self.flush()
+
+class SyncMemoryBackend(SyncFlushMixin, MemoryViewCountBackend):
+    pass
+
+class SyncCacheBackend(SyncFlushMixin, CacheViewCountBackend):
+    pass
+
+class ViewCountTests(ContentTestCase):
+    """Hits are buffered by either backend and written in batches."""
+    backends = [SyncMemoryBackend, SyncCacheBackend]
+
+    def view_count(self, post):
+        return Post.objects.values_list('view_count', flat=True).get(pk=post.pk)
+
+    def test_flush_at_threshold(self):
+        post = self.posts[0]
+        for backend_class in self.backends:
+            with self.subTest(backend_class.__name__):
+                backend = backend_class(flush_interval=3600, flush_threshold=3)
+                before = self.view_count(post)
+                backend.increment(post)
+                backend.increment(post)
+                self.assertEqual(self.view_count(post), before)
+                self.assertEqual(backend.pending(post), 2)
+                backend.increment(post)
+                self.assertEqual(self.view_count(post), before + 3)
+                self.assertEqual(backend.pending(post), 0)
+
+    def test_flush_after_interval(self):
+        post = self.posts[0]
+        for backend_class in self.backends:
+            with self.subTest(backend_class.__name__):
+                backend = backend_class(flush_interval=60, flush_threshold=100)
+                before = self.view_count(post)
+                backend.increment(post)
+                self.assertEqual(self.view_count(post), before)
+                backend._last_flush = time.monotonic() - 60
+                backend.increment(post)
+                self.assertEqual(self.view_count(post), before + 2)
+
+    def test_failed_flush_is_requeued(self):
+        post = self.posts[0]
+        for backend_class in self.backends:
+            with self.subTest(backend_class.__name__):
+                backend = backend_class(flush_interval=3600, flush_threshold=100)
+                backend.increment(post)
+                backend.increment_key(('cms.Missing', 1))
+                with self.assertRaises(LookupError):
+                    backend.flush()
+                self.assertEqual(backend.pending(post), 1)
+                self.assertEqual(backend.drain(), {backend.make_key(post): 1, ('cms.Missing', 1): 1})
+
+    def test_cache_drain_across_processes(self):
+        post, other = self.posts[0], self.posts[1]
+        first, second = CacheViewCountBackend(), CacheViewCountBackend()
+        first.increment(post)
+        second.increment(post)
+        second.increment(other)
+        key = first.make_key(post)
+        self.assertEqual(second.drain(), {key: 2, second.make_key(other): 1})
+        self.assertEqual(second.drain(), {})
+        # Hits after a drain in another process are listed again
+        first.increment(post)
+        self.assertEqual(second.drain(), {key: 1})
+        self.assertEqual(first.pending(post), 0)
+
+    def test_cache_drains_do_not_overlap(self):
+        post = self.posts[0]
+        first, second = CacheViewCountBackend(), CacheViewCountBackend()
+        first.increment(post)
+        first.increment(post)
+        drain_slots, inner = first.drain_slots, []
+
+        def interleaved():
+            # Another process flushes while this drain reads the counters
+            inner.append(second.drain())
+            return drain_slots()
+
+        first.drain_slots = interleaved
+        self.assertEqual(first.drain(), {first.make_key(post): 2})
+        self.assertEqual(inner, [{}])
+        self.assertEqual(first.pending(post), 0)
+        self.assertEqual(second.drain(), {})
+
+class QueryBudgetTests(ContentTestCase):
+    """
+    Each public page type must render within a fixed number of queries.
+
+    Budgets are for a cold page cache and include the Last-Modified lookup.
+    """
+
+    def test_home(self):
+        self.assertQueryBudget(reverse('home'), 8)
+
+    def test_post_list(self):
+        self.assertQueryBudget(reverse('post_list'), 4)
+
+    def test_post_detail(self):
+        # One query for the tags of every related post card
+        self.assertQueryBudget(self.posts[3].get_absolute_url(), 5)
+
+    def test_category_list(self):
+        self.assertQueryBudget(reverse('category_list'), 2)
+
+    def test_category_posts(self):
+        self.assertQueryBudget(self.category.get_absolute_url(), 5)
+
+    def test_tag_posts(self):
+        self.assertQueryBudget(self.tag.get_absolute_url(), 5)
+
+    def test_page(self):
+        self.assertQueryBudget(self.page.get_absolute_url(), 2)
+
+    def test_feed(self):
+        self.assertQueryBudget(reverse('rss_feed'), 3)
+
+class PageCacheTests(ContentTestCase):
+    """Cached pages are served without queries until their content changes."""
+
+    def test_repeat_request_is_served_from_cache(self):
+        url = self.posts[3].get_absolute_url()
+        self.client.get(url, secure=True)
+        self.assertQueryBudget(url, 0)
+
+    def test_edit_invalidates_cached_pages(self):
+        url = self.category.get_absolute_url()
+        self.client.get(url, secure=True)
+        post = self.posts[-1]
+        with self.captureOnCommitCallbacks() as callbacks:
+            post.title = 'Renamed post'
+            post.save()
+        # Versions are bumped once the edit is committed, not before
+        self.assertNotContains(self.client.get(url, secure=True), 'Renamed post')
+        for callback in callbacks:
+            callback()
+        response = self.client.get(url, secure=True)
+        self.assertContains(response, 'Renamed post')
+
+    def test_renamed_category_updates_tag_pages(self):
+        url = self.tag.get_absolute_url()
+        self.client.get(url, secure=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Web Frameworks'
+            self.category.save()
+        self.assertContains(self.client.get(url, secure=True), 'Web Frameworks')
+
+    def test_feed_documents_are_cached(self):
+        for url in (reverse('rss_feed'), reverse('category_atom_feed', args=[self.category.slug])):
+            self.client.get(url, secure=True)
+            self.assertQueryBudget(url, 0)
+
+            post = self.posts[-1]
+            with self.captureOnCommitCallbacks(execute=True):
+                post.title = f'Renamed for {url}'
+                post.save()
+            response = self.client.get(url, secure=True)
+            self.assertContains(response, f'Renamed for {url}')
+            self.assertTrue(response['ETag'] and response['Last-Modified'])
+
+class ConditionalGetTests(ContentTestCase):
+    """Pages and feeds answer revalidation with 304 before rendering."""
+
+    def assertNotModified(self, url):
+        response = self.client.get(url, secure=True)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_post_detail(self):
+        self.assertNotModified(self.posts[3].get_absolute_url())
+
+    def test_feed(self):
+        self.assertNotModified(reverse('rss_feed'))
+
+    def test_last_modified_follows_updates(self):
+        url = self.category.get_absolute_url()
+        last_modified = self.client.get(url, secure=True)['Last-Modified']
+        response = self.client.get(url, secure=True, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+class SitemapTests(ContentTestCase):
+    """The sitemap index lists partitions, which are streamed and cached separately."""
+
+    def test_index_lists_partitions(self):
+        response = self.client.get(reverse('django.contrib.sitemaps.views.sitemap'), secure=True)
+        self.assertContains(response, '<loc>https://testserver/sitemap-posts-1.xml</loc>')
+        self.assertContains(response, f'<lastmod>{self.posts[-1].updated_at.date().isoformat()}</lastmod>')
+        self.assertContains(response, '<loc>https://testserver/sitemap-static-1.xml</loc>')
+
+    def test_partition_is_streamed(self):
+        response = self.client.get(reverse('sitemap_section', args=['posts', 1]), secure=True)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        for post in self.posts:
+            self.assertIn(f'<loc>https://testserver{post.get_absolute_url()}</loc>', content)
+        # Last-Modified and existence are read over the partition's id range only
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('sitemap_section', args=['posts', 2]), secure=True)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get(reverse('sitemap_section', args=['drafts', 1]), secure=True).status_code, 404)
+
+    def test_edit_invalidates_only_its_partition(self):
+        first, last = self.posts[0], self.posts[-1]
+        # The last post alone in the second partition
+        with self.settings(SITEMAP_PARTITION_SIZE=last.pk - 1):
+            urls = [reverse('sitemap_section', args=['posts', number]) for number in (1, 2)]
+            for url in urls:
+                b''.join(self.client.get(url, secure=True).streaming_content)
+                self.assertQueryBudget(url, 0)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                last.slug = 'renamed-post'
+                last.save()
+            self.assertQueryBudget(urls[0], 0)
+            content = b''.join(self.client.get(urls[1], secure=True).streaming_content).decode()
+            self.assertIn('renamed-post', content)
+
+    def test_unpublishing_moves_last_modified_forward(self):
+        last = self.posts[-1]
+        Post.objects.exclude(pk=last.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        url = reverse('sitemap_section', args=['posts', 1])
+        last_modified = parse_http_date(self.client.get(url, secure=True)['Last-Modified'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            last.status = 'draft'
+            last.save()
+        response = self.client.get(url, secure=True)
+        self.assertNotIn(last.slug, b''.join(response.streaming_content).decode())
+        self.assertGreaterEqual(parse_http_date(response['Last-Modified']), last_modified)
+
+class StaticIndexTests(ContentTestCase):
+    """Sitemaps and feeds are written as files, with compressed siblings, for nginx."""
+
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings_override = override_settings(
+            STATIC_INDEX_ROOT=self.root, STATIC_INDEX_BASE_URL='https://testserver', STATIC_INDEX_ASYNC=False
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def read(self, name):
+        with open(os.path.join(self.root, name), 'rb') as f:
+            return f.read()
+
+    def test_publish(self):
+        out = StringIO()
+        call_command('publish_static_indexes', stdout=out)
+        for name in ('sitemap.xml', 'sitemap-posts-1.xml', 'feed/index.xml', 'feed/atom/index.xml',
+                     'category/django/feed/index.xml', 'category/django/feed/atom/index.xml'):
+            content = self.read(name)
+            self.assertEqual(gzip.decompress(self.read(f'{name}.gz')), content)
+            self.assertEqual(os.stat(os.path.join(self.root, name)).st_mode & 0o777, 0o644)
+        self.assertIn(b'https://testserver/sitemap-posts-1.xml', self.read('sitemap.xml'))
+        self.assertIn(b'Post 7', self.read('feed/index.xml'))
+
+        out = StringIO()
+        call_command('publish_static_indexes', stdout=out)
+        self.assertIn('Published 0 documents', out.getvalue())
+
+    def test_content_changes_are_published(self):
+        call_command('publish_static_indexes', stdout=StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='Design')
+            post = self.posts[-1]
+            post.title = 'Renamed post'
+            post.save()
+        self.assertIn(b'Renamed post', self.read('feed/index.xml'))
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'category/design/feed/index.xml')))
+
+        # Feeds of deleted categories are removed
+        category.delete()
+        static_indexes.publish()
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'category/design/feed/index.xml')))
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'category/design/feed/index.xml.gz')))
+
+    def count_schedules(self):
+        scheduled = []
+        schedule = static_indexes.schedule
+        static_indexes.schedule = lambda: scheduled.append(True)
+        self.addCleanup(setattr, static_indexes, 'schedule', schedule)
+        return scheduled
+
+    def test_one_publish_per_transaction(self):
+        scheduled = self.count_schedules()
+        with self.captureOnCommitCallbacks(execute=True):
+            for post in self.posts[:3]:
+                post.title = f'{post.title} edited'
+                post.save()
+        self.assertEqual(len(scheduled), 1)
+
+    def test_draft_edits_are_not_published(self):
+        draft = Post.objects.create(
+            title='Draft', content='<p>Draft</p>', author=self.posts[0].author, category=self.category
+        )
+        scheduled = self.count_schedules()
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.title = 'Draft edited'
+            draft.save()
+        self.assertEqual(scheduled, [])
+
+class PublishedPostCountTests(ContentTestCase):
+    """Categories and tags store their number of published posts."""
+
+    def assertCounts(self, category, tag):
+        self.assertEqual(Category.objects.get(pk=self.category.pk).published_post_count, category)
+        self.assertEqual(Tag.objects.get(pk=self.tag.pk).published_post_count, tag)
+
+    def test_status_changes(self):
+        self.assertCounts(8, 8)
+        post = self.posts[0]
+        post.status = 'draft'
+        post.save()
+        self.assertCounts(7, 7)
+        post.status = 'published'
+        post.save()
+        self.assertCounts(8, 8)
+        Post.objects.get(pk=self.posts[1].pk).delete()
+        self.assertCounts(7, 7)
+
+    def test_category_and_tag_changes(self):
+        design = Category.objects.create(name='Design')
+        post = self.posts[0]
+        post.category = design
+        post.save()
+        self.assertCounts(7, 8)
+        self.assertEqual(Category.objects.get(pk=design.pk).published_post_count, 1)
+
+        post.tags.remove(self.tag)
+        self.assertCounts(7, 7)
+        # Removing rows that do not exist changes nothing
+        other = Tag.objects.create(name='Other')
+        self.posts[1].tags.add(other)
+        post.tags.remove(self.tag, other)
+        self.tag.posts.remove(post)
+        self.assertCounts(7, 7)
+        self.assertEqual(Tag.objects.get(pk=other.pk).published_post_count, 1)
+        draft = Post.objects.create(title='Draft', content='<p>Draft</p>', author=post.author, category=design)
+        self.tag.posts.add(draft, post)
+        self.assertCounts(7, 8)
+        self.tag.posts.clear()
+        self.assertCounts(7, 0)
+
+    def test_bulk_update(self):
+        bulk_update_posts(Post.objects.filter(pk__in=[post.pk for post in self.posts[:3]]), status='draft')
+        self.assertCounts(5, 5)
+
+    def test_recount(self):
+        Category.objects.update(published_post_count=0)
+        out = StringIO()
+        call_command('recount', stdout=out)
+        self.assertIn('Categories: 1 drifted counts repaired', out.getvalue())
+        self.assertCounts(8, 8)
+
+class DerivedTextTests(ContentTestCase):
+    """Plain text, word count and excerpt are derived from post content on save."""
+    content = (
+        '<h2>Caching</h2><p>Pages are <em>cached</em>&nbsp;per version.</p>'
+        '<img src="a.webp" alt="A diagram"><script>var x = 1;</script><p>The end</p>'
+    )
+
+    def test_html_to_text(self):
+        self.assertEqual(
+            html_to_text(self.content),
+            'Caching Pages are cached per version. [Image: A diagram] The end',
+        )
+
+    def test_derived_on_save(self):
+        post = self.posts[0]
+        post.content = self.content + '<p>' + 'word ' * 300 + '</p>'
+        post.excerpt = ''
+        post.save()
+        post.refresh_from_db()
+        self.assertTrue(post.plain_text.startswith('Caching Pages are cached'))
+        self.assertEqual(post.word_count, 311)
+        self.assertLessEqual(len(post.text_excerpt), 200)
+        self.assertTrue(post.text_excerpt.endswith('word…'))
+
+        response = self.client.get(reverse('rss_feed'), secure=True)
+        self.assertContains(response, 'Caching Pages are cached')
+        self.assertContains(self.client.get(post.get_absolute_url(), secure=True), '2 min read')
+
+    def test_backfill(self):
+        Post.objects.update(plain_text='', word_count=0, text_excerpt='')
+        url = reverse('post_list')
+        self.assertContains(self.client.get(url, secure=True), '0 min read')
+        call_command('backfill_post_text', '--batch-size', '3', stdout=StringIO())
+        post = Post.objects.get(pk=self.posts[0].pk)
+        self.assertEqual((post.plain_text, post.word_count), ('Content of post 0', 4))
+        # Cached pages showing the empty text are replaced
+        self.assertNotContains(self.client.get(url, secure=True), '0 min read')
+
+class PostNavigationTests(ContentTestCase):
+    """Related posts and previous/next links follow publishing changes."""
+
+    def navigation(self, post):
+        # The stored rows, maintained by signals
+        return PostNavigation.objects.get(post=post).resolve()
+
+    def test_neighbours(self):
+        navigation = self.navigation(self.posts[3])
+        self.assertEqual(navigation['previous_post'], self.posts[2])
+        self.assertEqual(navigation['next_post'], self.posts[4])
+        self.assertEqual(len(navigation['related_posts']), 3)
+        self.assertNotIn(self.posts[3], navigation['related_posts'])
+
+    def test_unpublishing_relinks_neighbours(self):
+        post = self.posts[3]
+        post.status = 'draft'
+        post.save()
+        self.assertEqual(self.navigation(self.posts[2])['next_post'], self.posts[4])
+        self.assertEqual(self.navigation(self.posts[4])['previous_post'], self.posts[2])
+        self.assertNotIn(post, self.navigation(self.posts[7])['related_posts'])
+
+    def test_shared_tags_rank_related_posts(self):
+        tag = Tag.objects.create(name='Caching')
+        self.posts[1].tags.add(tag)
+        self.posts[5].tags.add(tag)
+        self.assertEqual(self.navigation(self.posts[5])['related_posts'][0], self.posts[1])
+
+    def test_only_outranked_lists_are_rebuilt(self):
+        author = self.posts[0].author
+        elsewhere = Post.objects.create(
+            title='Elsewhere', content='<p>Elsewhere</p>', author=author,
+            category=Category.objects.create(name='Python'), status='published',
+        )
+        elsewhere.tags.add(self.tag)
+        # One shared tag ranks below the full related lists of the 'Django' posts
+        self.assertEqual(PostNavigation.objects.related_changes({elsewhere.pk}), set())
+
+        close = Post.objects.create(
+            title='Close', content='<p>Close</p>', author=author, category=self.category, status='published'
+        )
+        close.tags.add(self.tag)
+        # Ties the lowest score of every list sharing its tag
+        changed = PostNavigation.objects.related_changes({close.pk})
+        self.assertEqual(changed, {elsewhere.pk, *(post.pk for post in self.posts)})
+
+    def test_request_does_not_write(self):
+        post = self.posts[3]
+        PostNavigation.objects.filter(post=post).delete()
+        response = self.client.get(post.get_absolute_url(), secure=True)
+        self.assertEqual(response.context['previous_post'], self.posts[2])
+        self.assertFalse(PostNavigation.objects.filter(post=post).exists())
+
+class BenchmarkQueriesTests(TestCase):
+    """The benchmark rolls back what it seeds, even with nothing published."""
+
+    def test_without_published_posts(self):
+        out = StringIO()
+        call_command('benchmark_queries', '--posts', '0', '--repeat', '1', stdout=out)
+        self.assertIn('Rolled back seeded posts.', out.getvalue())
+        self.assertNotIn('post_list_keyset_deep', out.getvalue())
+        self.assertFalse(Category.objects.exists())
+
+class KeysetPaginationTests(ContentTestCase):
+    """Keyset pages match OFFSET pages, whichever page is requested first."""
+
+    def assertSamePages(self, numbers):
+        queryset = Post.objects.active()
+        offset = Paginator(queryset.order_by('-created_at', '-id'), 3)
+        keyset = KeysetPaginator(queryset, 3)
+        for number in numbers:
+            self.assertEqual(list(keyset.page(number)), list(offset.page(number)))
+        self.assertEqual(keyset.num_pages, offset.num_pages)
+
+    def test_forward(self):
+        self.assertSamePages([1, 2, 3])
+
+    def test_deep_page_first(self):
+        self.assertSamePages([3, 2, 1])
+
+    def test_count_is_cached(self):
+        KeysetPaginator(Post.objects.active(), 3).count
+        with self.assertNumQueries(0):
+            KeysetPaginator(Post.objects.active(), 3).count
+
+    def test_page_urls(self):
+        response = self.client.get(reverse('post_list_paginated', args=[2]), secure=True)
+        self.assertEqual(len(response.context['posts']), 2)
+        response = self.client.get(reverse('post_list_paginated', args=[3]), secure=True)
+        self.assertEqual(response.status_code, 404)
+
+class JSONLDTests(ContentTestCase):
+    """Listing JSON-LD covers the current page and is built from cached fragments."""
+
+    def get_schema(self, url):
+        return json.loads(self.client.get(url, secure=True).context['schema'])
+
+    def test_listing_is_capped_to_page(self):
+        schema = self.get_schema(self.tag.get_absolute_url())
+        items = schema['mainEntity']['itemListElement']
+        self.assertEqual(len(items), 6)
+        self.assertEqual(schema['mainEntity']['numberOfItems'], 8)
+        self.assertEqual(items[0]['item']['headline'], self.posts[-1].title)
+
+        schema = self.get_schema(reverse('tagged_paginated', args=[self.tag.slug, 2]))
+        self.assertEqual([item['position'] for item in schema['mainEntity']['itemListElement']], [7, 8])
+
+    def test_fragment_follows_edits(self):
+        url = self.posts[3].get_absolute_url()
+        self.get_schema(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.name = 'Speed'
+            self.tag.save()
+        self.assertEqual(self.get_schema(url)['keywords'], ['Speed'])
+
+    def test_fragment_follows_author_and_image(self):
+        post = self.posts[3]
+        self.get_schema(post.get_absolute_url())
+        with self.captureOnCommitCallbacks(execute=True):
+            post.author.first_name, post.author.last_name = 'Ada', 'Lovelace'
+            post.author.save()
+            # Processed images are saved with update_fields, leaving updated_at alone
+            post.image_manifest = {'settings': 'new'}
+            post.save(update_fields=['image_manifest'])
+        schema = self.get_schema(post.get_absolute_url())
+        self.assertEqual(schema['author']['name'], 'Ada Lovelace')
+
+def make_upload(name='photo.jpg', size=(1600, 900), format='JPEG', color=(200, 120, 40)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{format.lower()}')
+
+class ImageTestCase(ContentTestCase):
+    """Content tests with uploads written to a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root, IMAGE_CACHE_DIR=os.path.join(media_root, 'cache')
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def save_site_settings(self, **values):
+        site_settings = SiteSettings.get_instance()
+        for name, value in values.items():
+            setattr(site_settings, name, value)
+        # Other processes see the change once it is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            site_settings.save()
+
+class ImageJobTests(ImageTestCase):
+    """Uploads are queued and processed by image workers."""
+
+    def test_upload_is_queued_and_processed(self):
+        post = self.posts[0]
+        post.featured_image = make_upload()
+        post.save()
+        self.assertEqual(post.image_status, Post.IMAGE_PENDING)
+        self.assertIn('animate-pulse', self.client.get(post.get_absolute_url(), secure=True).content.decode())
+        # No guessed variant URLs while it is processed
+        self.assertEqual(post.get_image_variants(), {})
+        cache.clear()
+        self.assertNotIn('image', json.loads(self.client.get(post.get_absolute_url(), secure=True).context['schema']))
+        self.assertNotContains(self.client.get(reverse('rss_feed'), secure=True), '<enclosure')
+
+        job_ids = ImageJob.objects.claim(5)
+        self.assertEqual(len(job_ids), 1)
+        self.assertEqual(ImageJob.objects.claim(5), [])
+        self.assertEqual(run_image_job(job_ids[0]), ImageJob.DONE)
+
+        post.refresh_from_db()
+        self.assertEqual(post.image_status, Post.IMAGE_READY)
+        self.assertEqual(post.featured_image.name, post.get_largest_image_variant()['path'])
+
+    def test_new_upload_resets_job(self):
+        post = self.posts[0]
+        post.featured_image = make_upload()
+        post.save()
+        job_id, = ImageJob.objects.claim(5)
+        post.featured_image = make_upload('other.jpg', color=(10, 20, 30))
+        post.save()
+        # The outdated run must not mark the new upload as ready
+        run_image_job(job_id)
+        post.refresh_from_db()
+        self.assertEqual(post.image_status, Post.IMAGE_PENDING)
+        self.assertEqual(ImageJob.objects.claim(5), [job_id])
+
+    @override_settings(IMAGE_MAX_PIXELS=1000, IMAGE_JOB_MAX_ATTEMPTS=3)
+    def test_unprocessable_image_fails_at_once(self):
+        uploads = [make_upload(), SimpleUploadedFile('broken.jpg', b'not an image', content_type='image/jpeg')]
+        for post, upload in zip(self.posts, uploads):
+            post.featured_image = upload
+            post.save()
+            job_id, = ImageJob.objects.claim(5)
+            self.assertEqual(run_image_job(job_id), ImageJob.FAILED)
+            post.refresh_from_db()
+            self.assertEqual(post.image_status, Post.IMAGE_FAILED)
+
+    def test_job_is_deleted_with_its_object(self):
+        post = self.posts[0]
+        post.featured_image = make_upload()
+        post.save()
+        post.delete()
+        self.assertFalse(ImageJob.objects.exists())
+
+class ImageDeduplicationTests(ImageTestCase):
+    """Identical uploads share one stored image, deleted with the last reference."""
+
+    def setUp(self):
+        super().setUp()
+        self.first, self.second = self.posts[:2]
+        self.category = Category.objects.create(name='Design')
+        for obj in (self.first, self.second, self.category):
+            obj.featured_image = make_upload(f'{obj.pk}.jpg')
+            obj.save()
+
+    def test_shared_upload(self):
+        asset = ImageAsset.objects.get()
+        self.assertEqual(asset.references, 3)
+        self.assertEqual(self.second.featured_image.name, self.first.featured_image.name)
+        self.assertEqual(len(os.listdir(os.path.dirname(self.first.featured_image.path))), 1)
+
+        # Processed once, the result is copied to every object sharing it
+        job_id, = ImageJob.objects.claim(5)
+        run_image_job(job_id)
+        self.first.refresh_from_db()
+        for obj in (self.second, self.category):
+            obj.refresh_from_db()
+            self.assertEqual(obj.image_status, obj.IMAGE_READY)
+            self.assertEqual(obj.featured_image.name, self.first.featured_image.name)
+            self.assertEqual(obj.image_manifest, self.first.image_manifest)
+
+        # Later uploads reuse the variants right away
+        third = self.posts[2]
+        third.featured_image = make_upload()
+        third.save()
+        self.assertTrue(third.image_ready)
+        self.assertEqual(ImageJob.objects.claim(5), [])
+
+    def test_unprocessed_asset_is_queued_again(self):
+        # The first upload is replaced before its job ran
+        job_id, = ImageJob.objects.claim(5)
+        self.first.featured_image = make_upload(color=(10, 20, 30))
+        self.first.save()
+        third = self.posts[2]
+        third.featured_image = make_upload()
+        third.save()
+        self.assertEqual(third.image_status, third.IMAGE_PENDING)
+
+        for job_id in ImageJob.objects.claim(5):
+            run_image_job(job_id)
+        for obj in (self.second, self.category, third):
+            obj.refresh_from_db()
+            self.assertEqual(obj.image_status, obj.IMAGE_READY)
+
+    @override_settings(IMAGE_JOB_MAX_ATTEMPTS=1)
+    def test_failed_asset_is_retried(self):
+        first, second = self.posts[2:4]
+        first.featured_image = SimpleUploadedFile('broken.jpg', b'not an image', content_type='image/jpeg')
+        first.save()
+        for job_id in ImageJob.objects.claim(5):
+            run_image_job(job_id)
+        first.refresh_from_db()
+        self.assertEqual(first.image_status, first.IMAGE_FAILED)
+
+        second.featured_image = SimpleUploadedFile('broken.jpg', b'not an image', content_type='image/jpeg')
+        second.save()
+        self.assertEqual(second.image_status, second.IMAGE_PENDING)
+        self.assertEqual(ImageJob.objects.filter(object_id=second.pk, status=ImageJob.PENDING).count(), 1)
+
+    def test_files_removed_with_last_reference(self):
+        run_image_job(*ImageJob.objects.claim(5))
+        self.first.refresh_from_db()
+        files = [os.path.join(settings.MEDIA_ROOT, name) for name in self.first.get_image_files()]
+
+        self.first.delete()
+        self.second.refresh_from_db()
+        self.second.featured_image = make_upload(color=(10, 20, 30))
+        self.second.save()
+        self.assertEqual(ImageAsset.objects.get(content_hash=self.category.image_hash).references, 1)
+        self.assertTrue(all(os.path.exists(path) for path in files))
+
+        self.category.refresh_from_db()
+        self.category.delete()
+        self.assertFalse(any(os.path.exists(path) for path in files))
+        self.assertFalse(ImageAsset.objects.filter(content_hash=self.category.image_hash).exists())
+
+    def test_cleared_image_is_released(self):
+        run_image_job(*ImageJob.objects.claim(5))
+        content_hash = self.category.image_hash
+        objects = [type(obj).objects.get(pk=obj.pk) for obj in (self.first, self.second, self.category)]
+        files = [os.path.join(settings.MEDIA_ROOT, name) for name in objects[0].get_image_files()]
+
+        # The admin "clear" checkbox
+        for obj in objects[:2]:
+            obj.featured_image = None
+            obj.save()
+        self.assertEqual(ImageAsset.objects.get(content_hash=content_hash).references, 1)
+        self.assertTrue(all(os.path.exists(path) for path in files))
+        objects[0].refresh_from_db()
+        self.assertEqual((objects[0].image_hash, objects[0].image_manifest), ('', {}))
+
+        objects[2].featured_image = None
+        objects[2].save()
+        self.assertFalse(ImageAsset.objects.filter(content_hash=content_hash).exists())
+        self.assertFalse(any(os.path.exists(path) for path in files))
+
+class ImageMemoryTests(SimpleTestCase):
+    """Large sources are processed within IMAGE_MEMORY_BUDGET, or rejected."""
+    sizes = [576, 768, 992, 1200]
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir)
+
+    def run_in_process(self, func, *args):
+        # A fresh process, so its peak RSS only reflects this run
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('fork')) as pool:
+            return pool.submit(func, *args).result()
+
+    def resize(self, source):
+        return resize_and_compress_images(
+            source, self.workdir, 'test', sizes=self.sizes, formats={'webp': 80}, aspect_ratio=(16, 9)
+        )
+
+    @override_settings(IMAGE_MEMORY_BUDGET=96)
+    def test_large_jpeg_within_budget(self):
+        source = os.path.join(self.workdir, 'large.jpg')
+        self.run_in_process(make_source, source, 9600, 5400)
+        _, baseline, peak, results = self.run_in_process(
+            run_mode, source, os.path.join(self.workdir, 'out'), self.sizes, True, 1
+        )
+        self.assertEqual([variant['width'] for variant in results], self.sizes)
+        # ru_maxrss is in kilobytes on Linux
+        self.assertLess((peak - baseline) / 1024, settings.IMAGE_MEMORY_BUDGET)
+
+    @override_settings(IMAGE_MEMORY_BUDGET=16)
+    def test_over_budget_rejected(self):
+        # PNGs cannot be decoded at reduced scale
+        source = os.path.join(self.workdir, 'large.png')
+        Image.new('RGB', (3000, 2000)).save(source)
+        with self.assertRaises(ImageTooLarge):
+            self.resize(source)
+
+    def test_source_smaller_than_boxes(self):
+        source = os.path.join(self.workdir, 'small.jpg')
+        Image.new('RGB', (500, 300), (200, 120, 40)).save(source)
+        with Image.open(source) as img:
+            images = [resized_img for box, resized_img in resize_cascade(img, [(width, width) for width in self.sizes])]
+        # Encoded concurrently, so never the same image object
+        self.assertEqual(len({id(resized_img) for resized_img in images}), len(self.sizes))
+
+        results = resize_and_compress_images(
+            source, self.workdir, 'small', sizes=self.sizes, formats={'webp': 80, 'jpeg': 80}, aspect_ratio=(16, 9)
+        )
+        self.assertEqual(len(results), 2 * len(self.sizes))
+
+    @override_settings(IMAGE_MAX_PIXELS=1000)
+    def test_pixel_limit(self):
+        source = os.path.join(self.workdir, 'small.jpg')
+        Image.new('RGB', (100, 100)).save(source)
+        with self.assertRaises(ImageTooLarge):
+            self.resize(source)
+
+class ImageManifestTests(ImageTestCase):
+    """Generated variants are recorded in the manifest and read from it."""
+
+    def setUp(self):
+        super().setUp()
+        self.post = self.posts[0]
+        self.post.featured_image = make_upload()
+        self.post.save()
+        job_id, = ImageJob.objects.claim(1)
+        run_image_job(job_id)
+        self.post.refresh_from_db()
+
+    def test_manifest_describes_files(self):
+        variants = self.post.get_image_variants()
+        self.assertEqual(list(variants), [576, 768, 992, 1200])
+        for variant in variants.values():
+            path = os.path.join(settings.MEDIA_ROOT, variant['path'])
+            self.assertEqual(os.path.getsize(path), variant['bytes'])
+            with Image.open(path) as img:
+                self.assertEqual(img.size, (variant['width'], variant['height']))
+
+    def test_responsive_image_srcset(self):
+        html = self.client.get(self.post.get_absolute_url(), secure=True).content.decode()
+        for variant in self.post.get_image_variants().values():
+            self.assertIn(f"{variant['url']} {variant['width']}w", html)
+
+    def test_formats(self):
+        expected = ['avif', 'webp', 'jpeg'] if format_available('avif') else ['webp', 'jpeg']
+        self.assertEqual(self.post.get_image_formats(), expected)
+        # The original is replaced by the largest variant in the fallback format
+        self.assertTrue(self.post.featured_image.name.endswith('.jpeg'))
+
+        html = self.client.get(self.post.get_absolute_url(), secure=True).content.decode()
+        types = re.findall(r'<source\s+type="([^"]+)"', html)
+        self.assertEqual(types, [f'image/{format}' for format in expected])
+        for format in expected:
+            for variant in self.post.get_image_variants(format).values():
+                self.assertIn(f"{variant['url']} {variant['width']}w", html)
+
+    def test_responsive_image_dimensions(self):
+        largest = self.post.get_largest_image_variant()
+        html = responsive_image(self.post.featured_image, alt_text='Photo')
+        self.assertRegex(html, rf'width="{largest["width"]}"\s+height="{largest["height"]}"')
+
+    def test_placeholder(self):
+        placeholder = self.post.image_manifest['placeholder']
+        # make_upload() fills the image with (200, 120, 40), give or take JPEG rounding
+        color = bytes.fromhex(placeholder['color'][1:])
+        for channel, expected in zip(color, (200, 120, 40)):
+            self.assertAlmostEqual(channel, expected, delta=3)
+        header, data = placeholder['data'].split(',')
+        self.assertEqual(header, 'data:image/webp;base64')
+        with Image.open(BytesIO(base64.b64decode(data))) as img:
+            self.assertLessEqual(max(img.size), 20)
+
+        html = responsive_image(self.post.featured_image, alt_text='Photo')
+        self.assertIn(f"background-color: {placeholder['color']}", html)
+        self.assertIn(f"background-image: url({placeholder['data']})", html)
+
+    def test_responsive_image_memoized(self):
+        html = responsive_image(self.post.featured_image, alt_text='Photo')
+        # Served from the cache while the image, manifest and settings are unchanged
+        self.post.image_manifest = {**self.post.image_manifest, 'variants': []}
+        self.assertEqual(responsive_image(self.post.featured_image, alt_text='Photo'), html)
+        SiteSettings.bump_version()
+        self.assertNotEqual(responsive_image(self.post.featured_image, alt_text='Photo'), html)
+
+    def test_feed_enclosure(self):
+        response = self.client.get(reverse('rss_feed'), secure=True)
+        self.assertContains(response, f'length="{self.post.get_largest_image_variant()["bytes"]}"')
+
+    def test_delete_removes_every_file(self):
+        files = [os.path.join(settings.MEDIA_ROOT, name) for name in self.post.get_image_files()]
+        self.post.delete()
+        self.assertFalse(any(os.path.exists(path) for path in files))
+
+class ResizedImageTests(ImageTestCase):
+    """The /media-r/ endpoint renders allowed widths once and serves them for revalidation."""
+
+    def setUp(self):
+        super().setUp()
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, 'uploads'))
+        Image.new('RGB', (1600, 900), (10, 200, 30)).save(os.path.join(settings.MEDIA_ROOT, 'uploads', 'a.jpg'))
+        self.url = reverse('resized_image', args=['uploads/a.jpg'])
+
+    def test_renders_and_caches(self):
+        response = self.client.get(self.url, {'w': 576, 'fmt': 'webp'}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        # The URL does not change with the source or the quality
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=3600', response['Cache-Control'])
+        with Image.open(BytesIO(b''.join(response.streaming_content))) as img:
+            self.assertEqual(img.size, (576, 324))
+
+        cached, = [os.path.join(root, name) for root, _, names in os.walk(settings.IMAGE_CACHE_DIR) for name in names]
+        modified = os.path.getmtime(cached)
+        response = self.client.get(self.url, {'w': 576, 'fmt': 'webp'}, secure=True, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.client.get(self.url, {'w': 576, 'fmt': 'webp'}, secure=True)
+        self.assertEqual(os.path.getmtime(cached), modified)
+
+    def test_rejects_widths_outside_settings(self):
+        response = self.client.get(self.url, {'w': 577, 'fmt': 'webp'}, secure=True)
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_paths_outside_media_root(self):
+        url = reverse('resized_image', args=['uploads/../../settings.py'])
+        response = self.client.get(url, {'w': 576}, secure=True)
+        self.assertEqual(response.status_code, 404)
+
+    def test_non_image_files(self):
+        with open(os.path.join(settings.MEDIA_ROOT, 'uploads', 'notes.txt'), 'w') as f:
+            f.write('not an image')
+        url = reverse('resized_image', args=['uploads/notes.txt'])
+        response = self.client.get(url, {'w': 576}, secure=True)
+        self.assertEqual(response.status_code, 404)
+
+    def test_quality_change_renders_again(self):
+        etag = self.client.get(self.url, {'w': 576}, secure=True)['ETag']
+        self.save_site_settings(image_webp_quality=40)
+
+        response = self.client.get(self.url, {'w': 576}, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(sum(len(names) for _, _, names in os.walk(settings.IMAGE_CACHE_DIR)), 2)
+
+class RegenerateImagesTests(ImageTestCase):
+    """Images made with outdated settings are regenerated, current ones skipped."""
+
+    def setUp(self):
+        super().setUp()
+        self.post = self.posts[0]
+        self.post.featured_image = make_upload()
+        self.post.save()
+        run_image_job(*ImageJob.objects.claim(1))
+        self.post.refresh_from_db()
+
+    def regenerate(self, *args):
+        out = StringIO()
+        call_command('regenerate_images', '--workers', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_current_images_are_skipped(self):
+        self.assertIn('Regenerated 0 images', self.regenerate())
+
+    def test_changed_sizes(self):
+        self.save_site_settings(image_sizes=[400, 800])
+        old_files = self.post.get_image_files()
+
+        self.assertIn('1 images would be regenerated', self.regenerate('--dry-run'))
+        self.assertIn('Regenerated 1 images (0 failed)', self.regenerate())
+
+        self.post.refresh_from_db()
+        self.assertEqual(list(self.post.get_image_variants()), [400, 800])
+        self.assertTrue(self.post.image_up_to_date)
+        # Variants of the dropped sizes are removed
+        for name in old_files - self.post.get_image_files():
+            self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, name)))
+
+    def test_added_format_keeps_variant_main_image(self):
+        self.save_site_settings(image_formats=['webp'])
+        self.regenerate()
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.featured_image.name.endswith('.webp'))
+
+        # The WebP main image is written again as a variant, and must stay
+        self.save_site_settings(image_formats=['webp', 'jpeg'])
+        self.assertIn('Regenerated 1 images (0 failed)', self.regenerate())
+        self.post.refresh_from_db()
+        for variant in self.post.image_manifest['variants']:
+            self.assertTrue(os.path.exists(os.path.join(settings.MEDIA_ROOT, variant['path'])), variant['path'])
+
+class Subscriber(BaseHTTPRequestHandler):
+    """Local stand-in for a WebSub subscriber, see SubscriberServer."""
+
+    def do_GET(self):
+        query = dict(parse_qsl(urlsplit(self.path).query))
+        self.server.verifications.append(query)
+        self.respond(200, query.get('hub.challenge', '').encode())
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.deliveries.append((dict(self.headers), body))
+        status = self.server.statuses.pop(0) if self.server.statuses else 204
+        self.respond(status)
+        if status < 300:
+            self.server.delivered.set()
+
+    def respond(self, status, body=b''):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class SubscriberServer(ThreadingHTTPServer):
+    def __init__(self, statuses=()):
+        super().__init__(('127.0.0.1', 0), Subscriber)
+        self.verifications = []
+        self.deliveries = []
+        self.statuses = list(statuses)
+        self.delivered = threading.Event()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}/callback'
+
+# The subscriber listens on 127.0.0.1; verification runs inline to see the test transaction
+@override_settings(WEBSUB_RETRY_DELAY=0, WEBSUB_ALLOW_PRIVATE_CALLBACKS=True, WEBSUB_VERIFY_ASYNC=False)
+class WebSubTests(ContentTestCase):
+    """Feeds advertise the hub, which verifies subscribers and pushes new posts to them."""
+    topic = 'https://testserver/feed/'
+
+    def start_subscriber(self, statuses=()):
+        server = SubscriberServer(statuses)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_feeds_advertise_hub(self):
+        for name in ('rss_feed', 'atom_feed'):
+            response = self.client.get(reverse(name), secure=True)
+            self.assertContains(response, 'href="https://testserver/websub/hub/" rel="hub"')
+
+    def test_subscribe(self):
+        server = self.start_subscriber()
+        data = {'hub.mode': 'subscribe', 'hub.topic': self.topic, 'hub.callback': f'{server.url}?id=1'}
+        response = self.client.post(reverse('websub_hub'), data, secure=True)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(server.verifications[0]['hub.topic'], self.topic)
+        self.assertEqual(server.verifications[0]['id'], '1')
+        self.assertTrue(WebSubSubscription.objects.active().filter(topic=self.topic).exists())
+
+        data['hub.topic'] = 'https://example.org/feed/'
+        self.assertEqual(self.client.post(reverse('websub_hub'), data, secure=True).status_code, 400)
+
+    def test_invalid_lease(self):
+        server = self.start_subscriber()
+        data = {'hub.mode': 'subscribe', 'hub.topic': self.topic, 'hub.callback': server.url, 'hub.lease_seconds': '-5'}
+        self.assertEqual(self.client.post(reverse('websub_hub'), data, secure=True).status_code, 400)
+        self.assertEqual(server.verifications, [])
+
+    @override_settings(WEBSUB_ALLOW_PRIVATE_CALLBACKS=False)
+    def test_private_callbacks_are_refused(self):
+        server = self.start_subscriber()
+        for callback in (server.url, 'http://localhost/callback', 'http://169.254.169.254/latest/', 'http://[::1]/'):
+            data = {'hub.mode': 'subscribe', 'hub.topic': self.topic, 'hub.callback': callback}
+            self.assertEqual(self.client.post(reverse('websub_hub'), data, secure=True).status_code, 400)
+        # Names are resolved before the callback is requested
+        self.assertFalse(websub.is_allowed_callback(server.url.replace('127.0.0.1', 'localhost.')))
+        self.assertFalse(websub.verify_intent('subscribe', self.topic, server.url, None))
+        self.assertFalse(websub.deliver(None, server.url, '', self.topic, 'https://testserver/websub/hub/', b'', 'text/xml'))
+        self.assertEqual(server.verifications, [])
+        self.assertEqual(server.deliveries, [])
+        self.assertTrue(websub.is_allowed_callback('https://93.184.215.14/callback'))
+
+    def test_push_on_publish(self):
+        server = self.start_subscriber()
+        WebSubSubscription.objects.create(
+            topic=self.topic, callback=server.url, secret='secret', lease_expires_at=timezone.now() + timedelta(days=1)
+        )
+        post = Post.objects.create(
+            title='Fresh post', content='<p>Fresh</p>', author=self.posts[0].author, category=self.category
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            post.status = 'published'
+            post.save()
+        self.assertTrue(server.delivered.wait(5))
+
+        headers, body = server.deliveries[0]
+        self.assertIn(b'Fresh post', body)
+        self.assertNotIn(b'Post 0', body)
+        signature = hmac.new(b'secret', body, hashlib.sha256).hexdigest()
+        self.assertEqual(headers['X-Hub-Signature'], f'sha256={signature}')
+
+    def test_failed_delivery_is_retried(self):
+        server = self.start_subscriber(statuses=[500])
+        WebSubSubscription.objects.create(
+            topic=self.topic, callback=server.url, lease_expires_at=timezone.now() + timedelta(days=1)
+        )
+        futures = websub.publish([self.posts[0].pk])
+        self.assertEqual([future.result(5) for future in futures], [True])
+        self.assertEqual(len(server.deliveries), 2)
@@ -0,0 +1,87 @@
+"""
+Plain text derived from post HTML.
+
+Posts store their plain text, word count and excerpt when saved (see
+Post.update_derived_text), so feeds, JSON-LD and reading times never parse
+HTML while serving. The parser streams over the markup with the standard
+library tokenizer instead of building a document tree.
+"""
+import re
+from html.parser import HTMLParser
+
+EXCERPT_LENGTH = 200
+
+# Elements whose boundaries separate words
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption',
+    'figure', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav',
+    'ol', 'p', 'pre', 'section', 'table', 'td', 'th', 'tr', 'ul',
+}
+# Elements whose content is never text
+SKIP_TAGS = {'script', 'style', 'template', 'noscript'}
+
+WHITESPACE = re.compile(r'\s+')
+
+
+class PlainTextParser(HTMLParser):
+    """Collects the text of a document, with images replaced by their alt text."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skipping += 1
+        elif tag == 'img':
+            alt = dict(attrs).get('alt')
+            if alt:
+                self.parts.append(f' [Image: {alt}] ')
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in SKIP_TAGS:
+            self.skipping -= 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skipping = max(0, self.skipping - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+    def get_text(self):
+        return WHITESPACE.sub(' ', ''.join(self.parts)).strip()
+
+
+def html_to_text(html):
+    parser = PlainTextParser()
+    parser.feed(html or '')
+    parser.close()
+    return parser.get_text()
+
+
+def truncate(text, length=EXCERPT_LENGTH):
+    """`text` cut to at most `length` characters, at a word boundary when there is one."""
+    if len(text) <= length:
+        return text
+    cut = text[:length - 1]
+    if ' ' in cut:
+        cut = cut.rsplit(' ', 1)[0]
+    return cut.rstrip(' ,.;:') + '…'
+
+
+def derive_text(html):
+    """`{'plain_text', 'word_count', 'text_excerpt'}` of an HTML document."""
+    text = html_to_text(html)
+    return {
+        'plain_text': text,
+        'word_count': len(text.split()),
+        'text_excerpt': truncate(text),
+    }
@@ -1,12 +1,13 @@
 from django.urls import path
-from django.contrib.sitemaps.views import sitemap
 from .views.post import PostListView, PostDetailView
 from .views.category import CategoryView, CategoryListView
 from .views.tag import TagView
 from .views.pages.page import PageView
 from .views.pages.home import HomeView
 from .views.pages.contact import ContactView
-from .sitemaps import sitemaps
+from .views.media import ResizedImageView
+from .views.websub import WebSubHubView
+from .views.sitemaps import SitemapIndexView, SitemapSectionView
 from .feeds import BlogFeed, BlogAtomFeed, CategoryFeed, CategoryAtomFeed
 
 
@@ -35,9 +36,14 @@ urlpatterns = [
     path('feed/atom/', BlogAtomFeed(), name='atom_feed'),
     path('category/<slug:slug>/feed/', CategoryFeed(), name='category_rss_feed'),
     path('category/<slug:slug>/feed/atom/', CategoryAtomFeed(), name='category_atom_feed'),
+    path('websub/hub/', WebSubHubView.as_view(), name='websub_hub'),
 
-    # Sitemap URL
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    # Resized media, rendered on first request
+    path('media-r/<path:path>', ResizedImageView.as_view(), name='resized_image'),
+
+    # Sitemap index and its partitions
+    path('sitemap.xml', SitemapIndexView.as_view(), name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap-<slug:section>-<int:number>.xml', SitemapSectionView.as_view(), name='sitemap_section'),
 
     # Catch-all Page URLs (must come last)
     path('<slug:slug>/', PageView.as_view(), name='page'),
@@ -0,0 +1,276 @@
+"""
+Buffered, write-behind view counting.
+
+Hits are accumulated by a backend (in process memory or in the shared cache)
+and written to ``view_count`` in batched UPDATE statements once the buffer
+reaches a threshold or the flush interval has elapsed. Flushing runs on a
+background thread, so rendering a page never waits on a database write.
+"""
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+FLUSH_REQUEST_KEY = 'view_count:flush_requested'
+
+
+def write_view_counts(counts):
+    """
+    Apply buffered increments to the database.
+
+    ``counts`` maps ``(model_label, pk)`` to the number of hits. Objects that
+    received the same number of hits share one UPDATE, so a flush costs one
+    statement per distinct increment per model rather than one per object.
+    """
+    grouped = defaultdict(lambda: defaultdict(list))
+    for (label, pk), amount in counts.items():
+        if amount > 0:
+            grouped[label][amount].append(pk)
+
+    with transaction.atomic():
+        for label, by_amount in grouped.items():
+            model = apps.get_model(label)
+            for amount, pks in by_amount.items():
+                model._base_manager.filter(pk__in=pks).update(view_count=F('view_count') + amount)
+
+
+class BaseViewCountBackend:
+    """Common flush scheduling for view count backends."""
+
+    # How often (in seconds) to look for a flush requested by `flush_view_counts`
+    flush_request_check_interval = 1
+
+    def __init__(self, flush_interval=60, flush_threshold=100):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._lock = threading.Lock()
+        self._flushing = threading.Lock()
+        self._hits_since_flush = 0
+        self._last_flush = time.monotonic()
+        self._last_request_check = 0
+        self._seen_flush_request = cache.get(FLUSH_REQUEST_KEY)
+
+    @staticmethod
+    def make_key(obj):
+        return (obj._meta.label, obj.pk)
+
+    def increment(self, obj):
+        """Record a single hit for ``obj`` and schedule a flush if one is due."""
+        self.increment_key(self.make_key(obj))
+
+    def increment_key(self, key):
+        """Record a single hit for the object identified by ``(label, pk)``."""
+        self.add(key, 1)
+        with self._lock:
+            self._hits_since_flush += 1
+        if self.flush_due():
+            self.flush_async()
+
+    def add(self, key, amount):
+        raise NotImplementedError('Subclasses must implement add()')
+
+    def pending(self, obj):
+        """Return the number of hits for ``obj`` not yet written to the database."""
+        raise NotImplementedError('Subclasses must implement pending()')
+
+    def drain(self):
+        """Remove and return all buffered counts as ``{(label, pk): amount}``."""
+        raise NotImplementedError('Subclasses must implement drain()')
+
+    def flush_due(self):
+        if self._hits_since_flush >= self.flush_threshold:
+            return True
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            return True
+        if now - self._last_request_check >= self.flush_request_check_interval:
+            self._last_request_check = now
+            requested = cache.get(FLUSH_REQUEST_KEY)
+            if requested != self._seen_flush_request:
+                self._seen_flush_request = requested
+                return True
+        return False
+
+    def flush(self):
+        """Write all buffered counts synchronously and return them."""
+        with self._lock:
+            self._hits_since_flush = 0
+            self._last_flush = time.monotonic()
+        counts = self.drain()
+        if not counts:
+            return counts
+        try:
+            write_view_counts(counts)
+        except Exception:
+            # Put the hits back so the next flush can retry them
+            for key, amount in counts.items():
+                self.add(key, amount)
+            raise
+        return counts
+
+    def flush_async(self):
+        """Flush on a background thread unless a flush is already running."""
+        if not self._flushing.acquire(blocking=False):
+            return
+        thread = threading.Thread(target=self._flush_in_thread, name='view-count-flush', daemon=True)
+        thread.start()
+
+    def _flush_in_thread(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush view counts: {e}")
+        finally:
+            connections.close_all()
+            self._flushing.release()
+
+
+class MemoryViewCountBackend(BaseViewCountBackend):
+    """Accumulates hits in process memory. Pending hits are flushed on exit."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._counts = defaultdict(int)
+        atexit.register(self._flush_at_exit)
+
+    def add(self, key, amount):
+        with self._lock:
+            self._counts[key] += amount
+
+    def pending(self, obj):
+        return self._counts.get(self.make_key(obj), 0)
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = dict(self._counts), defaultdict(int)
+        return counts
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush view counts on exit: {e}")
+
+
+class CacheViewCountBackend(BaseViewCountBackend):
+    """
+    Accumulates hits in the shared cache, so every process sees the same
+    pending counts and any process (or `flush_view_counts`) can flush them.
+
+    Counters are updated with atomic ``incr``/``decr``. Each counter is
+    listed in the index once, guarded by an ``add``-ed marker, in a slot of
+    its own numbered by an atomic ``incr``, so no index entry is ever
+    rewritten. Draining deletes the markers of the slots it read before
+    reading the counters, so a hit arriving meanwhile lists its counter
+    again. Drains hold a lock in the cache, two processes draining the same
+    counters would both write and both ``decr`` them.
+    """
+    key_prefix = 'view_count'
+    index_key = 'view_count:index'
+    # Number of the last slot taken, and of the last slot drained
+    last_slot_key = 'view_count:index:last'
+    drained_slot_key = 'view_count:index:drained'
+    drain_lock_key = 'view_count:drain_lock'
+    # Seconds after which the lock of a drain that died is given up
+    drain_lock_timeout = 60
+
+    def counter_key(self, key):
+        label, pk = key
+        return f'{self.key_prefix}:{label}:{pk}'
+
+    def marker_key(self, counter_key):
+        return f'{counter_key}:indexed'
+
+    def slot_key(self, number):
+        return f'{self.index_key}:{number}'
+
+    def add(self, key, amount):
+        counter_key = self.counter_key(key)
+        try:
+            cache.incr(counter_key, amount)
+        except ValueError:
+            if not cache.add(counter_key, amount, None):
+                cache.incr(counter_key, amount)
+        if cache.add(self.marker_key(counter_key), True, None):
+            self.register(key)
+
+    def register(self, key):
+        """List ``key`` in a new index slot."""
+        cache.add(self.last_slot_key, 0, None)
+        while True:
+            number = cache.incr(self.last_slot_key)
+            cache.set(self.slot_key(number), key, None)
+            # A drain that passed this slot before it was written missed it
+            if (cache.get(self.drained_slot_key) or 0) < number:
+                return
+
+    def pending(self, obj):
+        return cache.get(self.counter_key(self.make_key(obj))) or 0
+
+    def drain(self):
+        """
+        Remove and return all buffered counts. Returns nothing while another
+        process drains, its hits are left for the next flush.
+        """
+        token = uuid.uuid4().hex
+        if not cache.add(self.drain_lock_key, token, self.drain_lock_timeout):
+            return {}
+        try:
+            return self.drain_slots()
+        finally:
+            if cache.get(self.drain_lock_key) == token:
+                cache.delete(self.drain_lock_key)
+
+    def drain_slots(self):
+        first = cache.get(self.drained_slot_key) or 0
+        last = cache.get(self.last_slot_key) or 0
+        cache.set(self.drained_slot_key, last, None)
+        slots = cache.get_many([self.slot_key(number) for number in range(first + 1, last + 1)])
+        if not slots:
+            return {}
+
+        index = {self.counter_key(key): tuple(key) for key in slots.values()}
+        cache.delete_many([self.marker_key(counter_key) for counter_key in index])
+        counts = {}
+        for counter_key, value in cache.get_many(list(index)).items():
+            if value:
+                cache.decr(counter_key, value)
+                counts[index[counter_key]] = value
+        cache.delete_many(list(slots))
+        return counts
+
+
+_view_counter = None
+_view_counter_lock = threading.Lock()
+
+
+def get_view_counter():
+    """Return the process-wide view count backend configured in settings."""
+    global _view_counter
+    if _view_counter is None:
+        with _view_counter_lock:
+            if _view_counter is None:
+                backend_class = import_string(
+                    getattr(settings, 'VIEW_COUNT_BACKEND', 'cms.view_counts.MemoryViewCountBackend')
+                )
+                _view_counter = backend_class(
+                    flush_interval=getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 60),
+                    flush_threshold=getattr(settings, 'VIEW_COUNT_FLUSH_THRESHOLD', 100),
+                )
+    return _view_counter
+
+
+def request_flush():
+    """Ask every process to flush its buffered counts on its next hit."""
+    cache.set(FLUSH_REQUEST_KEY, uuid.uuid4().hex, None)
@@ -1,37 +1,33 @@
 from django.core.cache import cache
-from django.db.models import Count, Q
 from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_control
 from django.utils.translation import gettext as _
 from django.views.generic import ListView
-from ..models import Category, Post
-from ..models import SiteSettings
-from ..views.mixins import BaseMixin, BreadcrumbsMixin, SchemaMixin, SEOMetadataMixin, ViewCountMixin
+from ..models import Category, Post, Tag
+from .. import jsonld, page_cache
+from ..views.mixins import ConditionalGetMixin, KeysetPaginationMixin, PageCacheMixin, BreadcrumbsMixin, SchemaMixin, SEOMetadataMixin, ViewCountMixin
 import json
 from django.shortcuts import get_object_or_404
 
 @method_decorator(cache_control(public=True, max_age=3600), name='dispatch')
-class CategoryListView(BaseMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, ListView):
+class CategoryListView(ConditionalGetMixin, PageCacheMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, ListView):
     model = Category
     template_name = 'blog/category_list.html'
     context_object_name = 'categories'
     paginate_by = 6
     page_kwarg = 'page'
     
+    def compute_last_modified(self):
+        return page_cache.latest_update(Category.objects.all(), Post.objects.all())
+
     def get_queryset(self):
-        cache_key = 'category_list_with_post_count'
+        cache_key = page_cache.versioned_key('category_list_with_post_count', [page_cache.GLOBAL])
         cached_queryset = cache.get(cache_key)
         
         if not cached_queryset:
-            cached_queryset = list(
-                Category.objects.annotate(
-                    post_count=Count('posts', filter=Q(posts__in=Post.objects.active()))
-                ).filter(
-                    post_count__gt=0
-                ).order_by('name')
-            )
-            cache.set(cache_key, cached_queryset, 3600)  # 1-hour cache
+            cached_queryset = list(Category.objects.filter(published_post_count__gt=0).order_by('name'))
+            cache.set(cache_key, cached_queryset, page_cache.get_page_cache_timeout())
         
         return cached_queryset
 
@@ -40,42 +36,40 @@ class CategoryListView(BaseMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMixi
         paginate_base_url = reverse('category_list')
         context.update({
             'paginate_base_url': paginate_base_url,
-            'schema': json.dumps(self.get_schema()),
+            'schema': self.get_schema(context['page_obj']),
             'schema_breadcrumbs': json.dumps(self.get_schema_breadcrumbs())
         })
         
         return context
 
-    def get_schema(self):
-        site_settings = SiteSettings.get_settings()
+    def get_schema(self, page_obj):
+        site_settings = self.get_site_settings()
+        categories = jsonld.get_fragments(
+            self.request, 'category_item', list(page_obj.object_list), self.get_category_item_schema
+        )
         schema = {
             **self.get_base_schema(),
             "@type": "CollectionPage",
             "name": site_settings.blog_category_tagline,
             "description": site_settings.blog_category_description,
-            "mainEntity": {
-                "@type": "ItemList",
-                "numberOfItems": len(self.get_queryset()),
-                "itemListElement": [
-                    {
-                        "@type": "ListItem",
-                        "position": idx + 1,
-                        "url": self.request.build_absolute_uri(category.get_absolute_url()),
-                        "name": category.name,
-                        "description": category.meta_description,
-                    }
-                    for idx, category in enumerate(self.get_queryset())
-                ]
-            }
         }
-        return schema
+        main_entity = jsonld.item_list(categories, start=page_obj.start_index(), total=page_obj.paginator.count)
+        return jsonld.dumps(schema, mainEntity=main_entity)
+
+    def get_category_item_schema(self, category):
+        return {
+            "@type": "Thing",
+            "url": self.request.build_absolute_uri(category.get_absolute_url()),
+            "name": category.name,
+            "description": category.meta_description,
+        }
 
     def get_meta_title(self):
-        site_settings = SiteSettings.get_settings()
+        site_settings = self.get_site_settings()
         return site_settings.blog_category_title
     
     def get_meta_description(self):
-        site_settings = SiteSettings.get_settings()
+        site_settings = self.get_site_settings()
         return site_settings.blog_category_description
 
     def get_breadcrumbs(self):
@@ -83,13 +77,22 @@ class CategoryListView(BaseMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMixi
         breadcrumbs.append({'name': _('Categories'), 'url': reverse('category_list')})
         return breadcrumbs
 
-class CategoryView(ViewCountMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, ListView):
+class CategoryView(ConditionalGetMixin, PageCacheMixin, KeysetPaginationMixin, ViewCountMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, ListView):
     model = Category
     template_name = 'blog/category_posts.html'
     context_object_name = 'posts'
     paginate_by = 6
     page_kwarg = 'page'
 
+    def get_cache_scopes(self):
+        # Post cards show tag names, which bump the global version
+        return [('category', self.kwargs['slug']), page_cache.GLOBAL]
+
+    def compute_last_modified(self):
+        slug = self.kwargs['slug']
+        return page_cache.latest_update(
+            Category.objects.filter(slug=slug), Post.objects.filter(category__slug=slug), Tag.objects.all()
+        )
     
     def get_queryset(self):
         self.category = get_object_or_404(Category, slug=self.kwargs['slug'])
@@ -105,37 +108,20 @@ class CategoryView(ViewCountMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMix
     def get_object(self):
         return self.category
 
-    def get_schema(self):
+    def get_schema(self, page_obj):
         schema = {
             **self.get_base_schema(),
             "@type": "CollectionPage",
             "name": str(_('Posts in %(category_name)s') % {'category_name': self.category.name}),  # Convert __proxy__ to string
             "description": self.category.meta_description,
-            "mainEntity": {
-                "@type": "ItemList",
-                "itemListElement": [
-                    {
-                        "@type": "BlogPosting",
-                        "position": idx + 1,
-                        "url": self.request.build_absolute_uri(post.get_absolute_url()),
-                        "headline": post.title,
-                        "datePublished": post.created_at.isoformat(),
-                        "author": {
-                            "@type": "Person",
-                            "name": post.author.get_full_name() or post.author.username
-                        }
-                    }
-                    for idx, post in enumerate(self.get_queryset())  # Use get_queryset instead
-                ]
-            }
         }
-        return schema
+        return jsonld.dumps(schema, mainEntity=self.get_post_list_schema(page_obj))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['category'] = self.category 
         context['paginate_base_url'] = reverse('category_posts', kwargs={'slug': self.category.slug})
-        context['schema'] = json.dumps(self.get_schema())
+        context['schema'] = self.get_schema(context['page_obj'])
         context['schema_breadcrumbs'] = json.dumps(self.get_schema_breadcrumbs())
         return context
 
@@ -0,0 +1,78 @@
+import os
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseBadRequest
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.views import View
+from PIL import UnidentifiedImageError
+from ..models import SiteSettings
+from ..models.featured_image import IMAGE_FORMATS, ImageTooLarge, file_hash, format_available, render_resized
+
+class ResizedImageView(View):
+    """
+    Serves a media file resized to `?w=` and encoded as `?fmt=`, rendering it
+    on first request into IMAGE_CACHE_DIR.
+
+    Widths are limited to SiteSettings.image_sizes so the cache cannot be
+    filled with arbitrary sizes. Rendered files are keyed by the source
+    content hash and the encoding quality, so replacing a source or
+    changing the quality settings never serves a stale rendering. The URL
+    stays the same, so responses are cached for RESIZED_IMAGE_MAX_AGE
+    seconds and then revalidated against the ETag.
+    """
+    http_method_names = ['get', 'head']
+    formats = ('webp', 'avif')
+
+    def get(self, request, path):
+        try:
+            width = int(request.GET.get('w', ''))
+        except ValueError:
+            return HttpResponseBadRequest('Missing or invalid width')
+        extension = request.GET.get('fmt', 'webp')
+
+        site_settings = SiteSettings.for_request(request)
+        if width not in site_settings.image_sizes:
+            return HttpResponseBadRequest('Width not allowed')
+        if extension not in self.formats or not format_available(extension):
+            return HttpResponseBadRequest('Format not supported')
+
+        try:
+            source_path = safe_join(settings.MEDIA_ROOT, path)
+        except SuspiciousFileOperation:
+            raise Http404
+        if not os.path.isfile(source_path):
+            raise Http404
+
+        quality = site_settings.get_image_quality(extension)
+        source_hash = self.get_source_hash(source_path)
+        target_path = os.path.join(
+            settings.IMAGE_CACHE_DIR, source_hash[:2], f'{source_hash}-{width}-q{quality}.{extension}'
+        )
+        etag = quote_etag(f'{source_hash[:16]}-{width}-q{quality}-{extension}')
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            if not os.path.exists(target_path):
+                try:
+                    render_resized(source_path, target_path, width, extension, quality)
+                except ImageTooLarge:
+                    return HttpResponseBadRequest('Image too large')
+                except (UnidentifiedImageError, OSError):
+                    # Not an image, or one Pillow cannot decode
+                    raise Http404
+            response = FileResponse(open(target_path, 'rb'), content_type=IMAGE_FORMATS[extension][1])
+        response.headers['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'RESIZED_IMAGE_MAX_AGE', 60 * 60))
+        return response
+
+    def get_source_hash(self, source_path):
+        """Content hash of the source, computed once per file version."""
+        stat = os.stat(source_path)
+        key = f'resized_image_source:{source_path}:{stat.st_mtime_ns}:{stat.st_size}'
+        source_hash = cache.get(key)
+        if source_hash is None:
+            source_hash = file_hash(source_path)
+            cache.set(key, source_hash, None)
+        return source_hash
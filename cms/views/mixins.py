@@ -1,15 +1,102 @@
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page, cache_control
-from django.db.models import F
-from django.db.transaction import atomic
+from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import gettext as _
 from datetime import datetime
 from ..models import SiteSettings
+from .. import jsonld, page_cache
+from ..pagination import KeysetPaginator
+from ..view_counts import get_view_counter
 
-class BaseMixin:
-    @method_decorator(cache_page(60 * 15))  # 15-minute cache
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+class PageCacheMixin:
+    """
+    Mixin to cache the rendered page under a key built from content versions.
+
+    Views list the content they depend on in get_cache_scopes(); saving that
+    content bumps the matching versions (see cms.signals), so cached pages
+    never outlive an edit. Hits on cached pages are still counted.
+    """
+    cache_scopes = [page_cache.GLOBAL]
+
+    def get_cache_scopes(self):
+        return self.cache_scopes
+
+    def get_page_cache_key(self):
+        if not hasattr(self, '_page_cache_key'):
+            self._page_cache_key = page_cache.get_page_cache_key(self.request, self.get_cache_scopes())
+        return self._page_cache_key
+
+    def can_cache_page(self, request):
+        # Staff see edit links and logged-in users may see personalised content
+        return request.method in ('GET', 'HEAD') and not request.user.is_authenticated
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.can_cache_page(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        cache_key = self.get_page_cache_key()
+        cached = cache.get(cache_key)
+        if cached is not None:
+            response, view_count_key = cached
+            if view_count_key:
+                get_view_counter().increment_key(view_count_key)
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and not response.cookies:
+            obj = getattr(self, '_object', None)
+            view_count_key = get_view_counter().make_key(obj) if obj is not None else None
+            store = lambda r: cache.set(cache_key, (r, view_count_key), page_cache.get_page_cache_timeout())
+            if hasattr(response, 'render') and callable(response.render):
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+        return response
+
+class KeysetPaginationMixin:
+    """
+    Mixin for post listings to paginate with KeysetPaginator, unless
+    KEYSET_PAGINATION is turned off. Uses the view's page cache scopes.
+    """
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        if not getattr(settings, 'KEYSET_PAGINATION', True):
+            return super().get_paginator(queryset, per_page, orphans, allow_empty_first_page, **kwargs)
+        return KeysetPaginator(
+            queryset, per_page, orphans, allow_empty_first_page, cache_scopes=self.get_cache_scopes(), **kwargs
+        )
+
+class ConditionalGetMixin:
+    """
+    Mixin to answer conditional GETs with 304 before the page is rendered.
+
+    The ETag comes from the content versions in get_cache_scopes() (see
+    PageCacheMixin) and Last-Modified from get_last_modified(), which views
+    override to return the newest `updated_at` of the content they show.
+    """
+
+    def compute_last_modified(self):
+        """Override to return the newest `updated_at` timestamp of the page content"""
+        return 0
+
+    def get_last_modified(self):
+        return page_cache.get_last_modified(
+            self.request.build_absolute_uri(), self.get_cache_scopes(), self.compute_last_modified
+        )
+
+    def get_etag(self):
+        return page_cache.get_etag(
+            self.request.build_absolute_uri(), self.get_cache_scopes(), int(self.request.user.is_authenticated)
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        return page_cache.conditional_response(
+            request,
+            etag=self.get_etag(),
+            last_modified=self.get_last_modified(),
+            get_response=lambda: super(ConditionalGetMixin, self).dispatch(request, *args, **kwargs),
+        )
 
 class ViewCountMixin:
     """Mixin to handle view count incrementing for models"""
@@ -17,14 +104,10 @@ class ViewCountMixin:
     def get_object(self, queryset=None):
         if not hasattr(self, '_object'):
             self._object = super().get_object(queryset)
-            with atomic():
-                try:
-                    self._object.view_count = F('view_count') + 1
-                    self._object.save(update_fields=['view_count'])
-                except Exception as e:
-                    print(f"Failed to increment view count: {e}")
-                    raise
-                self._object.refresh_from_db()
+            view_counter = get_view_counter()
+            view_counter.increment(self._object)
+            # Show hits that are still buffered and not yet written to the database
+            self._object.view_count += view_counter.pending(self._object)
         return self._object
 
     def get_context_data(self, **kwargs):
@@ -32,7 +115,13 @@ class ViewCountMixin:
         context['object'] = self.get_object()  # Single call to get_object
         return context
 
-class SEOMetadataMixin:
+class SiteSettingsMixin:
+    """Mixin to give views access to the per-request site settings"""
+
+    def get_site_settings(self):
+        return SiteSettings.for_request(self.request)
+
+class SEOMetadataMixin(SiteSettingsMixin):
     """Mixin to handle SEO metadata"""
     
     def get_meta_title(self):
@@ -80,14 +169,14 @@ class BreadcrumbsMixin:
         context['schema_breadcrumbs'] = self.get_schema_breadcrumbs()
         return context
  
-class SchemaMixin:
+class SchemaMixin(SiteSettingsMixin):
     """Mixin to provide base schema generation for different view types"""
     
     def get_base_schema(self):
-        site_settings = SiteSettings.objects.first()
         """
         Provide a base schema with common properties for all pages
         """
+        site_settings = self.get_site_settings()
         return {
             "@context": "https://schema.org",
             "mainEntityOfPage": {
@@ -104,4 +193,28 @@ class SchemaMixin:
             },
             "url": self.request.build_absolute_uri(),
             "datePublished": datetime.now().isoformat()
-        } 
\ No newline at end of file
+        }
+
+    def get_post_item_schema(self, post):
+        """Schema of a post as an entry of a listing"""
+        return {
+            "@type": "BlogPosting",
+            "headline": post.title,
+            "url": self.request.build_absolute_uri(post.get_absolute_url()),
+            "datePublished": post.created_at.isoformat(),
+            "dateModified": post.updated_at.isoformat(),
+            "author": {
+                "@type": "Person",
+                "name": post.author.get_full_name() or post.author.username
+            }
+        }
+
+    def get_post_list_schema(self, page_obj):
+        """
+        ItemList of the posts on the current page only, assembled from cached
+        per-post fragments (see cms.jsonld).
+        """
+        fragments = jsonld.get_fragments(
+            self.request, 'post_item', list(page_obj.object_list), self.get_post_item_schema
+        )
+        return jsonld.item_list(fragments, start=page_obj.start_index(), total=page_obj.paginator.count)
@@ -1,22 +1,24 @@
 import json
 from django.views.generic import TemplateView
 from cms.models import Post, Category
-from django.db.models import Count, Q
-from cms.views.mixins import SEOMetadataMixin, SchemaMixin
-from ...models import SiteSettings
+from cms import page_cache
+from cms.views.mixins import ConditionalGetMixin, PageCacheMixin, SEOMetadataMixin, SchemaMixin
 
-class HomeView(SEOMetadataMixin, SchemaMixin, TemplateView):
+class HomeView(ConditionalGetMixin, PageCacheMixin, SEOMetadataMixin, SchemaMixin, TemplateView):
     #model = Post
     template_name = 'site/home.html' 
     #context_object_name = 'posts'
 
+    def compute_last_modified(self):
+        return page_cache.latest_update(Post.objects.all(), Category.objects.all())
+
     def get_featured_posts(self):
         return Post.objects.active().filter(
             is_featured=True
         ).select_related('author', 'category').prefetch_related('tags')[:5]
 
     def get_schema(self):
-        site_settings = SiteSettings.objects.first()
+        site_settings = self.get_site_settings()
         schema = {
             **self.get_base_schema(),
             "@type": "WebPage",
@@ -51,12 +53,7 @@ class HomeView(SEOMetadataMixin, SchemaMixin, TemplateView):
             'author', 'category'
         ).prefetch_related('tags').order_by('-view_count')[:6]
         
-        categories = Category.objects.annotate(
-            post_count=Count(
-                'posts', 
-                filter=Q(posts__in=Post.objects.active())  # Use the active() method to filter published posts
-            )
-        ).order_by('-post_count')[:6]
+        categories = Category.objects.order_by('-published_post_count', 'name')[:6]
         
         context.update({
             'featured_posts': featured_posts,
@@ -71,9 +68,9 @@ class HomeView(SEOMetadataMixin, SchemaMixin, TemplateView):
         return context
 
     def get_meta_title(self):
-        site_settings = SiteSettings.objects.first()        
+        site_settings = self.get_site_settings()
         return str(site_settings.site_tagline)
     
     def get_meta_description(self):
-        site_settings = SiteSettings.objects.first()        
+        site_settings = self.get_site_settings()
         return str(site_settings.site_description)
\ No newline at end of file
@@ -1,29 +1,41 @@
 import json
 from cms.models import Page
-from cms.views.mixins import SEOMetadataMixin, SchemaMixin, BreadcrumbsMixin, ViewCountMixin
+from cms import jsonld, page_cache
+from cms.views.mixins import ConditionalGetMixin, PageCacheMixin, SEOMetadataMixin, SchemaMixin, BreadcrumbsMixin, ViewCountMixin
 from django.views.generic import DetailView
 
-class PageView(ViewCountMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, DetailView):
+class PageView(ConditionalGetMixin, PageCacheMixin, ViewCountMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, DetailView):
     model = Page 
     template_name = 'site/page.html'
     context_object_name = 'page'
 
+    def get_cache_scopes(self):
+        return [('page', self.kwargs['slug'])]
+
+    def compute_last_modified(self):
+        return page_cache.latest_update(Page.objects.filter(slug=self.kwargs['slug']))
+
     def get_schema(self):
         page = self.get_object()
+        fragment = jsonld.get_fragment(self.request, 'page', page, self.get_page_schema)
         schema = {
             **self.get_base_schema(),
+            "mainEntityOfPage": self.request.build_absolute_uri(),
+        }
+        return jsonld.merge(schema, fragment)
+
+    def get_page_schema(self, page):
+        return {
             "@type": "WebPage",
             "name": page.title,
             "description": page.meta_description,
-            "mainEntityOfPage": self.request.build_absolute_uri(),
             "text": page.content
         }
-        return schema
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context.update({
-            'schema': json.dumps(self.get_schema()),
+            'schema': self.get_schema(),
             'schema_breadcrumbs': json.dumps(self.get_schema_breadcrumbs()),
             'meta_title': self.get_meta_title(),
             'meta_description': self.get_meta_description()
@@ -1,18 +1,21 @@
 from django.urls import reverse
 from django.views.generic import ListView, DetailView
 from django.utils.translation import gettext as _
-from ..models import Post
-from ..models import SiteSettings
-from ..views.mixins import SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, ViewCountMixin
+from ..models import Category, Post, PostNavigation, Tag
+from .. import jsonld, page_cache
+from ..views.mixins import ConditionalGetMixin, KeysetPaginationMixin, PageCacheMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, ViewCountMixin
 import json
 
-class PostListView(SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, ListView):
+class PostListView(ConditionalGetMixin, PageCacheMixin, KeysetPaginationMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, ListView):
     model = Post
     template_name = 'blog/post_list.html'
     context_object_name = 'posts'
     paginate_by = 6
     page_kwarg = 'page'
     
+    def compute_last_modified(self):
+        return page_cache.latest_update(Post.objects.all(), Category.objects.all())
+
     def get_queryset(self):
         return (
             self.model.objects.active()  # Use the active() method from PostManager
@@ -27,43 +30,31 @@ class PostListView(SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, ListView):
         
         context.update({
             'paginate_base_url': paginate_base_url,
-            'schema': json.dumps(self.get_schema()),
+            'schema': self.get_schema(context['page_obj']),
             'schema_breadcrumbs': json.dumps(self.get_schema_breadcrumbs())
         })
         
         return context
     
-    def get_schema(self):
-        site_settings = SiteSettings.get_settings()
-        posts = self.get_queryset()[:5]  # Evaluate queryset once
+    def get_schema(self, page_obj):
+        site_settings = self.get_site_settings()
+        posts = jsonld.get_fragments(
+            self.request, 'post_item', list(page_obj.object_list), self.get_post_item_schema
+        )
         schema = {
             **self.get_base_schema(),
             "@type": "Blog",
             "name": site_settings.blog_title,
             "description": site_settings.blog_description,
-            "blogPost": [
-                {
-                    "@type": "BlogPosting",
-                    "headline": post.title,
-                    "url": self.request.build_absolute_uri(post.get_absolute_url()),
-                    "datePublished": post.created_at.isoformat(),
-                    "dateModified": post.updated_at.isoformat(),
-                    "author": {
-                        "@type": "Person",
-                        "name": post.author.get_full_name() or post.author.username
-                    }
-                }
-                for post in posts
-            ]
         }
-        return schema
+        return jsonld.dumps(schema, blogPost=f"[{', '.join(posts)}]")
 
     def get_meta_title(self):
-        site_settings = SiteSettings.get_settings()
+        site_settings = self.get_site_settings()
         return str(site_settings.blog_title)
 
     def get_meta_description(self):
-        site_settings = SiteSettings.get_settings()
+        site_settings = self.get_site_settings()
         return str(site_settings.blog_description) 
 
     def get_breadcrumbs(self):
@@ -71,51 +62,44 @@ class PostListView(SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, ListView):
         breadcrumbs.append({'name': str(_('Posts')), 'url': reverse('post_list')})
         return breadcrumbs
 
-class PostDetailView(ViewCountMixin, SEOMetadataMixin, SchemaMixin, BreadcrumbsMixin, DetailView):
+class PostDetailView(ConditionalGetMixin, PageCacheMixin, ViewCountMixin, SEOMetadataMixin, SchemaMixin, BreadcrumbsMixin, DetailView):
     model = Post
     template_name = 'blog/post_detail.html'
     context_object_name = 'post'
     
+    def get_cache_scopes(self):
+        # Related posts and previous/next links depend on the other posts too
+        return [('post', self.kwargs['slug']), page_cache.GLOBAL]
+
+    def compute_last_modified(self):
+        return page_cache.latest_update(Post.objects.all(), Category.objects.all(), Tag.objects.all())
+
     def get_queryset(self):
         return Post.objects.active(
         ).select_related(
-            'author', 'category'
+            'author', 'category', 'navigation'
         ).prefetch_related('tags')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         post = self.get_object()
-        context['schema'] = json.dumps(self.get_schema())
+        context['schema'] = self.get_schema()
         context['schema_breadcrumbs'] = json.dumps(self.get_schema_breadcrumbs())
-                
-        # Get related posts from same category
-        context['related_posts'] = Post.objects.active().filter(
-            category=post.category
-        ).exclude(
-            id=post.id
-        ).order_by('-created_at')[:3]
-        
-        # Add previous/next post navigation
-        context['previous_post'] = (
-            Post.objects.active()  # Use the active() method to filter published posts
-            .filter(created_at__lt=post.created_at)  # Filter posts created before the current post
-            .order_by('-created_at')  # Order by creation date (newest first)
-            .first()  # Get the first post in the filtered queryset
-        )
 
-        context['next_post'] = (
-            Post.objects.active()  # Use the active() method to filter published posts
-            .filter(created_at__gt=post.created_at)  # Filter posts created after the current post
-            .order_by('created_at')  # Order by creation date (oldest first)
-            .first()  # Get the first post in the filtered queryset
-        )
-            
+        # Related posts and previous/next links are precomputed on save
+        context.update(PostNavigation.objects.for_post(post).resolve())
+
         return context        
      
     def get_schema(self):
         post = self.get_object()
+        # Tag and category names are part of the post fragment
+        related = [post.category, *post.tags.all()]
+        fragment = jsonld.get_fragment(self.request, 'post', post, self.get_post_schema, related)
+        return jsonld.merge(self.get_base_schema(), fragment)
+
+    def get_post_schema(self, post):
         schema = {
-            **self.get_base_schema(),
             "@type": "BlogPosting",
             "headline": post.title,
             "description": post.meta_description or post.excerpt,
@@ -125,17 +109,19 @@ class PostDetailView(ViewCountMixin, SEOMetadataMixin, SchemaMixin, BreadcrumbsM
             },
             "datePublished": post.created_at.isoformat(),
             "dateModified": post.updated_at.isoformat(),
-            "articleBody": post.content,
+            "articleBody": post.plain_text,
+            "wordCount": post.word_count,
             "keywords": [tag.name for tag in post.tags.all()],
             "articleSection": post.category.name
         }
         
-        if post.featured_image:
+        variant = post.get_largest_image_variant() if post.featured_image else None
+        if variant:
             schema["image"] = {
                 "@type": "ImageObject",
-                "url": self.request.build_absolute_uri(post.featured_image.url),
-                "width": "1200",
-                "height": "630"
+                "url": self.request.build_absolute_uri(variant['url']),
+                "width": str(variant.get('width', 1200)),
+                "height": str(variant.get('height', 630))
             }
             
         return schema
@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.html import escape
+from django.views import View
+from .. import page_cache
+from ..sitemaps import partition_scope, section_scope, sitemaps
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+CONTENT_TYPE = 'application/xml'
+
+def w3c_date(value):
+    return value.date().isoformat() if value else None
+
+class SitemapIndexView(View):
+    """Lists every non-empty sitemap partition with its lastmod."""
+    http_method_names = ['get', 'head']
+
+    def get(self, request):
+        scopes = [section_scope(name) for name in sitemaps]
+        key = f"sitemap_index:{page_cache.versioned_key(request.build_absolute_uri(), scopes)}"
+        content = cache.get(key)
+        if content is None:
+            content = self.render(request)
+            cache.set(key, content, page_cache.get_page_cache_timeout())
+        return page_cache.conditional_response(
+            request,
+            etag=page_cache.get_etag(request.build_absolute_uri(), scopes),
+            last_modified=None,
+            get_response=lambda: HttpResponse(content, content_type=CONTENT_TYPE),
+        )
+
+    def render(self, request):
+        parts = [XML_HEADER, f'<sitemapindex xmlns="{SITEMAP_NS}">\n']
+        for name, sitemap in sitemaps.items():
+            for number, lastmod in sorted(sitemap.get_partitions().items()):
+                location = request.build_absolute_uri(reverse('sitemap_section', args=[name, number]))
+                parts.append(f'<sitemap><loc>{escape(location)}</loc>')
+                if lastmod:
+                    parts.append(f'<lastmod>{w3c_date(lastmod)}</lastmod>')
+                parts.append('</sitemap>\n')
+        parts.append('</sitemapindex>\n')
+        return ''.join(parts).encode('utf-8')
+
+class SitemapSectionView(View):
+    """
+    Streams one sitemap partition. The rendered bytes are cached once the
+    stream completes, until a row in the partition changes.
+    """
+    http_method_names = ['get', 'head']
+
+    def get(self, request, section, number):
+        sitemap = sitemaps.get(section)
+        if sitemap is None or number < 1:
+            raise Http404
+
+        url = request.build_absolute_uri()
+        scopes = [partition_scope(section, number)]
+        key = f"sitemap_section:{page_cache.versioned_key(url, scopes)}"
+        return page_cache.conditional_response(
+            request,
+            etag=page_cache.get_etag(url, scopes),
+            last_modified=page_cache.get_last_modified(url, scopes, lambda: sitemap.get_last_modified(number)),
+            get_response=lambda: self.get_response(request, sitemap, number, key),
+        )
+
+    def get_response(self, request, sitemap, number, key):
+        content = cache.get(key)
+        if content is not None:
+            return HttpResponse(content, content_type=CONTENT_TYPE)
+        if not sitemap.has_partition(number):
+            raise Http404
+        return StreamingHttpResponse(self.stream(request, sitemap, number, key), content_type=CONTENT_TYPE)
+
+    def stream(self, request, sitemap, number, key):
+        origin = request.build_absolute_uri('/')[:-1]
+        details = f'<changefreq>{sitemap.changefreq}</changefreq><priority>{sitemap.priority}</priority>'
+        chunks = []
+
+        def emit(text):
+            chunk = text.encode('utf-8')
+            chunks.append(chunk)
+            return chunk
+
+        yield emit(f'{XML_HEADER}<urlset xmlns="{SITEMAP_NS}">\n')
+        batch = []
+        for path, lastmod in sitemap.get_items(number):
+            batch.append(f'<url><loc>{escape(origin + path)}</loc>')
+            if lastmod:
+                batch.append(f'<lastmod>{w3c_date(lastmod)}</lastmod>')
+            batch.append(f'{details}</url>\n')
+            if len(batch) >= 1000:
+                yield emit(''.join(batch))
+                batch = []
+        yield emit(''.join(batch) + '</urlset>\n')
+        cache.set(key, b''.join(chunks), page_cache.get_page_cache_timeout())
@@ -1,16 +1,27 @@
 from django.views.generic import ListView
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
-from ..models import Post, Tag
-from ..views.mixins import SEOMetadataMixin, SchemaMixin, BreadcrumbsMixin, ViewCountMixin
+from ..models import Category, Post, Tag
+from .. import jsonld, page_cache
+from ..views.mixins import ConditionalGetMixin, KeysetPaginationMixin, PageCacheMixin, SEOMetadataMixin, SchemaMixin, BreadcrumbsMixin, ViewCountMixin
 import json
 
-class TagView(ViewCountMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, ListView):
+class TagView(ConditionalGetMixin, PageCacheMixin, KeysetPaginationMixin, ViewCountMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, ListView):
     template_name = 'blog/tag_posts.html'
     context_object_name = 'posts'
     paginate_by = 6
     page_kwarg = 'page'
     
+    def get_cache_scopes(self):
+        # Post cards show category and other tag names, which bump the global version
+        return [('tag', self.kwargs['slug']), page_cache.GLOBAL]
+
+    def compute_last_modified(self):
+        slug = self.kwargs['slug']
+        return page_cache.latest_update(
+            Tag.objects.all(), Post.objects.filter(tags__slug=slug), Category.objects.all()
+        )
+
     def get_queryset(self):
         self.tag = get_object_or_404(Tag, slug=self.kwargs['slug'])
         return Post.objects.active().filter(
@@ -24,37 +35,20 @@ class TagView(ViewCountMixin, SEOMetadataMixin, BreadcrumbsMixin, SchemaMixin, L
     def get_object(self):
         return self.tag
 
-    def get_schema(self):
+    def get_schema(self, page_obj):
         schema = {
             **self.get_base_schema(),
             "@type": "CollectionPage",
             "name": str(_('Posts tagged with %(tag_name)s') % {'tag_name': self.tag.name}),  # Convert __proxy__ to string
             "description": self.tag.meta_description,
-            "mainEntity": {
-                "@type": "ItemList",
-                "itemListElement": [
-                    {
-                        "@type": "BlogPosting",
-                        "position": idx + 1,
-                        "url": self.request.build_absolute_uri(post.get_absolute_url()),
-                        "headline": post.title,
-                        "datePublished": post.created_at.isoformat(),
-                        "author": {
-                            "@type": "Person",
-                            "name": post.author.get_full_name() or post.author.username
-                        }
-                    }
-                    for idx, post in enumerate(self.get_queryset())  # Use get_queryset instead
-                ]
-            }
         }
-        return schema
-    
+        return jsonld.dumps(schema, mainEntity=self.get_post_list_schema(page_obj))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['tag'] = self.tag 
         context['pagination_base_url'] = f"tag/{self.tag.slug}"  # Base URL for pagination
-        context['schema'] = json.dumps(self.get_schema())
+        context['schema'] = self.get_schema(context['page_obj'])
         context['schema_breadcrumbs'] = json.dumps(self.get_schema_breadcrumbs())
         return context    
 
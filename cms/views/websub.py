@@ -0,0 +1,39 @@
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from .. import websub
+
+@method_decorator(csrf_exempt, name='dispatch')
+class WebSubHubView(View):
+    """
+    Built-in WebSub hub for the site's feeds. Valid subscription requests
+    are accepted with 202 and verified against the callback afterwards, see
+    cms.websub.
+    """
+    http_method_names = ['post']
+
+    def post(self, request):
+        mode = request.POST.get('hub.mode')
+        topic = request.POST.get('hub.topic', '')
+        callback = request.POST.get('hub.callback', '')
+        secret = request.POST.get('hub.secret', '')
+
+        if mode not in ('subscribe', 'unsubscribe'):
+            return HttpResponseBadRequest('Unsupported hub.mode')
+        # Names are resolved and checked again before the callback is requested
+        if not websub.is_allowed_callback(callback, resolve=False):
+            return HttpResponseBadRequest('Invalid hub.callback')
+        if websub.resolve_topic(topic) is None:
+            return HttpResponseBadRequest('Unknown hub.topic')
+        if len(secret.encode('utf-8')) >= 200:
+            return HttpResponseBadRequest('hub.secret must be shorter than 200 bytes')
+        try:
+            lease_seconds = int(request.POST.get('hub.lease_seconds') or 0) or None
+        except ValueError:
+            return HttpResponseBadRequest('Invalid hub.lease_seconds')
+        if lease_seconds is not None and lease_seconds < 0:
+            return HttpResponseBadRequest('Invalid hub.lease_seconds')
+
+        websub.request_subscription(mode, topic, callback, lease_seconds, secret)
+        return HttpResponse(status=202)
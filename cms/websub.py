@@ -0,0 +1,274 @@
+"""
+WebSub hub for the feeds.
+
+Feeds advertise a hub (WEBSUB_HUB_URL, or the built-in endpoint in
+cms.views.websub) and their own URL as the topic. The hub answers 202 and
+verifies a subscriber's intent against its callback on the delivery pool
+before storing the subscription. Callbacks must resolve to public
+addresses (unless WEBSUB_ALLOW_PRIVATE_CALLBACKS is set) and redirects are
+not followed, so the hub cannot be used to reach internal services.
+
+When posts are published, every subscribed feed showing them is rendered
+with only those posts and pushed to its subscribers. Deliveries run on a
+bounded thread pool (WEBSUB_WORKERS) and failed ones are retried with
+exponential backoff, so publishing never waits for subscribers.
+"""
+import hashlib
+import hmac
+import ipaddress
+import logging
+import secrets
+import socket
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.error import HTTPError, URLError
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
+from django.http import HttpRequest
+from django.http.request import split_domain_port, validate_host
+from django.urls import Resolver404, resolve, reverse
+from django.utils import timezone
+from .models import WebSubSubscription
+
+logger = logging.getLogger(__name__)
+
+FEED_URL_NAMES = {'rss_feed', 'atom_feed', 'category_rss_feed', 'category_atom_feed'}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'WEBSUB_WORKERS', 4), thread_name_prefix='websub'
+            )
+    return _pool
+
+
+class NoRedirectHandler(HTTPRedirectHandler):
+    """Callbacks are requested as given, a 3xx is answered as an HTTPError."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+opener = build_opener(NoRedirectHandler)
+
+
+def is_public_address(address):
+    return ipaddress.ip_address(address.split('%')[0]).is_global
+
+
+def is_allowed_callback(url, resolve=True):
+    """
+    Whether `url` is an http(s) URL of a public host. Without `resolve`
+    only IP literals and localhost are checked, so no DNS lookup is made.
+    """
+    parts = urlsplit(url or '')
+    try:
+        host, port = parts.hostname, parts.port
+    except ValueError:
+        return False
+    if parts.scheme not in ('http', 'https') or not host:
+        return False
+    if getattr(settings, 'WEBSUB_ALLOW_PRIVATE_CALLBACKS', False):
+        return True
+    if host == 'localhost' or host.endswith('.localhost'):
+        return False
+    try:
+        return is_public_address(host)
+    except ValueError:
+        # A name, not an IP literal
+        pass
+    if not resolve:
+        return True
+    try:
+        addresses = socket.getaddrinfo(host, port or (443 if parts.scheme == 'https' else 80), proto=socket.IPPROTO_TCP)
+    except (OSError, UnicodeError):
+        return False
+    return bool(addresses) and all(is_public_address(info[4][0]) for info in addresses)
+
+
+def get_hub_url(request):
+    return getattr(settings, 'WEBSUB_HUB_URL', '') or request.build_absolute_uri(reverse('websub_hub'))
+
+
+def resolve_topic(topic):
+    """The URL match of `topic` if it is a feed of this site, otherwise None."""
+    parts = urlsplit(topic or '')
+    if parts.scheme not in ('http', 'https') or parts.query or parts.fragment:
+        return None
+    host, _ = split_domain_port(parts.netloc)
+    if not host or not validate_host(host, settings.ALLOWED_HOSTS):
+        return None
+    try:
+        match = resolve(parts.path)
+    except Resolver404:
+        return None
+    return match if match.url_name in FEED_URL_NAMES else None
+
+
+class TopicRequest(HttpRequest):
+    """A GET request for a topic URL, to render feeds outside of a request."""
+
+    def __init__(self, url):
+        super().__init__()
+        parts = urlsplit(url)
+        self.method = 'GET'
+        self.path = self.path_info = parts.path
+        self.META.update({
+            'HTTP_HOST': parts.netloc,
+            'SERVER_NAME': parts.hostname,
+            'SERVER_PORT': str(parts.port or (443 if parts.scheme == 'https' else 80)),
+        })
+        self._scheme = parts.scheme
+
+    def _get_scheme(self):
+        return self._scheme
+
+
+def verify_intent(mode, topic, callback, lease_seconds=None):
+    """Asks the callback to echo a challenge, as WebSub requires before (un)subscribing."""
+    if not is_allowed_callback(callback):
+        logger.info(f"WebSub callback {callback} is not a public address")
+        return False
+    challenge = secrets.token_urlsafe(24)
+    params = {'hub.mode': mode, 'hub.topic': topic, 'hub.challenge': challenge}
+    if lease_seconds:
+        params['hub.lease_seconds'] = lease_seconds
+    parts = urlsplit(callback)
+    url = urlunsplit(parts._replace(query=urlencode([*parse_qsl(parts.query), *params.items()])))
+    try:
+        with opener.open(url, timeout=getattr(settings, 'WEBSUB_TIMEOUT', 10)) as response:
+            return response.read().decode('utf-8', 'replace').strip() == challenge
+    except (HTTPError, URLError, OSError, ValueError) as e:
+        logger.info(f"WebSub verification of {callback} failed: {e}")
+        return False
+
+
+def subscribe(mode, topic, callback, lease_seconds=None, secret=''):
+    """
+    Verifies and stores (or removes) a subscription. Leases are capped at
+    WEBSUB_LEASE_SECONDS. Returns whether the callback confirmed it.
+    """
+    max_lease = getattr(settings, 'WEBSUB_LEASE_SECONDS', 10 * 24 * 60 * 60)
+    lease_seconds = min(lease_seconds or max_lease, max_lease) if mode == 'subscribe' else None
+    if not verify_intent(mode, topic, callback, lease_seconds):
+        return False
+    if mode == 'subscribe':
+        WebSubSubscription.objects.update_or_create(
+            topic=topic, callback=callback,
+            defaults={'secret': secret, 'lease_expires_at': timezone.now() + timedelta(seconds=lease_seconds)},
+        )
+    else:
+        WebSubSubscription.objects.filter(topic=topic, callback=callback).delete()
+    return True
+
+
+def request_subscription(mode, topic, callback, lease_seconds=None, secret=''):
+    """
+    Verifies and stores a subscription on the delivery pool, the hub answers
+    the request with 202 right away. With WEBSUB_VERIFY_ASYNC=False it runs
+    in the calling thread.
+    """
+    if not getattr(settings, 'WEBSUB_VERIFY_ASYNC', True):
+        return subscribe(mode, topic, callback, lease_seconds, secret)
+    return get_pool().submit(verify_subscription, mode, topic, callback, lease_seconds, secret)
+
+
+def verify_subscription(*args):
+    try:
+        return subscribe(*args)
+    finally:
+        connection.close()
+
+
+def render_delta(topic, post_ids):
+    """
+    The feed of `topic` with only the posts `post_ids`, as
+    `(content type, bytes)`, or None if it shows none of them.
+    """
+    match = resolve_topic(topic)
+    if match is None:
+        return None
+    # A fresh instance, the URLconf one is shared by requests
+    feed = type(match.func)()
+    feed.delta_ids = post_ids
+    request = TopicRequest(topic)
+    try:
+        obj = feed.get_object(request, *match.args, **match.kwargs)
+    except ObjectDoesNotExist:
+        return None
+    feedgen = feed.get_feed(obj, request)
+    if not feedgen.items:
+        return None
+    return feedgen.content_type, feedgen.writeString('utf-8').encode('utf-8')
+
+
+def publish(post_ids):
+    """
+    Pushes the newly published `post_ids` to the subscribers of every feed
+    showing them. Returns the delivery futures.
+    """
+    subscriptions = defaultdict(list)
+    for subscription in WebSubSubscription.objects.active():
+        subscriptions[subscription.topic].append(subscription)
+
+    futures = []
+    for topic, subscribers in subscriptions.items():
+        delta = render_delta(topic, post_ids)
+        if delta is None:
+            continue
+        content_type, body = delta
+        hub = get_hub_url(TopicRequest(topic))
+        for subscription in subscribers:
+            futures.append(get_pool().submit(
+                deliver, subscription.pk, subscription.callback, subscription.secret,
+                topic, hub, content_type, body,
+            ))
+    return futures
+
+
+def deliver(subscription_id, callback, secret, topic, hub, content_type, body):
+    """
+    POSTs a feed delta to one subscriber, retrying failures with backoff.
+    Runs on the delivery pool. Returns whether the subscriber accepted it.
+    """
+    if not is_allowed_callback(callback):
+        logger.warning(f"WebSub delivery to {callback} skipped, it does not resolve to a public address")
+        return False
+    headers = {'Content-Type': content_type, 'Link': f'<{hub}>; rel="hub", <{topic}>; rel="self"'}
+    if secret:
+        signature = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        headers['X-Hub-Signature'] = f'sha256={signature}'
+
+    attempts = getattr(settings, 'WEBSUB_MAX_ATTEMPTS', 3)
+    delay = getattr(settings, 'WEBSUB_RETRY_DELAY', 5)
+    for attempt in range(1, attempts + 1):
+        try:
+            request = Request(callback, data=body, headers=headers, method='POST')
+            with opener.open(request, timeout=getattr(settings, 'WEBSUB_TIMEOUT', 10)):
+                return True
+        except HTTPError as e:
+            if e.code == 410:
+                # The subscriber is gone for good
+                WebSubSubscription.objects.filter(pk=subscription_id).delete()
+                connection.close()
+                return False
+            error = e
+        except (URLError, OSError) as e:
+            error = e
+        logger.warning(f"WebSub delivery to {callback} failed (attempt {attempt}/{attempts}): {error}")
+        if attempt < attempts:
+            time.sleep(delay * 2 ** (attempt - 1))
+    return False
@@ -41,6 +41,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'cms.middleware.SiteSettingsMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django_browser_reload.middleware.BrowserReloadMiddleware',
@@ -177,4 +178,89 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='webmaster@localhost')
-DEFAULT_CONTACT_EMAIL = config('DEFAULT_CONTACT_EMAIL', default='webmaster@localhost')
\ No newline at end of file
+DEFAULT_CONTACT_EMAIL = config('DEFAULT_CONTACT_EMAIL', default='webmaster@localhost')
+
+# Cache
+# Required to be shared by every worker process: page cache versions, ETags and
+# the SiteSettings version stamp live in it, so a per-process cache (the Django
+# default LocMemCache) leaves other workers serving stale pages after an edit.
+# A file cache is shared by the workers of one host; set REDIS_URL when the site
+# runs on several hosts.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_DIR', default=str(BASE_DIR / 'cache' / 'django')),
+            'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int)},
+        }
+    }
+
+# Site Settings
+# Each process reuses its SiteSettings copy until the version stamp in the cache
+# changes, and reloads it after this many seconds regardless.
+SITE_SETTINGS_MEMO_TIMEOUT = config('SITE_SETTINGS_MEMO_TIMEOUT', default=300, cast=int)
+
+# Page Cache
+# Public pages are cached until the content they show changes (see cms.page_cache).
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)  # seconds
+
+# Pagination
+# Post listings page by (created_at, id) keys instead of OFFSET (see cms.pagination).
+KEYSET_PAGINATION = config('KEYSET_PAGINATION', default=True, cast=bool)
+
+# Sitemaps
+# Rows of id space per sitemap partition (see cms.sitemaps); at most 50000 URLs per file.
+SITEMAP_PARTITION_SIZE = config('SITEMAP_PARTITION_SIZE', default=5000, cast=int)
+# Sitemaps and feeds are also written as files for nginx (see cms.static_indexes)
+# when both are set, e.g. /var/www/project/indexes and https://example.com
+STATIC_INDEX_ROOT = config('STATIC_INDEX_ROOT', default='')
+STATIC_INDEX_BASE_URL = config('STATIC_INDEX_BASE_URL', default='')
+# Content changes are published on a background thread this many seconds after
+# the first one; STATIC_INDEX_ASYNC=False publishes in the saving process instead
+STATIC_INDEX_ASYNC = config('STATIC_INDEX_ASYNC', default=True, cast=bool)
+STATIC_INDEX_DELAY = config('STATIC_INDEX_DELAY', default=2, cast=float)
+
+# Image Jobs
+# Image variants are generated by `manage.py process_image_jobs` workers.
+# Set IMAGE_JOBS_ASYNC=False to process them in the saving process instead.
+IMAGE_JOBS_ASYNC = config('IMAGE_JOBS_ASYNC', default=True, cast=bool)
+IMAGE_JOB_TIMEOUT = config('IMAGE_JOB_TIMEOUT', default=600, cast=int)  # seconds before a job is retried
+IMAGE_JOB_MAX_ATTEMPTS = config('IMAGE_JOB_MAX_ATTEMPTS', default=3, cast=int)
+# Decode once and resize each variant from the next larger one (see `benchmark_images`)
+IMAGE_RESIZE_CASCADE = config('IMAGE_RESIZE_CASCADE', default=True, cast=bool)
+# Uploads larger than this are rejected by the image pipeline
+IMAGE_MAX_PIXELS = config('IMAGE_MAX_PIXELS', default=80_000_000, cast=int)
+# Megabytes a decoded source may take; JPEGs are decoded at reduced scale to fit
+IMAGE_MEMORY_BUDGET = config('IMAGE_MEMORY_BUDGET', default=256, cast=int)
+# Renderings served by /media-r/ (see cms.views.media)
+IMAGE_CACHE_DIR = config('IMAGE_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'images'))
+# Seconds browsers and CDNs reuse them before revalidating with the ETag
+RESIZED_IMAGE_MAX_AGE = config('RESIZED_IMAGE_MAX_AGE', default=60 * 60, cast=int)
+# Rendered responsive_image markup kept per process (see cms.templatetags.responsive_image)
+RESPONSIVE_IMAGE_CACHE_SIZE = config('RESPONSIVE_IMAGE_CACHE_SIZE', default=512, cast=int)
+
+# View Counts
+# Hits are buffered and written in batches. Use cms.view_counts.CacheViewCountBackend
+# with a shared cache (Redis, Memcached) to pool counts across workers.
+VIEW_COUNT_BACKEND = config('VIEW_COUNT_BACKEND', default='cms.view_counts.MemoryViewCountBackend')
+VIEW_COUNT_FLUSH_INTERVAL = config('VIEW_COUNT_FLUSH_INTERVAL', default=60, cast=int)  # seconds
+VIEW_COUNT_FLUSH_THRESHOLD = config('VIEW_COUNT_FLUSH_THRESHOLD', default=100, cast=int)  # hits
+# WebSub
+# Feeds advertise a hub; the built-in one (cms.websub) is used unless WEBSUB_HUB_URL is set.
+WEBSUB_HUB_URL = config('WEBSUB_HUB_URL', default='')
+WEBSUB_WORKERS = config('WEBSUB_WORKERS', default=4, cast=int)  # concurrent deliveries
+WEBSUB_MAX_ATTEMPTS = config('WEBSUB_MAX_ATTEMPTS', default=3, cast=int)
+WEBSUB_RETRY_DELAY = config('WEBSUB_RETRY_DELAY', default=5, cast=float)  # seconds, doubled per attempt
+WEBSUB_TIMEOUT = config('WEBSUB_TIMEOUT', default=10, cast=float)  # seconds per request to a subscriber
+WEBSUB_LEASE_SECONDS = config('WEBSUB_LEASE_SECONDS', default=10 * 24 * 60 * 60, cast=int)
+WEBSUB_VERIFY_ASYNC = config('WEBSUB_VERIFY_ASYNC', default=True, cast=bool)  # verify subscriptions on the delivery pool
+# Callbacks resolving to private, loopback or link-local addresses are refused unless this is set
+WEBSUB_ALLOW_PRIVATE_CALLBACKS = config('WEBSUB_ALLOW_PRIVATE_CALLBACKS', default=False, cast=bool)
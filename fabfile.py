@@ -152,6 +152,10 @@ def deploy(c):
             result = conn.run('python manage.py clear_cache')
             log_command('clear_cache', result)
 
+            logger.info("Publishing sitemaps and feeds...")
+            result = conn.run('python manage.py publish_static_indexes', warn=True)
+            log_command('publish_static_indexes', result)
+
 @task
 def restart_services(c):
     """Restart web server and related services."""